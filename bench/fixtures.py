@@ -0,0 +1,58 @@
+"""
+fixtures.py
+
+Real discord.py Guild and Member objects built from gateway-shaped payloads, for the benchmarks in this directory.
+Nothing here talks to Discord.
+
+Depends on: discord.py
+"""
+# import libraries
+from unittest import mock
+
+# import discord
+import discord
+
+
+GUILD_ID = 42
+FIRST_ROLE_ID = 1000
+
+
+def make_state():
+    state = mock.MagicMock()
+    state.self_id = 1
+    state.member_cache_flags = discord.MemberCacheFlags.all()
+    return state
+
+
+def make_guild(role_count: int, state=None):
+    """
+    Build a guild with @everyone plus role_count roles, IDs FIRST_ROLE_ID upwards.
+
+    :rtype: discord.Guild
+    """
+    roles = [_role_payload(GUILD_ID, 0)] + [_role_payload(FIRST_ROLE_ID + i, i + 1) for i in range(role_count)]
+    data = {
+        'id': str(GUILD_ID), 'name': 'bench', 'roles': roles, 'members': [], 'channels': [], 'emojis': [],
+        'stickers': [], 'features': [],
+    }
+    return discord.Guild(data=data, state=state or make_state())
+
+
+def make_member(guild: discord.Guild, role_ids: list, member_id: int = 7):
+    """
+    Build a member of guild holding role_ids.
+
+    :rtype: discord.Member
+    """
+    data = {
+        'user': {'id': str(member_id), 'username': f'member{member_id}', 'discriminator': '0', 'avatar': None},
+        'roles': [str(role_id) for role_id in role_ids], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0,
+    }
+    return discord.Member(data=data, guild=guild, state=guild._state)
+
+
+def _role_payload(role_id, position):
+    return {
+        'id': str(role_id), 'name': f'role{role_id}', 'permissions': '0', 'position': position, 'color': 0,
+        'hoist': False, 'managed': False, 'mentionable': False,
+    }
@@ -0,0 +1,42 @@
+"""
+role_lookup.py
+
+Benchmark for finding a button's role: the old scan of guild.roles against the guild's role-ID index (Guild.get_role).
+
+Usage: python bench/role_lookup.py [role counts...]
+
+Depends on: discord.py, fixtures
+"""
+# import libraries
+import sys
+import timeit
+
+# import discord
+import discord
+
+# import local modules
+from fixtures import FIRST_ROLE_ID, make_guild
+
+
+def main(role_counts):
+    print(f"{'roles':>6} {'scan (us)':>10} {'index (us)':>11} {'speedup':>8}")
+    for role_count in role_counts:
+        guild = make_guild(role_count)
+        # the worst case for the scan: the last role in position order
+        role_id = FIRST_ROLE_ID + role_count - 1
+        assert discord.utils.get(guild.roles, id=role_id) is guild.get_role(role_id) is not None
+
+        scan = _per_call(lambda: discord.utils.get(guild.roles, id=role_id))
+        index = _per_call(lambda: guild.get_role(role_id))
+        print(f"{role_count:>6} {scan * 1e6:>10.2f} {index * 1e6:>11.3f} {scan / index:>7.0f}x")
+
+
+def _per_call(function, repeat=5):
+    # best of several runs, in seconds per call
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+if __name__ == '__main__':
+    main([int(count) for count in sys.argv[1:]] or [50, 250, 500, 1000])
@@ -0,0 +1,65 @@
+"""
+role_membership.py
+
+Benchmark for deciding what a role button click does: the old give/take/toggle branch, which tested
+`role in member.roles` up to four times, against resolve_role_action's single role-ID lookup.
+
+Usage: python bench/role_membership.py [member role counts...]
+
+Depends on: discord.py, fixtures, RoleManagement
+"""
+# import libraries
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# import local modules
+from fixtures import FIRST_ROLE_ID, make_guild, make_member
+from ptn.buttonrolebot.modules.RoleManagement import resolve_role_action
+
+
+# the guild has more roles than any member, so member roles are spread through it
+GUILD_ROLES = 500
+ACTIONS = ('give', 'take', 'toggle')
+
+
+def old_branch(member, role, action):
+    # the branch order from before resolve_role_action
+    if role not in member.roles and action != 'take':
+        return 'add'
+    elif role in member.roles and action != 'give':
+        return 'remove'
+    elif role not in member.roles and action == 'take':
+        return None
+    elif role in member.roles and action == 'give':
+        return None
+
+
+def main(role_counts):
+    guild = make_guild(GUILD_ROLES)
+    print(f"{'member roles':>12} {'case':>12} {'old (us)':>9} {'new (us)':>9} {'speedup':>8}")
+    for role_count in role_counts:
+        member = make_member(guild, [FIRST_ROLE_ID + i * (GUILD_ROLES // role_count) for i in range(role_count)])
+        held = guild.get_role(FIRST_ROLE_ID)
+        missing = guild.get_role(FIRST_ROLE_ID + 1)
+        for case, role in (('has role', held), ('hasn\'t role', missing)):
+            for action in ACTIONS:
+                assert old_branch(member, role, action) == resolve_role_action(member, role.id, action)[0]
+            # the old branch's worst case runs all four membership tests
+            action = 'give' if role is held else 'take'
+            old = _per_call(lambda: old_branch(member, role, action))
+            new = _per_call(lambda: resolve_role_action(member, role.id, action))
+            print(f"{role_count:>12} {case:>12} {old * 1e6:>9.2f} {new * 1e6:>9.3f} {old / new:>7.0f}x")
+
+
+def _per_call(function, repeat=5):
+    # best of several runs, in seconds per call
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+if __name__ == '__main__':
+    main([int(count) for count in sys.argv[1:]] or [10, 50, 100, 250])
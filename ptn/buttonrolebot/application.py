@@ -5,8 +5,13 @@ The Python script that starts the bot.
 
 # import libraries
 import asyncio
+import logging
 import os
 
+# set up logging before anything else has something to say
+from ptn.buttonrolebot.modules.Logging import setup_logging
+setup_logging()
+
 # import bot Cogs
 from ptn.buttonrolebot.botcommands.AdminCommands import AdminCommands
 from ptn.buttonrolebot.botcommands.ButtonRoleCommands import ButtonRoleCommands
@@ -15,9 +20,15 @@ from ptn.buttonrolebot.botcommands.ButtonRoleCommands import ButtonRoleCommands
 from ptn.buttonrolebot.constants import TOKEN, _production, DATA_DIR
 from ptn.buttonrolebot.bot import bot
 
-print(f"Data dir is {DATA_DIR} from {os.path.join(os.getcwd(), 'ptn', 'buttonrolebot', DATA_DIR, '.env')}")
+# import local modules
+from ptn.buttonrolebot.modules.MetricsServer import start_metrics_server
+
+
+log = logging.getLogger(__name__)
+
+log.info("Data dir is %s from %s", DATA_DIR, os.path.join(os.getcwd(), 'ptn', 'buttonrolebot', DATA_DIR, '.env'))
 
-print(f'PTN buttonrolebot is connecting against production: {_production}.')
+log.info('PTN buttonrolebot is connecting against production: %s.', _production)
 
 
 def run():
@@ -28,7 +39,12 @@ async def buttonrolebot():
     async with bot:
         await bot.add_cog(AdminCommands(bot))
         await bot.add_cog(ButtonRoleCommands(bot))
-        await bot.start(TOKEN)
+        metrics_server = await start_metrics_server() # None unless PTN_BRB_METRICS_PORT is set
+        try:
+            await bot.start(TOKEN)
+        finally:
+            if metrics_server:
+                metrics_server.close()
 
 
 if __name__ == '__main__':
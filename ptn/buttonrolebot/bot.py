@@ -8,7 +8,9 @@ Dependencies: Constants, Metadata
 """
 # import libraries
 import asyncio
+import logging
 import re
+import time
 
 # import discord
 import discord
@@ -17,13 +19,58 @@ from discord.ext import commands
 
 # import constants
 from ptn.buttonrolebot._metadata import __version__
-from ptn.buttonrolebot.constants import channel_botdev, channel_botspam, EMBED_COLOUR_OK, role_council, role_mod, EMBED_COLOUR_ERROR, EMBED_COLOUR_QU
+from ptn.buttonrolebot.constants import channel_botdev, channel_botspam, EMBED_COLOUR_OK, role_council, role_mod, EMBED_COLOUR_ERROR, EMBED_COLOUR_QU, \
+    BUTTON_ACK_MODE, BUTTON_ACK_BUDGET, BUTTON_ACK_MARGIN, BUTTON_ROLE_TIMEOUT, TRACEMALLOC_AT_STARTUP, DISABLE_DEAD_BUTTONS, \
+    CRAWLER_ENABLED, ROLE_COALESCE_WINDOW, SLO_DEADLINE, ROLE_BUTTON_PATTERN
 
 # import classes
 # from ptn.buttonrolebot.ui_elements.ButtonCreator import DynamicButton
 
 # import modules
-from ptn.buttonrolebot.modules.ErrorHandler import CustomError, on_generic_error
+from ptn.buttonrolebot.modules.AuditLog import audit_log
+from ptn.buttonrolebot.modules.ClickStats import click_stats
+from ptn.buttonrolebot.modules.Database import database, panel_registry
+from ptn.buttonrolebot.modules.ErrorHandler import CustomError, on_generic_error, QueueFullError
+from ptn.buttonrolebot.modules.InteractionSLO import interaction_slo, snowflake_age
+from ptn.buttonrolebot.modules.LoopMonitor import loop_monitor
+from ptn.buttonrolebot.modules.MemoryDiagnostics import memory_tracker
+from ptn.buttonrolebot.modules.Metrics import counter, gauge, histogram, StageTimer
+from ptn.buttonrolebot.modules.PanelCrawler import panel_crawler
+from ptn.buttonrolebot.modules.Profiling import stack_sampler
+from ptn.buttonrolebot.modules.RESTMetrics import instrument_http_client
+from ptn.buttonrolebot.modules.Scheduler import click_admission, role_scheduler, role_bucket, PRIORITY_BACKGROUND
+from ptn.buttonrolebot.modules.Tracing import traced, annotate, span, current_trace_id
+from ptn.buttonrolebot.modules.RoleManagement import resolve_role_action, can_manage_role, invalidate_manageable_roles, \
+    role_coalescer, role_operations, broken_buttons
+
+
+log = logging.getLogger(__name__)
+
+
+# role button metrics
+button_clicks = counter('brb_button_clicks_total', 'Role button clicks, by acknowledgement mode')
+button_ack_seconds = counter('brb_button_ack_seconds_total', 'Total seconds from click to first response, by acknowledgement mode')
+button_response_seconds = counter('brb_button_response_seconds_total', 'Total seconds from click to final result, by acknowledgement mode')
+button_stage_seconds = histogram('brb_button_stage_seconds', 'Time spent in each stage of a role button click, by stage, action and outcome')
+
+# editor metrics
+editor_sessions_started = counter('brb_editor_sessions_started_total', 'Button and embed editor sessions opened, by editor')
+editor_sessions_finished = counter('brb_editor_sessions_finished_total', 'Editor sessions closed, by editor and result')
+
+
+def _open_editor_sessions():
+    # editor views don't time out, so sessions the user simply dismissed still count as open
+    open_sessions = dict(editor_sessions_started.collect())
+    for labels, finished in editor_sessions_finished.collect().items():
+        key = tuple(label for label in labels if label[0] == 'editor')
+        open_sessions[key] = open_sessions.get(key, 0) - finished
+    return open_sessions
+
+
+editor_sessions_open = gauge('brb_editor_sessions_open', 'Editor sessions opened but not yet committed or cancelled, by editor', _open_editor_sessions)
+
+# gateway metrics; latency is NaN until the first heartbeat is acknowledged
+gateway_latency = gauge('brb_gateway_latency_seconds', 'Time between sending a gateway heartbeat and receiving its acknowledgement', lambda: {(): bot.latency})
 
 
 """
@@ -34,9 +81,9 @@ I mean I could write a separate error handler for this, or I could NOT
 
 i'm so sorry kutu
 """
-class DynamicButton(discord.ui.DynamicItem[discord.ui.Button], template = r'button:role:(?P<role_id>[0-9]+):message:(?P<message_id>[0-9]+):action:(?P<action>[a-z]+)'):
+class DynamicButton(discord.ui.DynamicItem[discord.ui.Button], template = ROLE_BUTTON_PATTERN):
     def __init__(self, action: str, role_id: int, message_id: int) -> None:
-        print("DynamicButton init")
+        log.debug("DynamicButton init")
         super().__init__(
             discord.ui.Button(
                 label='Assign Role',
@@ -52,157 +99,346 @@ class DynamicButton(discord.ui.DynamicItem[discord.ui.Button], template = r'butt
     # This is called when the button is clicked and the custom_id matches the template.
     @classmethod
     async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str], /):
-        print("DynamicButton: from_custom_id called")
+        log.debug("DynamicButton: from_custom_id called")
         action = str(match['action']) if match else 'toggle'
         role_id = int(match['role_id'])
         message_id = int(match['message_id'])
         return cls(action, role_id, message_id)
 
+    @traced('role_button')
     async def callback(self, interaction: discord.Interaction) -> None:
-        print("DynamicButton: callback from:")
-        print(f'action:{self.action}:message:{self.message_id}:role:{self.role_id}')
+        log.debug("DynamicButton: callback from:")
+        log.debug('action:%s:message:%s:role:%s', self.action, self.message_id, self.role_id)
 
-        embed = discord.Embed(
-            description="⏳ Processing...",
-            color=EMBED_COLOUR_QU
-        )
+        start = time.perf_counter()
+        timer = StageTimer()
 
-        # quickly send off a message so we don't miss our 3 second response window
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        # turn the click away straight off if this guild already has too many waiting
+        ticket = click_admission.try_admit(interaction.guild.id)
+        if ticket is None:
+            log.warning("⚠ Too many role button clicks in progress, sending busy response")
+            timer.outcome = 'busy'
+            embed = discord.Embed(
+                description="⏳ I'm a bit busy right now! Please try again in a few seconds.",
+                color=EMBED_COLOUR_QU
+            )
+            try:
+                with timer.stage('respond'), span('interaction.send_message'):
+                    await interaction.response.send_message(embed=embed, ephemeral=True)
+                interaction_slo.record_response(interaction)
+            except Exception as e:
+                log.error(e)
+            timer.record('total', time.perf_counter() - start)
+            timer.observe(button_stage_seconds, action=self.action)
+            annotate(action=self.action, role=self.role_id, message=self.message_id, outcome=timer.outcome)
+            self.audit(interaction, timer.outcome, time.perf_counter() - start)
+            return
+
+        async def admitted_role_operation():
+            admission_start = time.perf_counter()
+            async with ticket:
+                timer.record('admission', time.perf_counter() - admission_start)
+                # repeat clicks on this button from this member while it's in progress share the first click's result
+                operation_key = (interaction.guild.id, interaction.user.id, self.role_id)
+                return await role_operations.run(operation_key, lambda: self.manage_user_role(interaction, timer))
+
+        # start on the role straight away so we can reply with the result if it's quick enough
+        role_task = asyncio.ensure_future(asyncio.wait_for(admitted_role_operation(), timeout=BUTTON_ROLE_TIMEOUT))
+
+        if BUTTON_ACK_MODE == 'adaptive':
+            # wait for as much of our 3 second response window as we're allowed before acknowledging, allowing for how
+            # long the interaction took to reach us; the coalescing window comes out of the budget too, so if there
+            # isn't time for the role change to even be sent, acknowledge straight away
+            age = snowflake_age(interaction.id)
+            budget = min(BUTTON_ACK_BUDGET, SLO_DEADLINE - BUTTON_ACK_MARGIN - age)
+            if budget > ROLE_COALESCE_WINDOW:
+                done, pending = await asyncio.wait({role_task}, timeout=budget)
+            else:
+                log.debug("Interaction is %.2fs old, deferring response straight away", age)
+                done = False
+            ack_mode = 'direct' if done else 'deferred'
+        else:
+            ack_mode = 'processing'
 
-        timeout = 30 # timeout in seconds for administering role
+        try:
+            if ack_mode == 'deferred':
+                log.debug("Role management exceeded %ss, deferring response", BUTTON_ACK_BUDGET)
+                with span('interaction.defer'):
+                    await interaction.response.defer(ephemeral=True, thinking=True)
+            elif ack_mode == 'processing':
+                embed = discord.Embed(
+                    description="⏳ Processing...",
+                    color=EMBED_COLOUR_QU
+                )
+                # quickly send off a message so we don't miss our 3 second response window
+                with span('interaction.send_message'):
+                    await interaction.response.send_message(embed=embed, ephemeral=True)
+            if ack_mode != 'direct':
+                interaction_slo.record_response(interaction)
+                timer.record('ack', time.perf_counter() - start)
+                button_ack_seconds.inc(time.perf_counter() - start, mode=ack_mode)
 
-        async def manage_user_role():
             try:
-                print(f"Spamchannel is {spamchannel}")
-
-                # get role object
-                role = discord.utils.get(interaction.guild.roles, id=self.role_id)
-
-                # check if we have permissions for this role
-                bot_member: discord.Member = interaction.guild.get_member(bot.user.id)
-                if bot_member.top_role <= role or role.managed:
-                    print(f"⚠ We don't have permission for {role}")
-                    try:
-                        # notify bot-spam
-                        message: discord.Message = await interaction.channel.fetch_message(self.message_id)
-                        embed = discord.Embed(
-                            description=f':warning: <@{bot_member.id}> does not have permission to manage <@&{role.id}>. Called from {message.jump_url}.\n\n'
-                                        'Bot role is not high enough in role hierarchy to grant this role. **Please move the bot role higher or edit the offending button**.',
-                            color=EMBED_COLOUR_ERROR
-                        )
-                        content = f'🔔 <@&{role_mod()}>: Button failed to grant role <@&{role.id}>'
-                        await spamchannel.send(content=content, embed=embed)
-                    except Exception as e:
-                        print(f'Error notifying bot-spam: {e}')
-
-                    try:
-                        # notify user
-                        raise CustomError(f"Sorry, I don't have permission to manage <@&{role.id}>. Please contact a <@&{role_mod()}> or <@&{role_council()}> member.")
-                    except Exception as e:
-                        await on_generic_error(spamchannel, interaction, e)
-                    return False
-
-                # check if user has it
-                print(f'Check whether user has role: "{role}"')
-                
-                if role not in interaction.user.roles and self.action != 'take':
-                    print('User doesn\'t have role and action is not take')
-                    # rolercoaster giveth
-                    await interaction.user.add_roles(role)
-                    print(f'➕ Gave {interaction.user} the {role} role')
-                    adverb = "now"
-
-                elif role in interaction.user.roles and self.action != 'give':
-                    print('User has role and action is not give')
-                    # ...and rolercoaster taketh away
-                    await interaction.user.remove_roles(role)
-                    print(f'➖ Removed {interaction.user} from the {role} role')
-                    adverb = "no longer"
-
-                elif role not in interaction.user.roles and self.action == 'take':
-                    print('No action required: user hasn\'t got role and action is take')
-                    adverb = 'don\'t'
-
-                elif role in interaction.user.roles and self.action == 'give':
-                    print('No action required: user already has role and action is give')
-                    adverb = 'already'
-
+                embed = await role_task
+                with timer.stage('respond'):
+                    await _send_button_response(interaction, embed)
+
+            except CustomError as e:
+                timer.outcome = timer.outcome or 'error'
+                with timer.stage('respond'), span('interaction.error_response'):
+                    await on_generic_error(bot.get_channel(channel_botspam()), interaction, e)
+
+            except asyncio.TimeoutError: # TODO move to error handler
+                log.warning("User role management timed out")
+                timer.outcome = 'timeout'
+                # notify user
                 embed = discord.Embed(
-                    description=f'You {adverb} have the <@&{role.id}> role.',
-                    color=EMBED_COLOUR_OK
+                    description=f"❌ Timed out. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance.",
+                    color=EMBED_COLOUR_ERROR
                 )
+                with timer.stage('respond'):
+                    await _send_button_response(interaction, embed)
 
-                await interaction.edit_original_response(embed=embed)
+                # notify bot-spam
+                await self.notify_botspam(
+                    interaction,
+                    f':warning: <@{bot.user.id}> **timed out** ({BUTTON_ROLE_TIMEOUT}) while trying to {self.action} <@&{self.role_id}> for <@{interaction.user.id}>. Called from {self.jump_url(interaction)}.'
+                )
 
-            except Forbidden as e:
-                print(e)
-                try:
-                    # notify bot-spam
-                    message: discord.Message = await interaction.channel.fetch_message(self.message_id)
-                    embed = discord.Embed(
-                        description=f':warning: <@{bot_member.id}> does not have permission to manage <@&{role.id}> for <@{interaction.user.id}>. Called from {message.jump_url}. **Bot role needs Manage Roles permission**.',
-                        color=EMBED_COLOUR_ERROR
-                    )
-                    embed.set_footer(text=e)
-                    await spamchannel.send(embed=embed)
-                except Exception as e:
-                    print(f'Error notifying bot-spam: {e}')
+        except Exception as e:
+            log.error(e)
+            timer.outcome = 'error'
+
+        finally:
+            if not role_task.done():
+                role_task.cancel()
+            ticket.release()
+            elapsed = time.perf_counter() - start
+            if ack_mode == 'direct':
+                # the result was our acknowledgement
+                timer.record('ack', elapsed)
+                interaction_slo.record_response(interaction)
+                button_ack_seconds.inc(elapsed, mode=ack_mode)
+            button_clicks.inc(mode=ack_mode)
+            button_response_seconds.inc(elapsed, mode=ack_mode)
+            # clicks that joined another click's operation don't see its outcome
+            timer.outcome = timer.outcome or 'joined'
+            timer.record('total', elapsed)
+            timer.observe(button_stage_seconds, action=self.action)
+            annotate(
+                error=timer.outcome in ('error', 'timeout'),
+                action=self.action, role=self.role_id, message=self.message_id, ack=ack_mode, outcome=timer.outcome
+            )
+            self.audit(interaction, timer.outcome, elapsed)
+
+    def audit(self, interaction: discord.Interaction, result: str, latency: float):
+        """
+        Queue this click's outcome for the click audit log.
+        """
+        audit_log.record(
+            interaction.guild.id, interaction.channel_id, self.message_id, interaction.user.id, self.role_id,
+            self.action, result, latency, interaction.id
+        )
 
-                print("Raising error for user")
-                # raise error
-                try:
-                    error = f"Role <@&{role.id}> not granted. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance."
-                    raise CustomError(error)
-                except Exception as e:
-                    await on_generic_error(spamchannel, interaction, e)
-                return 
+    async def manage_user_role(self, interaction: discord.Interaction, timer: StageTimer):
+        """
+        Give or take our role for the user who clicked.
+
+        Errors for the user are raised as CustomError; bot-spam is notified here. Buttons already known to be broken get
+        an error embed straight back without going near Discord.
+
+        :param timer: Collects stage timings and the outcome for this click.
+        :returns: The embed to show the user.
+        :rtype: discord.Embed
+        """
+        # if we already know this button is broken, say so straight away
+        with timer.stage('resolve'):
+            verdict = broken_buttons.get(interaction.guild.id, self.role_id)
+        if verdict:
+            log.debug("Button for %s is known to be broken (%s), sending cached response", self.role_id, verdict.reason)
+            timer.outcome = 'broken'
+            return _button_error_embed(verdict.user_message)
 
-            except Exception as e:
-                print(e)
-                try:
-                    # notify bot-spam
-                    message: discord.Message = await interaction.channel.fetch_message(self.message_id)
-                    embed = discord.Embed(
-                        description=f':warning: <@{bot_member.id}> failed administering <@&{role.id}> for <@{interaction.user.id}>. Called from {message.jump_url}. Error given:\n{e}',
-                        color=EMBED_COLOUR_ERROR
-                    )
-                    await spamchannel.send(embed=embed)
-                except Exception as e:
-                    print(f'Error notifying bot-spam: {e}')
+        try:
+            # get role object - Guild.get_role is a dict lookup on the role cache discord.py keeps updated from
+            # the gateway; iterating guild.roles sorts and scans every role on the server
+            with timer.stage('resolve'):
+                role = interaction.guild.get_role(self.role_id)
+
+            # check the role still exists
+            if role is None:
+                log.warning("⚠ No role found for %s", self.role_id)
+                timer.outcome = 'broken'
+                user_message = f"Sorry, the role for this button no longer exists. Please contact a <@&{role_mod()}> or <@&{role_council()}> member."
+                if not broken_buttons.record(interaction.guild.id, self.role_id, 'missing', user_message):
+                    return _button_error_embed(user_message)
+                # notify bot-spam
+                await self.notify_botspam(
+                    interaction,
+                    f':warning: A button on {self.jump_url(interaction)} is set to manage role `{self.role_id}`, which no longer exists. '
+                    '**Please edit or remove the offending button**.',
+                    content=f'🔔 <@&{role_mod()}>: Button failed to grant deleted role `{self.role_id}`'
+                )
 
-                print("Raising error for user")
-                # raise error
-                try:
-                    error = f"Role <@&{role.id}> not granted. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance."
-                    raise CustomError(error)
-                except Exception as e:
-                    await on_generic_error(spamchannel, interaction, e)
-                return
+                # notify user
+                raise CustomError(user_message)
+
+            # check if we have permissions for this role
+            with timer.stage('resolve'):
+                manageable = can_manage_role(interaction.guild, role.id)
+            if not manageable:
+                log.warning("⚠ We don't have permission for %s", role)
+                timer.outcome = 'broken'
+                user_message = f"Sorry, I don't have permission to manage <@&{role.id}>. Please contact a <@&{role_mod()}> or <@&{role_council()}> member."
+                if not broken_buttons.record(interaction.guild.id, self.role_id, 'hierarchy', user_message):
+                    return _button_error_embed(user_message)
+                # notify bot-spam
+                await self.notify_botspam(
+                    interaction,
+                    f':warning: <@{bot.user.id}> does not have permission to manage <@&{role.id}>. Called from {self.jump_url(interaction)}.\n\n'
+                    'Bot role is not high enough in role hierarchy to grant this role. **Please move the bot role higher or edit the offending button**.',
+                    content=f'🔔 <@&{role_mod()}>: Button failed to grant role <@&{role.id}>'
+                )
 
-        try:
-            await asyncio.wait_for(manage_user_role(), timeout=timeout)
+                # notify user
+                raise CustomError(user_message)
+
+            # check if user has it and decide what to do about it
+            log.debug('Check whether user has role: "%s"', role)
+            with timer.stage('resolve'):
+                role_change, adverb = resolve_role_action(interaction.user, role.id, self.action)
+
+            if role_change == 'add':
+                # rolercoaster giveth
+                with timer.stage('mutation'):
+                    await role_coalescer.submit(interaction.user, role, 'add')
+                log.info('➕ Gave %s the %s role', interaction.user, role)
+                timer.outcome = 'given'
+
+            elif role_change == 'remove':
+                # ...and rolercoaster taketh away
+                with timer.stage('mutation'):
+                    await role_coalescer.submit(interaction.user, role, 'remove')
+                log.info('➖ Removed %s from the %s role', interaction.user, role)
+                timer.outcome = 'taken'
+
+            else:
+                log.debug('No action required: user %s has role and action is %s', adverb, self.action)
+                timer.outcome = 'unchanged'
 
-        except asyncio.TimeoutError: # TODO move to error handler
-            print("User role management timed out")
-            # notify user
             embed = discord.Embed(
-                description=f"❌ Timed out. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance.",
-                color=EMBED_COLOUR_ERROR
+                description=f'You {adverb} have the <@&{role.id}> role.',
+                color=EMBED_COLOUR_OK
             )
-            await interaction.edit_original_response(embed=embed)
 
+            return embed
+
+        except CustomError:
+            raise
+
+        except QueueFullError as e:
+            log.error(e)
+            timer.outcome = 'busy'
+            raise CustomError("I'm handling a lot of role requests right now. Please try again in a minute.")
+
+        except Forbidden as e:
+            log.error(e)
+            timer.outcome = 'broken'
+            user_message = f"Role <@&{self.role_id}> not granted. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance."
+            if not broken_buttons.record(interaction.guild.id, self.role_id, 'forbidden', user_message):
+                return _button_error_embed(user_message)
+            # notify bot-spam
+            await self.notify_botspam(
+                interaction,
+                f':warning: <@{bot.user.id}> does not have permission to manage <@&{self.role_id}> for <@{interaction.user.id}>. Called from {self.jump_url(interaction)}. **Bot role needs Manage Roles permission**.',
+                footer=str(e)
+            )
+
+            log.debug("Raising error for user")
+            raise CustomError(user_message)
+
+        except Exception as e:
+            log.error(e)
+            timer.outcome = 'error'
             # notify bot-spam
-            message: discord.Message = await interaction.channel.fetch_message(self.message_id)
+            await self.notify_botspam(
+                interaction,
+                f':warning: <@{bot.user.id}> failed administering <@&{self.role_id}> for <@{interaction.user.id}>. Called from {self.jump_url(interaction)}. Error given:\n{e}'
+            )
+
+            log.debug("Raising error for user")
+            raise CustomError(f"Role <@&{self.role_id}> not granted. Please contact a member of the <@&{role_mod()}> team or <@&{role_council()}> for assistance.")
+
+    def jump_url(self, interaction: discord.Interaction):
+        """
+        Link to the message this button is on, built from IDs we already have rather than fetching the message.
 
+        :rtype: str
+        """
+        return f'https://discord.com/channels/{interaction.guild_id}/{interaction.channel_id}/{self.message_id}'
+
+    async def notify_botspam(self, interaction: discord.Interaction, description: str, content: str = None, footer: str = None):
+        """
+        Report a role button failure to bot-spam. Never raises: we're already handling an error.
+        """
+        try:
             embed = discord.Embed(
-                description=f':warning: <@{bot.user.id}> **timed out** ({timeout}) while trying to {self.action} <@&{self.role_id}> for <@{interaction.user.id}>. Called from {message.jump_url}.',
+                description=description,
                 color=EMBED_COLOUR_ERROR
             )
-            await spamchannel.send(embed=embed)
-
+            # the trace ID finds this click's log lines and spans
+            trace_footer = f"Trace ID: {current_trace_id() or interaction.id}"
+            embed.set_footer(text=f"{footer}\n{trace_footer}" if footer else trace_footer)
+            await bot.get_channel(channel_botspam()).send(content=content, embed=embed)
         except Exception as e:
-            print(e)
+            log.warning('Error notifying bot-spam: %s', e)
+
+
+# error embed for a role button click, matching how CustomError is shown
+def _button_error_embed(message):
+    return discord.Embed(
+        description=f"❌ {message}",
+        color=EMBED_COLOUR_ERROR
+    )
+
+
+# reply to a role button click with its result, whether or not we've already acknowledged it
+async def _send_button_response(interaction: discord.Interaction, embed: discord.Embed):
+    # interaction responses don't go through the HTTP client, so they're traced here
+    if interaction.response.is_done():
+        with span('interaction.edit_original_response'):
+            await interaction.edit_original_response(embed=embed)
+    else:
+        with span('interaction.send_message'):
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+def _disabled_role_view(message: discord.Message, role_id: int):
+    # the panel's buttons as they are on the message, with any for the role disabled; None if there are none to disable
+    view = discord.ui.View.from_message(message, timeout=None)
+    disabled = 0
+    for item in view.children:
+        match = ROLE_BUTTON_PATTERN.match(getattr(item, 'custom_id', None) or '')
+        if match and int(match['role_id']) == role_id and not item.disabled:
+            item.disabled = True
+            disabled += 1
+    return view if disabled else None
+
+
+def _jump_url(guild_id: int, channel_id: int, message_id: int):
+    return f'https://discord.com/channels/{guild_id}/{channel_id}/{message_id}'
+
+
+def _panel_list(guild_id: int, affected_buttons: list):
+    # one line per panel, listing its buttons for the role
+    panels = {}
+    for button in affected_buttons:
+        panels.setdefault((button['channel_id'], button['message_id']), []).append(button)
+    lines = []
+    for (channel_id, message_id), buttons in panels.items():
+        labels = ', '.join(f"{button['emoji'] or ''} {button['label'] or ''}".strip() or '(no label)' for button in buttons)
+        lines.append(f"• {_jump_url(guild_id, channel_id, message_id)}: {labels}")
+    return panels, lines
 
 
 """
@@ -221,15 +457,59 @@ class ButtonRoleBot(commands.Bot):
         # For dynamic items, we must register the classes instead of the views.
         self.add_dynamic_items(DynamicButton)
 
+        # warn bot-spam when too many interaction responses are missing Discord's window
+        interaction_slo.alert = self.post_alert
+
+        # report anything that blocks the event loop
+        loop_monitor.alert = self.post_alert
+        loop_monitor.start()
+
+        # continuous stack sampling, if PTN_BRB_SAMPLER_RATE is set
+        stack_sampler.start()
+
+        # write click outcomes to the audit log in batches
+        audit_log.start()
+
+        # prune old click history once it's been rolled up
+        click_stats.start()
+
+        # trace allocations from the start so the memory command's baseline is from before any editors were opened
+        if TRACEMALLOC_AT_STARTUP:
+            await memory_tracker.take_baseline()
+
+        # record latency, status and rate limits for every REST call
+        instrument_http_client(self.http)
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        # dispatched as each interaction arrives, before its handler runs
+        interaction_slo.record_start(interaction)
+
+    async def post_alert(self, message: str, color=EMBED_COLOUR_ERROR):
+        try:
+            embed = discord.Embed(
+                description=message,
+                color=color
+            )
+            await self.get_channel(channel_botspam()).send(embed=embed)
+        except Exception as e:
+            log.error(e)
+
+    async def close(self):
+        loop_monitor.stop()
+        # write out the sampler's last stacks; it joins its thread, so keep that off the loop
+        await asyncio.to_thread(stack_sampler.stop)
+        await super().close()
+        click_stats.close()
+        await audit_log.close()
+        await database.close()
+
     async def on_ready(self):
         try:
             # TODO: this should be moved to an on_setup hook
-            print('-----')
-            print(f'{bot.user.name} version: {__version__} has connected to Discord!')
-            print('-----')
+            log.info('-----')
+            log.info('%s version: %s has connected to Discord!', bot.user.name, __version__)
+            log.info('-----')
             devchannel = bot.get_channel(channel_botdev())
-            global spamchannel
-            spamchannel = bot.get_channel(channel_botspam())
             embed = discord.Embed(
                 title="🟢 BUTTON ROLE BOT ONLINE",
                 description=f"🎢<@{bot.user.id}> connected, version **{__version__}**.",
@@ -238,12 +518,110 @@ class ButtonRoleBot(commands.Bot):
             await devchannel.send(embed=embed)
 
         except Exception as e:
-            print(e)
+            log.error(e)
+
+        # look for panels set up before the panel registry; does nothing if a crawl is already running
+        if CRAWLER_ENABLED:
+            panel_crawler.start(self)
+
+    # role hierarchy changes: drop cached manageable roles and broken button verdicts so they are rechecked on the next click
+    async def on_guild_role_create(self, role: discord.Role):
+        invalidate_manageable_roles(role.guild.id)
+        broken_buttons.invalidate_guild(role.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        invalidate_manageable_roles(role.guild.id)
+        broken_buttons.invalidate_guild(role.guild.id)
+        await self.handle_deleted_role_buttons(role)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        # reordering roles dispatches an update for each role that moved
+        if before.position != after.position or before.managed != after.managed:
+            invalidate_manageable_roles(after.guild.id)
+            broken_buttons.invalidate_guild(after.guild.id)
+        elif before.permissions != after.permissions:
+            # may have fixed (or caused) a missing Manage Roles permission
+            broken_buttons.invalidate_guild(after.guild.id)
+
+        if before.name != after.name:
+            await self.report_renamed_role_buttons(before, after)
+
+    async def handle_deleted_role_buttons(self, role: discord.Role):
+        """
+        Find every button for a deleted role, disable them on their panels and report them to bot-spam in one message.
+        """
+        try:
+            affected_buttons = await panel_registry.buttons_for_role(role.guild.id, role.id)
+        except Exception as e:
+            log.error("Couldn't look up buttons for deleted role %s: %s", role.id, e)
+            return
+        if not affected_buttons:
+            return
+
+        panels, lines = _panel_list(role.guild.id, affected_buttons)
+        log.warning("⚠ Role %s (%s) was deleted; %s buttons on %s panels used it", role.name, role.id, len(affected_buttons), len(panels))
+
+        failed = []
+        if DISABLE_DEAD_BUTTONS:
+            for channel_id, message_id in panels:
+                try:
+                    # work from the panel as it is now rather than our record of it, which may be out of date;
+                    # panel reads and edits can wait behind member clicks
+                    channel = self.get_partial_messageable(channel_id)
+                    message = await role_scheduler.run(
+                        role_bucket(role.guild.id, 'message_fetch'), self.user.id,
+                        lambda channel=channel, message_id=message_id: channel.fetch_message(message_id), PRIORITY_BACKGROUND
+                    )
+                    view = _disabled_role_view(message, role.id)
+                    if view is None:
+                        log.warning("⚠ Panel %s has no enabled buttons for role %s, leaving it alone", message_id, role.id)
+                        continue
+                    await role_scheduler.run(
+                        role_bucket(role.guild.id, 'message_edit'), self.user.id,
+                        lambda message=message, view=view: message.edit(view=view), PRIORITY_BACKGROUND
+                    )
+                except discord.NotFound:
+                    log.info("Panel %s no longer exists, removing it from the registry", message_id)
+                    await panel_registry.delete_panel(message_id)
+                except Exception as e:
+                    log.error("Couldn't disable buttons on panel %s: %s", message_id, e)
+                    failed.append(message_id)
+
+        description = f"🗑 Role **{role.name}** (`{role.id}`) was deleted. {len(affected_buttons)} button(s) on " \
+                      f"{len(panels)} panel(s) used it:\n" + '\n'.join(lines)
+        if DISABLE_DEAD_BUTTONS:
+            description += "\n\nThese buttons have been disabled. Use `Manage Role Buttons` to remove or reassign them."
+            if failed:
+                description += f"\n⚠ Couldn't disable buttons on {len(failed)} panel(s); see the logs."
+        await self.post_alert(description[:4096])
+
+    async def report_renamed_role_buttons(self, before: discord.Role, after: discord.Role):
+        """
+        Tell bot-spam which panels have buttons for a renamed role, as their labels may mention the old name.
+        """
+        try:
+            affected_buttons = await panel_registry.buttons_for_role(after.guild.id, after.id)
+        except Exception as e:
+            log.error("Couldn't look up buttons for renamed role %s: %s", after.id, e)
+            return
+        if not affected_buttons:
+            return
+
+        panels, lines = _panel_list(after.guild.id, affected_buttons)
+        description = f"✏ Role **{before.name}** was renamed to <@&{after.id}>. {len(affected_buttons)} button(s) on " \
+                      f"{len(panels)} panel(s) use it, check their labels are still right:\n" + '\n'.join(lines)
+        await self.post_alert(description[:4096], color=EMBED_COLOUR_QU)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # our own top role may have changed
+        if after.id == self.user.id and before.roles != after.roles:
+            invalidate_manageable_roles(after.guild.id)
+            broken_buttons.invalidate_guild(after.guild.id)
 
     async def on_disconnect(self):
-        print('-----')
-        print(f'🔌ButtonRoleBot has disconnected from discord server, version: {__version__}.')
-        print('-----')
+        log.info('-----')
+        log.info('🔌ButtonRoleBot has disconnected from discord server, version: %s.', __version__)
+        log.info('-----')
 
 
 bot = ButtonRoleBot()
@@ -3,12 +3,16 @@ Our main Cog for BRB commands.
 
 """
 
+# import libraries
+import io
+import logging
+
 # discord.py
 import discord
 from discord.ext import commands
 
 # import bot
-from ptn.buttonrolebot.bot import bot
+from ptn.buttonrolebot.bot import bot, button_stage_seconds
 
 # local constants
 from ptn.buttonrolebot._metadata import __version__
@@ -18,7 +22,13 @@ from ptn.buttonrolebot.constants import role_council, role_mod
 # local modules
 # from ptn.buttonrolebot.modules.Embeds import None
 from ptn.buttonrolebot.modules.ErrorHandler import on_app_command_error
+from ptn.buttonrolebot.modules.MemoryDiagnostics import memory_tracker, live_object_counts, discord_cache_sizes, max_rss_mib
+from ptn.buttonrolebot.modules.Profiling import profile_lock, profile_loop, PROFILE_MAX_SECONDS
+from ptn.buttonrolebot.modules.RESTMetrics import rest_request_seconds, rest_responses, rest_rate_limited, \
+    rest_retry_after_seconds, rest_errors
+
 
+log = logging.getLogger(__name__)
 
 
 """
@@ -29,7 +39,7 @@ returns: error message to user and log
 
 @bot.listen()
 async def on_command_error(ctx, error):
-    print(error)
+    log.error(error)
     if isinstance(error, commands.BadArgument):
         message=f'Bad argument: {error}'
 
@@ -87,7 +97,7 @@ class AdminCommands(commands.Cog):
     @commands.command(name='ping', aliases=['hello', 'ehlo', 'helo'], help='Use to check if BRB is online and responding.')
     @commands.has_any_role(*constants.any_elevated_role)
     async def ping(self, ctx):
-        print(f"{ctx.author} used PING in {ctx.channel.name}")
+        log.info("%s used PING in %s", ctx.author, ctx.channel.name)
         embed = discord.Embed(
             title="🟢 BUTTON ROLE BOT ONLINE",
             description=f"🎢<@{bot.user.id}> connected, version **{__version__}**.",
@@ -96,17 +106,198 @@ class AdminCommands(commands.Cog):
         await ctx.send(embed=embed)
 
 
+    # latency breakdown for role button clicks
+    @commands.command(name='latency', aliases=['stages'], help='Show p50/p95/p99 role button click latency for each stage.')
+    @commands.has_any_role(*constants.any_elevated_role)
+    async def latency(self, ctx):
+        log.info("%s used LATENCY in %s", ctx.author, ctx.channel.name)
+        stage_order = ['admission', 'resolve', 'mutation', 'ack', 'respond', 'total']
+
+        # group series by action and outcome
+        groups = {}
+        for labels, series in button_stage_seconds.collect().items():
+            labels = dict(labels)
+            groups.setdefault((labels['action'], labels['outcome']), {})[labels['stage']] = series
+
+        if not groups:
+            embed = discord.Embed(
+                description="No role button clicks recorded since the bot started.",
+                color=constants.EMBED_COLOUR_QU
+            )
+            return await ctx.send(embed=embed)
+
+        embed = discord.Embed(
+            title="⏱ ROLE BUTTON LATENCY",
+            description="Milliseconds per stage since the bot started.",
+            color=constants.EMBED_COLOUR_OK
+        )
+        for (action, outcome), stages in sorted(groups.items())[:25]: # embeds can hold 25 fields
+            lines = [f"{'stage':<10}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+            for stage in sorted(stages, key=lambda name: stage_order.index(name) if name in stage_order else len(stage_order)):
+                series = stages[stage]
+                p50, p95, p99 = (button_stage_seconds.quantile(q, series) * 1000 for q in (0.5, 0.95, 0.99))
+                lines.append(f"{stage:<10}{series.count:>6}{p50:>8.0f}{p95:>8.0f}{p99:>8.0f}")
+            table = '\n'.join(lines)
+            embed.add_field(name=f"{action} → {outcome}", value=f"```{table}```", inline=False)
+
+        await ctx.send(embed=embed)
+
+
+    # REST call summary by route
+    @commands.command(name='rest', aliases=['routes'], help='Show REST calls, latency and rate limits by route.')
+    @commands.has_any_role(*constants.any_elevated_role)
+    async def rest(self, ctx):
+        log.info("%s used REST in %s", ctx.author, ctx.channel.name)
+
+        routes = {}
+        for labels, series in rest_request_seconds.collect().items():
+            routes[dict(labels)['route']] = {'series': series, 'failed': 0, 'rate_limited': 0, 'retry_after': 0}
+        for labels, count in rest_responses.collect().items():
+            labels = dict(labels)
+            if labels['status'] != '2xx' and labels['route'] in routes:
+                routes[labels['route']]['failed'] += count
+        for labels, count in rest_rate_limited.collect().items():
+            labels = dict(labels)
+            if labels['route'] in routes:
+                routes[labels['route']]['rate_limited'] += count
+        for labels, seconds in rest_retry_after_seconds.collect().items():
+            labels = dict(labels)
+            if labels['route'] in routes:
+                routes[labels['route']]['retry_after'] += seconds
+
+        if not routes:
+            embed = discord.Embed(
+                description="No REST calls recorded since the bot started.",
+                color=constants.EMBED_COLOUR_QU
+            )
+            return await ctx.send(embed=embed)
+
+        embed = discord.Embed(
+            title="🌐 REST ROUTES",
+            description="Since the bot started. Most rate limited routes come first, then the busiest. Failed counts any non-2xx outcome.",
+            color=constants.EMBED_COLOUR_OK
+        )
+        # routes that cost us the most rate limit budget come first
+        by_cost = sorted(routes.items(), key=lambda item: (item[1]['rate_limited'], item[1]['series'].count), reverse=True)
+        for name, route in by_cost[:25]: # embeds can hold 25 fields
+            series = route['series']
+            p50, p95 = (rest_request_seconds.quantile(q, series) * 1000 for q in (0.5, 0.95))
+            table = f"{'calls':>6}{'p50':>7}{'p95':>7}{'fail':>6}{'429':>5}{'wait s':>8}\n" \
+                    f"{series.count:>6}{p50:>7.0f}{p95:>7.0f}{route['failed']:>6}{route['rate_limited']:>5}{route['retry_after']:>8.1f}"
+            embed.add_field(name=name[:256], value=f"```{table}```", inline=False)
+
+        errors = sum(rest_errors.collect().values())
+        if errors:
+            embed.set_footer(text=f"{errors} calls failed without a response from Discord.")
+
+        await ctx.send(embed=embed)
+
+
+    # profile the running bot
+    @commands.command(name='profile', help=f'Profile the bot for a number of seconds (1-{PROFILE_MAX_SECONDS}, default 30) and upload the stats.')
+    @commands.has_any_role(*constants.any_elevated_role)
+    async def profile(self, ctx, seconds: int = 30):
+        log.info("%s used PROFILE for %ss in %s", ctx.author, seconds, ctx.channel.name)
+
+        if not 1 <= seconds <= PROFILE_MAX_SECONDS:
+            embed = discord.Embed(
+                description=f"❌ Profiling time must be between 1 and {PROFILE_MAX_SECONDS} seconds.",
+                color=constants.EMBED_COLOUR_ERROR
+            )
+            return await ctx.send(embed=embed)
+
+        if profile_lock.locked():
+            embed = discord.Embed(
+                description="❌ A profiling session is already running. Please wait for it to finish.",
+                color=constants.EMBED_COLOUR_ERROR
+            )
+            return await ctx.send(embed=embed)
+
+        async with profile_lock:
+            embed = discord.Embed(
+                description=f"⏳ Profiling for {seconds} seconds...",
+                color=constants.EMBED_COLOUR_QU
+            )
+            await ctx.send(embed=embed)
+
+            result = await profile_loop(seconds)
+
+        files = [
+            discord.File(io.BytesIO(result.report.encode('utf-8')), filename='brb-profile.txt'),
+            discord.File(io.BytesIO(result.raw), filename='brb-profile.pstats')
+        ]
+        embed = discord.Embed(
+            description=f"✅ Profiled for {result.seconds:.1f}s. Top functions by cumulative and total time are in "
+                        f"`brb-profile.txt`; `brb-profile.pstats` can be opened with `pstats` or snakeviz.",
+            color=constants.EMBED_COLOUR_OK
+        )
+        await ctx.send(embed=embed, files=files)
+
+
+    # memory diagnostics
+    @commands.command(name='memory', aliases=['mem'], help='Report memory use. Use "memory baseline" to diff future reports against now, "memory stop" to stop tracemalloc.')
+    @commands.has_any_role(*constants.any_elevated_role)
+    async def memory(self, ctx, action: str = 'report'):
+        log.info("%s used MEMORY %s in %s", ctx.author, action, ctx.channel.name)
+        action = action.lower()
+
+        if action == 'stop':
+            memory_tracker.stop()
+            embed = discord.Embed(
+                description="✅ tracemalloc stopped and baseline cleared.",
+                color=constants.EMBED_COLOUR_OK
+            )
+            return await ctx.send(embed=embed)
+
+        if action == 'baseline' or (action == 'report' and memory_tracker.baseline is None):
+            async with ctx.typing():
+                await memory_tracker.take_baseline()
+            if action == 'baseline':
+                embed = discord.Embed(
+                    description="✅ Baseline taken. Run `memory` later to see what has grown since.",
+                    color=constants.EMBED_COLOUR_OK
+                )
+                return await ctx.send(embed=embed)
+
+        elif action != 'report':
+            embed = discord.Embed(
+                description=f"❌ Unknown action `{action}`. Use `report`, `baseline` or `stop`.",
+                color=constants.EMBED_COLOUR_ERROR
+            )
+            return await ctx.send(embed=embed)
+
+        async with ctx.typing():
+            objects = live_object_counts()
+            caches = discord_cache_sizes(bot)
+            allocations = await memory_tracker.allocation_report()
+
+        object_lines = '\n'.join(f"{name:<28}{count:>7}" for name, count in objects.most_common()) or 'none'
+        cache_lines = '\n'.join(f"{name:<28}{count:>7}" for name, count in caches.items())
+
+        embed = discord.Embed(
+            title="🧠 MEMORY",
+            description=f"Peak RSS **{max_rss_mib():.1f} MiB**. Allocation sites are in the attached file.",
+            color=constants.EMBED_COLOUR_OK
+        )
+        embed.add_field(name="Live objects", value=f"```{object_lines[:1000]}```", inline=False)
+        embed.add_field(name="discord.py caches", value=f"```{cache_lines[:1000]}```", inline=False)
+
+        report = f"Live objects\n{object_lines}\n\ndiscord.py caches\n{cache_lines}\n\n{allocations}"
+        file = discord.File(io.BytesIO(report.encode('utf-8')), filename='brb-memory.txt')
+        await ctx.send(embed=embed, file=file)
+
+
     # command to sync interactions - must be done whenever the bot has appcommands added/removed
     @commands.command(name='sync', help='Synchronise BRB interactions with server')
     @commands.has_any_role(*constants.any_elevated_role)
     async def sync(self, ctx):
-        print(f"Interaction sync called from {ctx.author.display_name}")
+        log.info("Interaction sync called from %s", ctx.author.display_name)
         async with ctx.typing():
             try:
                 bot.tree.copy_global_to(guild=constants.guild_obj)
                 await bot.tree.sync(guild=constants.guild_obj)
-                print("Synchronised bot tree.")
+                log.info("Synchronised bot tree.")
                 await ctx.send("Synchronised bot tree.")
             except Exception as e:
-                print(f"Tree sync failed: {e}.")
+                log.warning("Tree sync failed: %s.", e)
                 return await ctx.send(f"Failed to sync bot tree: {e}")
\ No newline at end of file
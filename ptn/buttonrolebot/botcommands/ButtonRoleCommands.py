@@ -3,9 +3,11 @@ Our main Cog for BRB commands.
 
 """
 
+# import libraries
+import logging
+
 # libraries
 import re
-import traceback
 import uuid
 
 # discord.py
@@ -15,7 +17,7 @@ from discord import app_commands
 from discord.ui import View
 
 # bot object
-from ptn.buttonrolebot.bot import bot
+from ptn.buttonrolebot.bot import bot, editor_sessions_started, _jump_url
 
 # local constants
 from ptn.buttonrolebot._metadata import __version__
@@ -34,10 +36,21 @@ from ptn.buttonrolebot.ui_elements.ButtonRemove import ConfirmRemoveButtonsView
 # local modules
 from ptn.buttonrolebot.modules.ErrorHandler import on_app_command_error, GenericError, on_generic_error, CustomError
 from ptn.buttonrolebot.modules.Embeds import _generate_embed_from_dict, button_edit_heading_embed
+from ptn.buttonrolebot.modules.ClickStats import click_stats, STATS_WINDOWS
+from ptn.buttonrolebot.modules.Database import panel_registry
 from ptn.buttonrolebot.modules.Helpers import check_roles, check_channel_permissions, _get_embed_from_message
+from ptn.buttonrolebot.modules.InteractionSLO import interaction_slo
+from ptn.buttonrolebot.modules.PanelCrawler import registry_matches_message
+from ptn.buttonrolebot.modules.Tracing import traced
+
+
+log = logging.getLogger(__name__)
 
 spamchannel = bot.get_channel(channel_botspam())
 
+# most buttons and roles listed by /button_stats
+BUTTON_STATS_LIMIT = 15
+
 """
 A primitive global error handler for text commands.
 
@@ -46,7 +59,7 @@ returns: error message to user and log
 
 @bot.listen()
 async def on_command_error(ctx, error):
-    print(error)
+    log.error(error)
     if isinstance(error, commands.BadArgument):
         message=f'Bad argument: {error}'
 
@@ -81,7 +94,7 @@ Uses @bot.tree instead of @command.tree
 @check_roles(any_elevated_role)
 @check_channel_permissions()
 async def remove_role_buttons(interaction: discord.Interaction, message: discord.Message):
-    print(f"Received Remove Buttons context interaction from {interaction.user} in {interaction.channel}")
+    log.info("Received Remove Buttons context interaction from %s in %s", interaction.user, interaction.channel)
     # check message was sent by bot
     if not message.author == bot.user:
         try:
@@ -99,14 +112,16 @@ async def remove_role_buttons(interaction: discord.Interaction, message: discord
     view = ConfirmRemoveButtonsView(message)
 
     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    interaction_slo.record_response(interaction)
 
 
 # add role button
 @bot.tree.context_menu(name='Manage Role Buttons')
 @check_roles(any_elevated_role)
 @check_channel_permissions()
+@traced('editor.open', session=lambda interaction, message: interaction.id) # the session is named for this interaction
 async def manage_role_buttons(interaction: discord.Interaction, message: discord.Message):
-    print(f"Received Add Role Button context interaction from {interaction.user} in {interaction.channel}")
+    log.info("Received Add Role Button context interaction from %s in %s", interaction.user, interaction.channel)
     # check message was sent by bot
     if not message.author == bot.user:
         try:
@@ -128,8 +143,10 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
         embeds = [heading_embed, preview_embed]
 
         # send our preview
-        print("▶ Sending preview message...")
+        log.debug("▶ Sending preview message...")
         await interaction.response.send_message(embeds=embeds, ephemeral=True)
+        interaction_slo.record_response(interaction)
+        editor_sessions_started.inc(editor='buttons')
 
         # define empty list to hold our button_data instances
         buttons = []
@@ -137,14 +154,45 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
         role_id_pattern = r':role:(\d+):' # match our role ID 
         action_pattern = r':action:(\w+)' # match our action
 
-        # check if message has a view already
-        if message.components:
-            print("⚠ Existing view found on message, adding its buttons to our edit view.")
+        # use our record of the panel's buttons if we have one
+        try:
+            registered_buttons = await panel_registry.load_panel(message.id)
+        except Exception as e:
+            log.error("Couldn't read panel registry: %s", e)
+            registered_buttons = None
+
+        if registered_buttons is not None and not registry_matches_message(registered_buttons, message):
+            # buttons were changed without us recording it, e.g. the registry write failed; trust the message
+            log.warning("⚠ Panel registry entry for %s doesn't match the message, ignoring it", message.id)
+            registered_buttons = None
+
+        if registered_buttons:
+            log.debug("Loading %s buttons from panel registry", len(registered_buttons))
+            for registered_button in registered_buttons:
+                button_data_info_dict = {
+                    'message': message,
+                    'preview_message': interaction,
+                    'role_id': registered_button['role_id'],
+                    'role_object': interaction.guild.get_role(registered_button['role_id']),
+                    'button_label': registered_button['label'],
+                    'button_emoji': registered_button['emoji'],
+                    'button_row': registered_button['row'],
+                    'button_style': registered_button['style'],
+                    'unique_id': str(uuid.uuid4()),
+                    'button_action': registered_button['action']
+                }
+                button_data = RoleButtonData(button_data_info_dict)
+                log.debug("%s", button_data)
+                buttons.append(button_data)
+
+        # otherwise check if message has a view already
+        elif message.components:
+            log.debug("Existing view found on message, adding its buttons to our edit view.")
             view = View.from_message(message)
             # use existing buttons to populate button_data and add to buttons
             for child in view.children:
                 if isinstance(child, discord.ui.Button):
-                    print(f"Found button: {child.emoji} {child.label} | {child.custom_id}")
+                    log.debug("Found button: %s %s | %s", child.emoji, child.label, child.custom_id)
                     unique_id = str(uuid.uuid4()) # generate a unique ID for each button_data instance
 
                     # use re to extract role ID and action from custom ID
@@ -158,9 +206,9 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
                     role_object = None
                     if role_id:
                         try:
-                            role_object = discord.utils.get(interaction.guild.roles, id=role_id)
+                            role_object = interaction.guild.get_role(role_id)
                         except:
-                            print(f"No role object found for {role_id}")
+                            log.warning("No role object found for %s", role_id)
                             pass # we'll handle this on the button manager side
 
                     button_data_info_dict = {
@@ -176,9 +224,9 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
                         'button_action': action
                     }
                     # generate button_data
-                    print("▶ Generating RoleButtonData instance from button.")
+                    log.debug("▶ Generating RoleButtonData instance from button.")
                     button_data = RoleButtonData(button_data_info_dict)
-                    print(button_data)
+                    log.debug("%s", button_data)
                     # append to our button list
                     buttons.append(button_data)
 
@@ -190,16 +238,16 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
                 'role_id': None
             }
             button_data = RoleButtonData(button_data_info_dict)
-            print(button_data)
+            log.debug("%s", button_data)
 
-        print("⏳ Defining view...")
+        log.debug("⏳ Defining view...")
         view = View(timeout=None)
 
-        print(f'Buttons list: {buttons}')
+        log.debug('Buttons list: %s', buttons)
         if buttons:
             for button_data_instance in buttons:
                 button = NewButton(buttons, button_data_instance)
-                print(f"🔘 Generated button from set {button_data_instance.unique_id}")
+                log.debug("🔘 Generated button from set %s", button_data_instance.unique_id)
                 view.add_item(button)
 
         # add master buttons
@@ -208,12 +256,11 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
         if buttons:
             view.add_item(MasterCommitButton(buttons, button_data))
 
-        print("▶ Adding view to original response...")
+        log.debug("▶ Adding view to original response...")
         await interaction.edit_original_response(view=view)
 
     except Exception as e:
-        print(e)
-        traceback.print_exc()
+        log.exception(e)
         try:
             raise GenericError(e)
         except Exception as e:
@@ -225,7 +272,7 @@ async def manage_role_buttons(interaction: discord.Interaction, message: discord
 @check_roles(any_elevated_role)
 @check_channel_permissions()
 async def edit_bot_embed(interaction: discord.Interaction, message: discord.Message):
-    print(f"Received Edit Bot Embed context interaction from {interaction.user} in {interaction.channel}")
+    log.info("Received Edit Bot Embed context interaction from %s in %s", interaction.user, interaction.channel)
     # check message was sent by bot
     if not message.author == bot.user:
         try:
@@ -250,9 +297,10 @@ async def edit_bot_embed(interaction: discord.Interaction, message: discord.Mess
         embeds = [instruction_embed, preview_embed]
 
         await interaction.response.send_message(embeds=embeds, view=view, ephemeral=True)
+        interaction_slo.record_response(interaction)
+        editor_sessions_started.inc(editor='embed_edit')
     except Exception as e:
-        print(e)
-        traceback.print_exc()
+        log.exception(e)
         try:
             raise GenericError(e)
         except Exception as e:
@@ -294,7 +342,7 @@ class ButtonRoleCommands(commands.Cog):
     @check_roles(any_elevated_role)
     @check_channel_permissions()
     async def _send_embed(self, interaction:  discord.Interaction):
-        print(f"{interaction.user.name} used /send_embed in {interaction.channel.name}")
+        log.info("%s used /send_embed in %s", interaction.user.name, interaction.channel.name)
 
         instruction_embed = discord.Embed(
             title='🎨 CREATING EMBED',
@@ -315,5 +363,66 @@ class ButtonRoleCommands(commands.Cog):
         embeds = [instruction_embed, preview_embed]
 
         await interaction.response.send_message(embeds=embeds, view=view, ephemeral=True)
+        interaction_slo.record_response(interaction)
+        editor_sessions_started.inc(editor='embed_create')
 
+    # show which role buttons are being used, from the click rollups
+    @app_commands.command(
+        name="button_stats",
+        description="Show the most clicked role buttons in this server."
+        )
+    @app_commands.describe(
+        window="How far back to count clicks",
+        role="Only count buttons for this role"
+        )
+    @app_commands.choices(window=[
+        app_commands.Choice(name=label, value=key) for key, (label, period, buckets) in STATS_WINDOWS.items()
+        ])
+    @check_roles(any_elevated_role)
+    @check_channel_permissions()
+    async def _button_stats(self, interaction: discord.Interaction, window: str = 'week', role: discord.Role = None):
+        log.info("%s used /button_stats in %s", interaction.user.name, interaction.channel.name)
+
+        # the database may be busy with the audit writer, so acknowledge before querying it
+        await interaction.response.defer(ephemeral=True)
+        interaction_slo.record_response(interaction)
+
+        buttons = await click_stats.button_stats(interaction.guild.id, window, role.id if role else None)
+        label = STATS_WINDOWS[window][0]
 
+        embed = discord.Embed(
+            title=f'📊 BUTTON STATS: {label.upper()}',
+            color=constants.EMBED_COLOUR_OK
+        )
+
+        if not buttons:
+            embed.description = f"No role button clicks {'for ' + role.mention + ' ' if role else ''}in the {label}."
+
+        else:
+            lines = []
+            for button in buttons[:BUTTON_STATS_LIMIT]:
+                panel = _jump_url(interaction.guild.id, button['channel_id'], button['message_id']) \
+                    if button['channel_id'] else f"message `{button['message_id']}`"
+                results = ', '.join(f'{result} {count}' for result, count in sorted(button['results'].items()))
+                lines.append(
+                    f"**{button['clicks']}** · <@&{button['role_id']}> ({button['action']}) on {panel}\n"
+                    f"  {results} · avg {button['avg_latency_ms']:.0f}ms"
+                )
+            embed.description = '\n'.join(lines)
+
+            # per role totals across all of its buttons
+            roles = {}
+            for button in buttons:
+                roles[button['role_id']] = roles.get(button['role_id'], 0) + button['clicks']
+            top_roles = sorted(roles.items(), key=lambda item: item[1], reverse=True)[:BUTTON_STATS_LIMIT]
+            embed.add_field(
+                name='Clicks by role',
+                value='\n'.join(f'<@&{role_id}>: **{clicks}**' for role_id, clicks in top_roles),
+                inline=False
+            )
+
+            total = sum(button['clicks'] for button in buttons)
+            failed = sum(button['failed'] for button in buttons)
+            embed.set_footer(text=f"{total} clicks on {len(buttons)} buttons, {failed} failed.")
+
+        await interaction.followup.send(embed=embed, ephemeral=True)
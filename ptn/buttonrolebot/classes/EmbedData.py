@@ -1,5 +1,12 @@
+# import libraries
+import logging
+
 from ptn.buttonrolebot.constants import EMBED_COLOUR_PTN_DEFAULT, DEFAULT_EMBED_DESC
 
+
+log = logging.getLogger(__name__)
+
+
 class EmbedData:
 
     def __init__(self, info_dict=None):
@@ -47,7 +54,7 @@ class EmbedData:
             # Use setattr to set the attribute dynamically
             setattr(self, attribute_name, value)
         else:
-            print(f"⚠ Attribute '{attribute_name}' does not exist in EmbedData")
+            log.warning("⚠ Attribute '%s' does not exist in EmbedData", attribute_name)
 
 
     def __str__(self):
@@ -1,8 +1,15 @@
+# import libraries
+import logging
+
 # import discord so discord.ButtonStyle has meaning
 import discord
 # import our default button label
 from ptn.buttonrolebot.constants import DEFAULT_BUTTON_LABEL
 
+
+log = logging.getLogger(__name__)
+
+
 class RoleButtonData:
 
     def __init__(self, info_dict=None):
@@ -54,7 +61,7 @@ class RoleButtonData:
         }
 
         style = style_mapping.get(self.button_style, None)
-        print(f"Style is {style}")
+        log.debug("Style is %s", style)
 
         return style
         
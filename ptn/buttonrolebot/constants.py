@@ -7,6 +7,7 @@ Depends on: nothing
 # libraries
 import ast
 import os
+import re
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -30,6 +31,87 @@ load_dotenv(os.path.join(DATA_DIR, '.env'))
 TOKEN = os.getenv('BRB_DISCORD_TOKEN_PROD') if _production else os.getenv('BRB_DISCORD_TOKEN_TESTING')
 
 
+# logging: DEBUG, INFO, WARNING or ERROR. DEBUG is very chatty, production should use WARNING
+LOG_LEVEL = os.getenv('PTN_BRB_LOG_LEVEL', 'INFO').upper()
+
+
+# role button custom IDs: button:role:<role ID>:message:<panel message ID>:action:<give|take|toggle>
+# the one definition of the format, used by DynamicButton and everything that reads role buttons off messages
+ROLE_BUTTON_PATTERN = re.compile(r'button:role:(?P<role_id>[0-9]+):message:(?P<message_id>[0-9]+):action:(?P<action>[a-z]+)')
+
+# role button response settings
+# adaptive: reply once with the result if the role is managed within BUTTON_ACK_BUDGET seconds, otherwise defer
+# the budget shrinks for interactions that are already old when we get them, so we always respond within Discord's window
+# processing: always send a "Processing..." message first, then edit in the result
+BUTTON_ACK_MODE = os.getenv('PTN_BRB_BUTTON_ACK_MODE', 'adaptive')
+BUTTON_ACK_BUDGET = float(os.getenv('PTN_BRB_BUTTON_ACK_BUDGET', '1.5')) # seconds; must leave room within Discord's 3 second window
+BUTTON_ACK_MARGIN = float(os.getenv('PTN_BRB_BUTTON_ACK_MARGIN', '0.5')) # seconds kept back from Discord's window for the response to reach Discord
+BUTTON_ROLE_TIMEOUT = 30 # timeout in seconds for administering role
+ROLE_BUCKET_RATE = float(os.getenv('PTN_BRB_ROLE_BUCKET_RATE', '10')) # role requests per second per guild
+ROLE_BUCKET_BURST = int(os.getenv('PTN_BRB_ROLE_BUCKET_BURST', '10')) # role requests allowed at once after a quiet period
+ROLE_BUCKET_CONCURRENCY = int(os.getenv('PTN_BRB_ROLE_BUCKET_CONCURRENCY', '5')) # role requests in flight per guild
+ROLE_QUEUE_LIMIT = int(os.getenv('PTN_BRB_ROLE_QUEUE_LIMIT', '500')) # queued role requests per guild before refusing more
+BROKEN_BUTTON_TTL = float(os.getenv('PTN_BRB_BROKEN_BUTTON_TTL', '600')) # seconds to remember a broken button without a role change
+BROKEN_BUTTON_ALERT_WINDOW = float(os.getenv('PTN_BRB_BROKEN_BUTTON_ALERT_WINDOW', '600')) # minimum seconds between alerts for the same broken button
+CLICK_CONCURRENCY = int(os.getenv('PTN_BRB_CLICK_CONCURRENCY', '25')) # role button clicks handled at once per guild
+CLICK_QUEUE_LIMIT = int(os.getenv('PTN_BRB_CLICK_QUEUE_LIMIT', '100')) # clicks waiting for a turn per guild before we reply "busy"
+ROLE_COALESCE_WINDOW = float(os.getenv('PTN_BRB_ROLE_COALESCE_WINDOW', '0.25')) # seconds to merge a member's clicks into one request; 0 to disable
+
+
+# Prometheus metrics endpoint, disabled unless a port is set
+METRICS_PORT = int(os.getenv('PTN_BRB_METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('PTN_BRB_METRICS_HOST', '127.0.0.1')
+
+
+# interaction response monitoring
+SLO_DEADLINE = 3.0 # seconds Discord allows for the first response to an interaction
+SLO_NEAR_MISS = float(os.getenv('PTN_BRB_SLO_NEAR_MISS', '2.0')) # first responses slower than this are near misses
+SLO_WINDOW = float(os.getenv('PTN_BRB_SLO_WINDOW', '300')) # seconds of responses used to work out the miss rate
+SLO_MISS_RATE = float(os.getenv('PTN_BRB_SLO_MISS_RATE', '0.05')) # miss rate that triggers a bot-spam warning
+SLO_MIN_SAMPLES = int(os.getenv('PTN_BRB_SLO_MIN_SAMPLES', '20')) # responses needed in the window before warning
+SLO_ALERT_INTERVAL = float(os.getenv('PTN_BRB_SLO_ALERT_INTERVAL', '900')) # minimum seconds between warnings for the same command/button
+
+
+# event loop monitoring
+LOOP_LAG_INTERVAL = float(os.getenv('PTN_BRB_LOOP_LAG_INTERVAL', '0.5')) # seconds between loop heartbeats
+LOOP_LAG_THRESHOLD = float(os.getenv('PTN_BRB_LOOP_LAG_THRESHOLD', '0.25')) # heartbeat lag in seconds reported as a stall
+LOOP_LAG_ALERT_INTERVAL = float(os.getenv('PTN_BRB_LOOP_LAG_ALERT_INTERVAL', '900')) # minimum seconds between stall reports to bot-spam
+LOOP_SLOW_CALLBACK = float(os.getenv('PTN_BRB_LOOP_SLOW_CALLBACK', '0')) # log callbacks slower than this many seconds using asyncio debug mode; 0 to disable
+
+
+# background stack sampler, writing flamegraph-ready collapsed stacks to DATA_DIR/profiles
+SAMPLER_RATE = float(os.getenv('PTN_BRB_SAMPLER_RATE', '0')) # samples per second of the event loop thread; 0 to disable
+SAMPLER_MAX_STACKS = int(os.getenv('PTN_BRB_SAMPLER_MAX_STACKS', '5000')) # distinct stacks kept in memory between rotations
+SAMPLER_ROTATE_SECONDS = float(os.getenv('PTN_BRB_SAMPLER_ROTATE_SECONDS', '300')) # seconds of samples per file
+SAMPLER_KEEP_FILES = int(os.getenv('PTN_BRB_SAMPLER_KEEP_FILES', '288')) # newest files kept, older ones are deleted; 0 keeps them all
+SAMPLER_DIR = os.path.join(DATA_DIR, 'profiles')
+
+
+# memory diagnostics
+TRACEMALLOC_FRAMES = int(os.getenv('PTN_BRB_TRACEMALLOC_FRAMES', '1')) # frames recorded per allocation once tracemalloc is started
+TRACEMALLOC_AT_STARTUP = os.getenv('PTN_BRB_TRACEMALLOC', 'false').lower() in ('1', 'true', 'yes') # take a baseline at startup
+
+
+# interaction tracing, exported as JSON lines
+TRACE_FILE = os.path.join(DATA_DIR, 'traces.jsonl')
+TRACE_SAMPLE_RATE = float(os.getenv('PTN_BRB_TRACE_SAMPLE_RATE', '0.1')) # fraction of successful traces exported; failed ones always are
+TRACE_MAX_BYTES = int(os.getenv('PTN_BRB_TRACE_MAX_BYTES', str(10 * 1024 * 1024))) # trace file size before rotating to traces.jsonl.1; 0 disables export
+
+
+# local database for the panel registry
+DB_FILE = os.path.join(DATA_DIR, 'brb.db')
+AUDIT_BATCH_ROWS = int(os.getenv('PTN_BRB_AUDIT_BATCH_ROWS', '200')) # click audit rows written per transaction at most
+AUDIT_FLUSH_MS = int(os.getenv('PTN_BRB_AUDIT_FLUSH_MS', '500')) # longest a click audit row waits before being written
+AUDIT_QUEUE_LIMIT = int(os.getenv('PTN_BRB_AUDIT_QUEUE_LIMIT', '10000')) # click audit rows held in memory before new ones are dropped
+AUDIT_RETENTION_DAYS = int(os.getenv('PTN_BRB_AUDIT_RETENTION_DAYS', '90')) # days raw click audit rows are kept; 0 keeps them forever
+ROLLUP_HOURLY_DAYS = int(os.getenv('PTN_BRB_ROLLUP_HOURLY_DAYS', '14')) # days hourly click counts are kept; daily counts are kept forever
+ROLLUP_COMPACT_INTERVAL = int(os.getenv('PTN_BRB_ROLLUP_COMPACT_INTERVAL', '3600')) # seconds between click history compactions
+CRAWLER_ENABLED = os.getenv('PTN_BRB_CRAWLER', 'true').lower() in ('1', 'true', 'yes') # look for panels we don't have records of at startup
+CRAWLER_CONCURRENCY = int(os.getenv('PTN_BRB_CRAWLER_CONCURRENCY', '2')) # channels read at once
+CRAWLER_RATE = float(os.getenv('PTN_BRB_CRAWLER_RATE', '0.5')) # message history requests per second, across all channels
+DISABLE_DEAD_BUTTONS = os.getenv('PTN_BRB_DISABLE_DEAD_BUTTONS', 'true').lower() in ('1', 'true', 'yes') # disable buttons for deleted roles on their panels
+
+
 # bot = commands.Bot(command_prefix=commands.when_mentioned_or('🎢'), intents=discord.Intents.all()) # TODO: remove this if we get bot.py to work
 
 
@@ -0,0 +1,144 @@
+"""
+AuditLog.py
+
+Records the outcome of every role button click in the click_audit table.
+
+Clicks only put a row on an in-memory queue. A single writer task drains it, writing each batch in one transaction
+once it has enough rows or the oldest has waited long enough, so the click path never waits on disk. The same
+transaction adds the batch to the click rollups. If the database falls behind the queue fills up and new rows are
+dropped and counted, rather than memory growing without bound.
+
+Depends on: constants, ClickStats, Database, Metrics
+"""
+# import libraries
+import asyncio
+import logging
+import time
+
+# import constants
+from ptn.buttonrolebot.constants import AUDIT_BATCH_ROWS, AUDIT_FLUSH_MS, AUDIT_QUEUE_LIMIT
+
+# import local modules
+from ptn.buttonrolebot.modules.ClickStats import add_to_rollups
+from ptn.buttonrolebot.modules.Database import database
+from ptn.buttonrolebot.modules.Metrics import counter, gauge
+
+
+log = logging.getLogger(__name__)
+
+
+# queued by close() to tell the writer to finish up
+_STOP = object()
+
+
+class AuditLog:
+
+    def __init__(self, batch_rows, flush_ms, queue_limit):
+        """
+        Batches click audit rows into the database from a single writer task.
+
+        :param batch_rows: Most rows written in one transaction.
+        :param flush_ms: Longest a row waits before its batch is written.
+        :param queue_limit: Rows held in memory before new ones are dropped.
+        """
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_ms / 1000
+        self._queue = asyncio.Queue(maxsize=queue_limit)
+        self._writer = None
+
+    def start(self):
+        """
+        Start the writer task on the running loop.
+        """
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_batches())
+
+    async def close(self):
+        """
+        Stop the writer once it has written everything queued so far, then write anything queued since.
+        """
+        if self._writer:
+            # rows queued ahead of the sentinel are written by the writer, including the batch it's working on
+            await self._queue.put(_STOP)
+            await self._writer
+            self._writer = None
+        rows = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not _STOP:
+                rows.append(row)
+        if rows:
+            await self._write(rows)
+
+    def record(self, guild_id: int, channel_id: int, message_id: int, member_id: int, role_id: int, action: str,
+               result: str, latency: float, interaction_id: int):
+        """
+        Queue a click's outcome to be written. Never waits.
+
+        :param latency: Seconds from the click to its final response.
+        """
+        row = (time.time(), guild_id, channel_id, message_id, member_id, role_id, action, result, latency * 1000, interaction_id)
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            audit_dropped.inc()
+
+    def queued(self):
+        """
+        Return the number of rows waiting to be written.
+
+        :rtype: int
+        """
+        return self._queue.qsize()
+
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            # wait as long as it takes for a first row, then only as long as the flush interval allows for more
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+            rows = [row]
+            deadline = loop.time() + self.flush_seconds
+            while len(rows) < self.batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            await self._write(rows)
+
+    async def _write(self, rows):
+        try:
+            await database.run(_insert_audit_rows, rows)
+            audit_written.inc(len(rows))
+            audit_batches.inc()
+        except Exception as e:
+            log.error("Couldn't write %s click audit rows: %s", len(rows), e)
+            audit_failed.inc(len(rows))
+
+
+def _insert_audit_rows(connection, rows):
+    connection.executemany(
+        'INSERT INTO click_audit (clicked_at, guild_id, channel_id, message_id, member_id, role_id, action, result, '
+        'latency_ms, interaction_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    add_to_rollups(connection, rows)
+
+
+audit_log = AuditLog(AUDIT_BATCH_ROWS, AUDIT_FLUSH_MS, AUDIT_QUEUE_LIMIT)
+
+# audit log metrics
+audit_written = counter('brb_audit_rows_written_total', 'Click audit rows written to the database')
+audit_batches = counter('brb_audit_batches_total', 'Click audit transactions committed')
+audit_dropped = counter('brb_audit_rows_dropped_total', 'Click audit rows dropped because the queue was full')
+audit_failed = counter('brb_audit_rows_failed_total', 'Click audit rows lost to database errors')
+audit_queued = gauge('brb_audit_rows_queued', 'Click audit rows waiting to be written', lambda: {(): audit_log.queued()})
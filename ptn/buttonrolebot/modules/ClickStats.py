@@ -0,0 +1,224 @@
+"""
+ClickStats.py
+
+Hourly and daily click counts per button, kept in the click_rollups table so usage questions never have to read the
+raw click audit.
+
+The audit writer adds each batch of clicks to its hour and day buckets in the same transaction as the raw rows, so the
+rollups are always up to date with the audit log. A background task compacts the history: raw rows and hourly buckets
+are deleted once they're older than their retention, leaving the daily buckets. Stats for a window read a fixed number
+of buckets, however much history there is.
+
+Depends on: constants, Database, Metrics
+"""
+# import libraries
+import asyncio
+import logging
+import time
+
+# import constants
+from ptn.buttonrolebot.constants import AUDIT_RETENTION_DAYS, ROLLUP_HOURLY_DAYS, ROLLUP_COMPACT_INTERVAL
+
+# import local modules
+from ptn.buttonrolebot.modules.Database import database
+from ptn.buttonrolebot.modules.Metrics import counter
+
+
+log = logging.getLogger(__name__)
+
+
+# bucket lengths in seconds; buckets start on UTC hour and day boundaries
+ROLLUP_PERIODS = {
+    'hour': 3600,
+    'day': 86400,
+}
+
+# stats windows: (label, rollup period, number of buckets including the current one)
+STATS_WINDOWS = {
+    'day': ('last 24 hours', 'hour', 24),
+    'week': ('last 7 days', 'day', 7),
+    'month': ('last 30 days', 'day', 30),
+}
+
+# click results that mean the member didn't get what they clicked for
+FAILED_RESULTS = ('busy', 'broken', 'error', 'timeout')
+
+# rows deleted per transaction when compacting, so the audit writer isn't held up behind one long delete
+COMPACT_CHUNK_ROWS = 5000
+
+
+def bucket_start(timestamp: float, period: str):
+    """
+    Return the start of the bucket a timestamp falls in.
+
+    :param period: 'hour' or 'day'.
+    :rtype: int
+    """
+    length = ROLLUP_PERIODS[period]
+    return int(timestamp // length) * length
+
+
+def add_to_rollups(connection, rows):
+    """
+    Add click audit rows to their hour and day buckets. Called by the audit writer in the same transaction as the
+    rows themselves.
+
+    :param rows: Tuples in click_audit column order.
+    """
+    totals = {}
+    for clicked_at, guild_id, channel_id, message_id, member_id, role_id, action, result, latency_ms, interaction_id in rows:
+        for period in ROLLUP_PERIODS:
+            key = (period, bucket_start(clicked_at, period), guild_id, message_id, role_id, action, result)
+            clicks, latency_total = totals.get(key, (0, 0.0))
+            totals[key] = (clicks + 1, latency_total + latency_ms)
+
+    connection.executemany(
+        'INSERT INTO click_rollups (period, bucket_start, guild_id, message_id, role_id, action, result, clicks, '
+        'latency_ms_total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (period, bucket_start, guild_id, message_id, role_id, action, result) DO UPDATE SET '
+        'clicks = clicks + excluded.clicks, latency_ms_total = latency_ms_total + excluded.latency_ms_total',
+        [key + value for key, value in totals.items()]
+    )
+
+
+class ClickStats:
+
+    def __init__(self, audit_retention_days, hourly_retention_days, compact_interval):
+        """
+        Answers usage questions from the click rollups and keeps the click history compact.
+
+        :param audit_retention_days: Days raw click audit rows are kept. 0 keeps them forever.
+        :param hourly_retention_days: Days hourly buckets are kept. Daily buckets are kept forever.
+        :param compact_interval: Seconds between compactions.
+        """
+        self.audit_retention_days = audit_retention_days
+        self.hourly_retention_days = hourly_retention_days
+        self.compact_interval = compact_interval
+        self._compactor = None
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f"ClickStats: audit_retention_days:{self.audit_retention_days} " \
+               f"hourly_retention_days:{self.hourly_retention_days} compact_interval:{self.compact_interval}"
+
+    def start(self):
+        """
+        Start compacting in the background on the running loop.
+        """
+        if self._compactor is None:
+            self._compactor = asyncio.create_task(self._compact_periodically())
+
+    def close(self):
+        """
+        Stop compacting.
+        """
+        if self._compactor:
+            self._compactor.cancel()
+            self._compactor = None
+
+    async def compact(self):
+        """
+        Delete raw click audit rows and hourly buckets older than their retention. Their clicks are still counted in
+        the daily buckets.
+
+        :returns: {table: rows deleted}
+        :rtype: dict
+        """
+        now = time.time()
+        cutoffs = {'click_rollups': bucket_start(now - self.hourly_retention_days * 86400, 'hour')}
+        if self.audit_retention_days > 0:
+            cutoffs['click_audit'] = now - self.audit_retention_days * 86400
+
+        deleted = {}
+        for table, cutoff in cutoffs.items():
+            deleted[table] = 0
+            while True:
+                rows = await database.run(_delete_chunk, table, cutoff, COMPACT_CHUNK_ROWS)
+                deleted[table] += rows
+                if rows < COMPACT_CHUNK_ROWS:
+                    break
+            rollup_compacted.inc(deleted[table], table=table)
+        return deleted
+
+    async def _compact_periodically(self):
+        while True:
+            try:
+                deleted = await self.compact()
+                log.info("Compacted click history: %s", deleted)
+            except Exception as e:
+                log.error("Couldn't compact click history: %s", e)
+            await asyncio.sleep(self.compact_interval)
+
+    async def button_stats(self, guild_id: int, window: str, role_id: int = None):
+        """
+        Return per-button click counts for a window from the rollups.
+
+        :param window: A key of STATS_WINDOWS.
+        :param role_id: Only count buttons for this role.
+        :returns: dicts with channel_id (None if the panel isn't registered), message_id, role_id, action, clicks,
+            results ({result: clicks}), failed and avg_latency_ms, most clicked first.
+        :rtype: list
+        """
+        label, period, buckets = STATS_WINDOWS[window]
+        since = bucket_start(time.time(), period) - (buckets - 1) * ROLLUP_PERIODS[period]
+        rows = await database.run(_button_stats, period, since, guild_id, role_id)
+
+        stats = {}
+        for row in rows:
+            key = (row['message_id'], row['role_id'], row['action'])
+            button = stats.setdefault(key, {
+                'channel_id': row['channel_id'],
+                'message_id': row['message_id'],
+                'role_id': row['role_id'],
+                'action': row['action'],
+                'clicks': 0,
+                'results': {},
+                'failed': 0,
+                'latency_ms_total': 0.0,
+            })
+            button['clicks'] += row['clicks']
+            button['results'][row['result']] = row['clicks']
+            if row['result'] in FAILED_RESULTS:
+                button['failed'] += row['clicks']
+            button['latency_ms_total'] += row['latency_ms_total']
+
+        for button in stats.values():
+            button['avg_latency_ms'] = button.pop('latency_ms_total') / button['clicks']
+        return sorted(stats.values(), key=lambda button: button['clicks'], reverse=True)
+
+
+def _delete_chunk(connection, table, cutoff, limit):
+    if table == 'click_rollups':
+        where = "period = 'hour' AND bucket_start < ?"
+    else:
+        where = 'clicked_at < ?'
+    cursor = connection.execute(
+        f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT ?)', (cutoff, limit)
+    )
+    return cursor.rowcount
+
+
+def _button_stats(connection, period, since, guild_id, role_id):
+    query = (
+        'SELECT panels.channel_id, click_rollups.message_id, click_rollups.role_id, click_rollups.action, '
+        'click_rollups.result, SUM(click_rollups.clicks) AS clicks, '
+        'SUM(click_rollups.latency_ms_total) AS latency_ms_total '
+        'FROM click_rollups LEFT JOIN panels ON panels.message_id = click_rollups.message_id '
+        'WHERE click_rollups.period = ? AND click_rollups.bucket_start >= ? AND click_rollups.guild_id = ? '
+    )
+    args = [period, since, guild_id]
+    if role_id is not None:
+        query += 'AND click_rollups.role_id = ? '
+        args.append(role_id)
+    query += 'GROUP BY click_rollups.message_id, click_rollups.role_id, click_rollups.action, click_rollups.result'
+    return connection.execute(query, args).fetchall()
+
+
+click_stats = ClickStats(AUDIT_RETENTION_DAYS, ROLLUP_HOURLY_DAYS, ROLLUP_COMPACT_INTERVAL)
+
+# click stats metrics
+rollup_compacted = counter('brb_click_history_compacted_rows_total', 'Raw click audit rows and hourly click rollups deleted by compaction')
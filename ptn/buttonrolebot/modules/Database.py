@@ -0,0 +1,362 @@
+"""
+Database.py
+
+Local SQLite storage for things Discord doesn't keep for us, starting with the panel registry: which messages carry
+role buttons, and what those buttons are.
+
+sqlite3 is blocking, so every query runs in a worker thread via asyncio.to_thread. One connection is shared behind a
+lock; the database is in WAL mode so readers outside the bot (e.g. the sqlite3 shell) don't block our writes.
+
+Depends on: constants
+"""
+# import libraries
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import DB_FILE
+
+
+log = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS panels (
+    message_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    updated_by INTEGER,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS panel_buttons (
+    message_id INTEGER NOT NULL REFERENCES panels (message_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    label TEXT,
+    emoji TEXT,
+    style INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    PRIMARY KEY (message_id, position)
+);
+
+-- reverse index, so we can find a role's buttons when the role changes
+CREATE INDEX IF NOT EXISTS panel_buttons_role ON panel_buttons (role_id);
+
+-- one row per role button click; rows are only ever added, apart from pruning old ones
+CREATE TABLE IF NOT EXISTS click_audit (
+    clicked_at REAL NOT NULL,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    message_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    result TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    interaction_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS click_audit_time ON click_audit (clicked_at);
+
+-- click counts per button and result in hour and day buckets, kept up to date by the audit writer
+CREATE TABLE IF NOT EXISTS click_rollups (
+    period TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    result TEXT NOT NULL,
+    clicks INTEGER NOT NULL,
+    latency_ms_total REAL NOT NULL,
+    PRIMARY KEY (period, bucket_start, guild_id, message_id, role_id, action, result)
+);
+
+-- how far back the panel crawler has read each channel
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    before_id INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+# run once each, in order, on databases created before them; PRAGMA user_version counts how many have run
+MIGRATIONS = [
+    # roll up clicks audited before click_rollups existed
+    """
+    INSERT INTO click_rollups (period, bucket_start, guild_id, message_id, role_id, action, result, clicks, latency_ms_total)
+    SELECT 'hour', CAST(clicked_at / 3600 AS INTEGER) * 3600 AS bucket, guild_id, message_id, role_id, action, result,
+        COUNT(*), SUM(latency_ms)
+    FROM click_audit GROUP BY bucket, guild_id, message_id, role_id, action, result;
+
+    INSERT INTO click_rollups (period, bucket_start, guild_id, message_id, role_id, action, result, clicks, latency_ms_total)
+    SELECT 'day', CAST(clicked_at / 86400 AS INTEGER) * 86400 AS bucket, guild_id, message_id, role_id, action, result,
+        COUNT(*), SUM(latency_ms)
+    FROM click_audit GROUP BY bucket, guild_id, message_id, role_id, action, result;
+    """,
+]
+
+
+class Database:
+
+    def __init__(self, path):
+        """
+        A SQLite database accessed from worker threads.
+
+        :param path: The database file. Its directory is created if needed.
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL') # safe with WAL; we only risk the last commits on power loss
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(SCHEMA)
+            self._migrate(connection)
+            self._connection = connection
+            log.info("Opened database %s", self.path)
+        return self._connection
+
+    def _migrate(self, connection):
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            # executescript commits first, so each migration runs in its own transaction with its version bump
+            connection.executescript(f'BEGIN; {script} PRAGMA user_version = {number}; COMMIT;')
+            log.info("Migrated database %s to version %s", self.path, number)
+
+    def _run(self, function, *args):
+        with self._lock:
+            connection = self._connect()
+            try:
+                result = function(connection, *args)
+                connection.commit()
+                return result
+            except Exception:
+                connection.rollback()
+                raise
+
+    async def run(self, function, *args):
+        """
+        Call function(connection, *args) in a worker thread inside a transaction, committing if it returns.
+
+        :returns: Whatever the function returns.
+        """
+        return await asyncio.to_thread(self._run, function, *args)
+
+    def _close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def close(self):
+        """
+        Close the connection. It is reopened on next use.
+        """
+        await asyncio.to_thread(self._close)
+
+
+database = Database(DB_FILE)
+
+
+"""
+Panel registry
+
+What we last committed to each role button panel, so the editor doesn't need to reverse-engineer buttons from the
+message's components.
+"""
+class PanelRegistry:
+
+    def __init__(self, db: Database):
+        """
+        Read and write role button panels.
+
+        :param db: The database holding the panels.
+        """
+        self.db = db
+
+    async def save_panel(self, message: discord.Message, buttons: list, user_id: int = None):
+        """
+        Record the buttons now on a message, replacing anything recorded before.
+
+        :param message: The panel message.
+        :param buttons: RoleButtonData instances in the order they were added to the view.
+        :param user_id: Who made the change.
+        """
+        # store them in the order Discord shows them: by row, then in the order they were added within each row
+        buttons = sorted(buttons, key=lambda button: button.button_row or 0)
+        rows = [
+            (
+                message.id, position, button.role_id, button.button_action,
+                str(button.button_label) if button.button_label else None,
+                str(button.button_emoji) if button.button_emoji else None,
+                button.button_style.value, button.button_row or 0
+            )
+            for position, button in enumerate(buttons)
+        ]
+        await self.db.run(_save_panel, message.id, message.guild.id, message.channel.id, user_id, rows)
+        log.debug("Saved %s buttons for panel %s", len(rows), message.id)
+
+    async def save_discovered_panel(self, message_id: int, guild_id: int, channel_id: int, buttons: list):
+        """
+        Record a panel found by the crawler, unless we already have a record of it from the editor.
+
+        :param buttons: dicts with role_id, action, label, emoji, style (discord.ButtonStyle) and row, in order.
+        :returns: True if the panel was new.
+        :rtype: bool
+        """
+        rows = [
+            (message_id, position, button['role_id'], button['action'], button['label'], button['emoji'],
+             button['style'].value, button['row'])
+            for position, button in enumerate(buttons)
+        ]
+        return await self.db.run(_save_discovered_panel, message_id, guild_id, channel_id, rows)
+
+    async def load_panel(self, message_id: int):
+        """
+        Return the recorded buttons for a message, in order, or None if we have no record of it.
+
+        :returns: dicts with role_id, action, label, emoji, style (discord.ButtonStyle) and row.
+        :rtype: list or None
+        """
+        rows = await self.db.run(_load_panel, message_id)
+        if rows is None:
+            return None
+        return [
+            {
+                'role_id': row['role_id'],
+                'action': row['action'],
+                'label': row['label'],
+                'emoji': row['emoji'],
+                'style': discord.ButtonStyle(row['style']),
+                'row': row['row'],
+            }
+            for row in rows
+        ]
+
+    async def buttons_for_role(self, guild_id: int, role_id: int):
+        """
+        Return every recorded button for a role, grouped by panel.
+
+        :returns: dicts with channel_id, message_id, position, label, emoji and action.
+        :rtype: list
+        """
+        rows = await self.db.run(_buttons_for_role, guild_id, role_id)
+        return [dict(row) for row in rows]
+
+    async def delete_panel(self, message_id: int):
+        """
+        Forget a panel, e.g. when its buttons are removed.
+        """
+        await self.db.run(_delete_panel, message_id)
+        log.debug("Deleted panel %s", message_id)
+
+
+def _save_panel(connection, message_id, guild_id, channel_id, user_id, rows):
+    connection.execute(
+        'INSERT INTO panels (message_id, guild_id, channel_id, updated_by, updated_at) VALUES (?, ?, ?, ?, ?) '
+        'ON CONFLICT (message_id) DO UPDATE SET guild_id = excluded.guild_id, channel_id = excluded.channel_id, '
+        'updated_by = excluded.updated_by, updated_at = excluded.updated_at',
+        (message_id, guild_id, channel_id, user_id, time.time())
+    )
+    connection.execute('DELETE FROM panel_buttons WHERE message_id = ?', (message_id,))
+    connection.executemany(
+        'INSERT INTO panel_buttons (message_id, position, role_id, action, label, emoji, style, row) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+
+
+def _save_discovered_panel(connection, message_id, guild_id, channel_id, rows):
+    cursor = connection.execute(
+        'INSERT INTO panels (message_id, guild_id, channel_id, updated_by, updated_at) VALUES (?, ?, ?, NULL, ?) '
+        'ON CONFLICT (message_id) DO NOTHING',
+        (message_id, guild_id, channel_id, time.time())
+    )
+    if not cursor.rowcount:
+        return False
+    connection.executemany(
+        'INSERT INTO panel_buttons (message_id, position, role_id, action, label, emoji, style, row) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    return True
+
+
+def _load_panel(connection, message_id):
+    if connection.execute('SELECT 1 FROM panels WHERE message_id = ?', (message_id,)).fetchone() is None:
+        return None
+    return connection.execute(
+        'SELECT * FROM panel_buttons WHERE message_id = ? ORDER BY position', (message_id,)
+    ).fetchall()
+
+
+def _buttons_for_role(connection, guild_id, role_id):
+    return connection.execute(
+        'SELECT panels.channel_id, panel_buttons.message_id, panel_buttons.position, panel_buttons.label, '
+        'panel_buttons.emoji, panel_buttons.action '
+        'FROM panel_buttons JOIN panels ON panels.message_id = panel_buttons.message_id '
+        'WHERE panels.guild_id = ? AND panel_buttons.role_id = ? '
+        'ORDER BY panels.channel_id, panel_buttons.message_id, panel_buttons.position',
+        (guild_id, role_id)
+    ).fetchall()
+
+
+def _delete_panel(connection, message_id):
+    connection.execute('DELETE FROM panels WHERE message_id = ?', (message_id,))
+
+
+panel_registry = PanelRegistry(database)
+
+
+"""
+Crawl checkpoints
+
+Where the panel crawler has got to in each channel, so it can pick up where it left off after a restart.
+"""
+async def load_crawl_checkpoints(guild_id: int):
+    """
+    Return {channel_id: (before_id, done)} for a guild's crawled channels.
+
+    :rtype: dict
+    """
+    rows = await database.run(_load_crawl_checkpoints, guild_id)
+    return {row['channel_id']: (row['before_id'], bool(row['done'])) for row in rows}
+
+
+async def save_crawl_checkpoint(guild_id: int, channel_id: int, before_id: int, done: bool):
+    """
+    Record that a channel has been read back to before_id, and whether there's nothing older left.
+    """
+    await database.run(_save_crawl_checkpoint, guild_id, channel_id, before_id, done)
+
+
+def _load_crawl_checkpoints(connection, guild_id):
+    return connection.execute(
+        'SELECT channel_id, before_id, done FROM crawl_checkpoints WHERE guild_id = ?', (guild_id,)
+    ).fetchall()
+
+
+def _save_crawl_checkpoint(connection, guild_id, channel_id, before_id, done):
+    connection.execute(
+        'INSERT INTO crawl_checkpoints (channel_id, guild_id, before_id, done, updated_at) VALUES (?, ?, ?, ?, ?) '
+        'ON CONFLICT (channel_id) DO UPDATE SET before_id = excluded.before_id, done = excluded.done, '
+        'updated_at = excluded.updated_at',
+        (channel_id, guild_id, before_id, int(done), time.time())
+    )
@@ -5,24 +5,28 @@ Depends on: none
 """
 
 # import libraries
+import logging
 from datetime import datetime
 import time
 
 
+log = logging.getLogger(__name__)
+
+
 # get date and time
 def get_formatted_date_string():
-    print("Called get_formatted_date_string")
+    log.debug("Called get_formatted_date_string")
     """
     Returns a tuple of the Elite Dangerous Time and the current real world time.
 
     :rtype: tuple
     """
     posix_time_string = int(time.time())
-    print(f"POSIX time is {posix_time_string}")
+    log.debug("POSIX time is %s", posix_time_string)
 
     dt_now = datetime.utcnow()
 
     current_time_string = dt_now.strftime("%Y%m%d_%H%M%S")
-    print(f"Current time string: {current_time_string}")
+    log.debug("Current time string: %s", current_time_string)
 
     return current_time_string, posix_time_string
@@ -8,6 +8,7 @@ Dependencies: constants
 Error Handling should be dealt with from calling functions
 """
 # import libraries
+import logging
 import random
 
 # import discord
@@ -21,39 +22,42 @@ from ptn.buttonrolebot.classes.RoleButtonData import RoleButtonData
 from ptn.buttonrolebot.classes.EmbedData import EmbedData
 
 
+log = logging.getLogger(__name__)
+
+
 # generate an embed from a dict
 def _generate_embed_from_dict(embed_data: EmbedData):
-    print("Called _generate_embed_from_dict")
-    print(embed_data)
+    log.debug("Called _generate_embed_from_dict")
+    log.debug("%s", embed_data)
 
     # create empty embed
     embed = discord.Embed()
 
 
     # Populate the embed with values from embed_data
-    print("Add title")
+    log.debug("Add title")
     if embed_data.embed_title:
         embed.title = embed_data.embed_title
-    print("Add description")
+    log.debug("Add description")
     if embed_data.embed_description:
         embed.description = embed_data.embed_description
-    print("Add footer")
+    log.debug("Add footer")
     if embed_data.embed_footer:
         embed.set_footer(text=embed_data.embed_footer)
-    print("Add image")
+    log.debug("Add image")
     if embed_data.embed_image_url:
         embed.set_image(url=embed_data.embed_image_url)
-    print("Add thumbnail")
+    log.debug("Add thumbnail")
     if embed_data.embed_thumbnail_url:
         embed.set_thumbnail(url=embed_data.embed_thumbnail_url)
-    print("Add author")
+    log.debug("Add author")
     if embed_data.embed_author_name:
-        print("Add author avatar")
+        log.debug("Add author avatar")
         if embed_data.embed_author_avatar_url:
             embed.set_author(name=embed_data.embed_author_name, icon_url=embed_data.embed_author_avatar_url)
         else:
             embed.set_author(name=embed_data.embed_author_name)
-    print("Set color")
+    log.debug("Set color")
     if embed_data.embed_color:
         embed.color = embed_data.embed_color
 
@@ -61,7 +65,7 @@ def _generate_embed_from_dict(embed_data: EmbedData):
     return embed
 
 def button_config_embed(index, button_data: RoleButtonData):
-    print("called button_config_embed")
+    log.debug("called button_config_embed")
     message: discord.Message = button_data.message
 
     if index < 5:
@@ -75,7 +79,7 @@ def button_config_embed(index, button_data: RoleButtonData):
     embed.set_footer(text=footer)
 
     if index == 0:
-        print("Returning embed for index 0")
+        log.debug("Returning embed for index 0")
         # embed.title="ADD ROLE BUTTON TO MESSAGE"
         embed.description = \
             ':one: :rocket: **Enter the ROLE ID of the role you wish the button to add/remove**.\n\n' \
@@ -87,7 +91,7 @@ def button_config_embed(index, button_data: RoleButtonData):
         return embed
 
     elif index == 1:
-        print("Returning embed for index 1")
+        log.debug("Returning embed for index 1")
         # embed.title="CONFIRM BUTTON ROLE"
         embed.set_thumbnail(url=BUTTON_SWEAT_THUMBNAIL)
         embed.description = \
@@ -97,7 +101,7 @@ def button_config_embed(index, button_data: RoleButtonData):
         return embed
 
     elif index == 2:
-        print("Returning embed for index 2")
+        log.debug("Returning embed for index 2")
         # embed.title="BUTTON STYLE"
         embed.description = \
             f':three: 🛠 **CHOOSE what you want your button to DO**:'
@@ -105,7 +109,7 @@ def button_config_embed(index, button_data: RoleButtonData):
         return embed
 
     elif index == 3:
-        print("Returning embed for index 3")
+        log.debug("Returning embed for index 3")
         # embed.title="BUTTON STYLE"
         embed.description = \
             f':four: :art: **CHOOSE which STYLE OF BUTTON you want to add**.'
@@ -113,7 +117,7 @@ def button_config_embed(index, button_data: RoleButtonData):
         return embed
     
     elif index == 4:
-        print("Returning embed for index 4")
+        log.debug("Returning embed for index 4")
         # embed.title="LABEL & EMOJI"
         embed.description = \
             f':five: :label: **Choose your button\'s LABEL and/or EMOJI**.\n\n' \
@@ -126,7 +130,7 @@ def button_config_embed(index, button_data: RoleButtonData):
         return embed
 
     elif index == 5:
-        print("Returning embed for index 5")
+        log.debug("Returning embed for index 5")
         # embed.title="LABEL & EMOJI"
         embed.description = \
             f':twisted_rightwards_arrows: **REPOSITION your button** .\n\n' \
@@ -139,7 +143,7 @@ def button_config_embed(index, button_data: RoleButtonData):
 
 
 def stress_embed():
-    print("called stress_embed")
+    log.debug("called stress_embed")
     # attach a random image from the "there, there" category
     gif = random.choice(STRESS_GIFS)
 
@@ -152,7 +156,7 @@ def stress_embed():
 
 
 def amazing_embed():
-    print("called amazing_embed")
+    log.debug("called amazing_embed")
     # attach a random image from the "there, there" category
     gif = random.choice(AMAZING_GIFS)
 
@@ -3,10 +3,13 @@ ErrorHandler.py
 
 Our custom global error handler for the bot. v1 is directly imported from MAB
 
-Dependends on: constants
+Dependends on: constants, Tracing
 """
 
 
+# import libraries
+import logging
+
 # import discord.py
 import discord
 from discord import Interaction, app_commands
@@ -15,6 +18,12 @@ from discord.app_commands import AppCommandError
 # import local constants
 import ptn.buttonrolebot.constants as constants
 
+# import local modules
+from ptn.buttonrolebot.modules.Tracing import annotate, current_trace_id
+
+
+log = logging.getLogger(__name__)
+
 # custom errors
 class CommandChannelError(app_commands.CheckFailure): # channel check error
     def __init__(self, permitted_channel, formatted_channel_list):
@@ -38,7 +47,10 @@ class GenericError(Exception): # generic error
 
 class BadRequestError(Exception): # 400 Bad Request from HTTPException
     def __init__(self, exception):
-        print("Received BadRequestError def init")
+        log.warning("Received BadRequestError def init")
+    pass
+
+class QueueFullError(Exception): # a request was refused because too many are already waiting
     pass
 
 class CustomError(Exception): # an error handler that hides the Exception text from the user, but shows custom text sent from the source instead
@@ -58,33 +70,39 @@ async def on_generic_error(
     interaction: Interaction,
     error
 ): # an error handler for our custom errors
+    # make sure this interaction's trace is exported, and tell bot-spam how to find it
+    annotate(error=True, error_message=str(error))
+    trace_id = current_trace_id() or interaction.id
+
     try: # this outputs the error to bot-spam for logging purposes
         spam_embed = discord.Embed(
             description=f"Error from `{interaction.command.name}` in <#{interaction.channel.id}> called by <@{interaction.user.id}>: ```{error}```",
             color=constants.EMBED_COLOUR_ERROR
         )
+        spam_embed.set_footer(text=f"Trace ID: {trace_id}")
         await spamchannel.send(embed=spam_embed)
     except Exception as e:
-        print(e)
+        log.error(e)
         try:
             spam_embed = discord.Embed(
                 description=f"Error from `{interaction}` in <#{interaction.channel.id}> called by <@{interaction.user.id}>: ```{error}```",
                 color=constants.EMBED_COLOUR_ERROR
             )
+            spam_embed.set_footer(text=f"Trace ID: {trace_id}")
             await spamchannel.send(embed=spam_embed)
         except Exception as e:
-            print(e)
+            log.error(e)
 
     if isinstance(error, BadRequestError): # 400 Bad Request from HTTPException
-        print(f"Received HTTPException: {error}")
+        log.warning("Received HTTPException: %s", error)
 
         if "emoji" in str(error): # emoji is invalid
-            print("Error caused by invalid emoji")
+            log.warning("Error caused by invalid emoji")
             message = '**Emoji Error**\n\nSorry, the emoji you chose is not recognised by Discord as a valid emoji.\n\n' \
                       'Some emojis are based on complex ZWJ sequences and may not be fully supported by all platforms.\n\n' \
                       'You can try picking your desired emoji from Discord\'s (non-custom) emoji selector, sending it in a message, and copying the result.'
         elif "custom id" in str(error): # duplicate custom id
-            print("Error caused by duplicate custom id")
+            log.warning("Error caused by duplicate custom id")
             message = 'This message already appears to have a button associated with that role.'
         else: # dunno lol
             message = error
@@ -99,7 +117,7 @@ async def on_generic_error(
             await interaction.followup.send(embed=embed, ephemeral=True)
 
     if isinstance(error, GenericError): # Our bog-standard "hey, an error!" response. Just displays the raw error text to the user without explanation
-        print(f"Generic error raised: {error}")
+        log.warning("Generic error raised: %s", error)
         embed = discord.Embed(
             description=f"❌ {error}",
             color=constants.EMBED_COLOUR_ERROR
@@ -112,7 +130,7 @@ async def on_generic_error(
     elif isinstance(error, CustomError): # this class receives custom error messages and displays either privately or publicly
         message = error.message
         isprivate = error.isprivate
-        print(f"Raised CustomError from {error} with message {message}")
+        log.info("Raised CustomError from %s with message %s", error, message)
         embed = discord.Embed(
             description=f"❌ {message}",
             color=constants.EMBED_COLOUR_ERROR
@@ -129,18 +147,18 @@ async def on_generic_error(
                 await interaction.followup.send(embed=embed)
 
     else:
-        print(f"Error {error} was not caught by on_generic_error")
+        log.warning("Error %s was not caught by on_generic_error", error)
 
 
 async def on_app_command_error(
     interaction: Interaction,
     error: AppCommandError
 ): # an error handler for discord.py errors
-    print(f"Error from {interaction.command.name} in {interaction.channel.name} called by {interaction.user.display_name}: {error}")
+    log.warning("Error from %s in %s called by %s: %s", interaction.command.name, interaction.channel.name, interaction.user.display_name, error)
 
     try:
         if isinstance(error, CommandChannelError):
-            print("Channel check error raised")
+            log.warning("Channel check error raised")
             formatted_channel_list = error.formatted_channel_list
 
             embed=discord.Embed(
@@ -150,7 +168,7 @@ async def on_app_command_error(
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
         elif isinstance(error, CommandRoleError):
-            print("Role check error raised")
+            log.warning("Role check error raised")
             permitted_roles = error.permitted_roles
             formatted_role_list = error.formatted_role_list
             if len(permitted_roles)>1:
@@ -163,7 +181,7 @@ async def on_app_command_error(
                     description=f"**Permission denied**: You need the following role to use this command:\n{formatted_role_list}",
                     color=constants.EMBED_COLOUR_ERROR
                 )
-            print("notify user")
+            log.debug("notify user")
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
         elif isinstance(error, CommandPermissionError):
@@ -179,7 +197,7 @@ async def on_app_command_error(
         elif isinstance(error, CustomError):
             message = error.message
             isprivate = error.isprivate
-            print(f"Raised CustomError from {error} with message {message}")
+            log.info("Raised CustomError from %s with message %s", error, message)
             embed = discord.Embed(
                 description=f"❌ {message}",
                 color=constants.EMBED_COLOUR_ERROR
@@ -196,7 +214,7 @@ async def on_app_command_error(
                     await interaction.followup.send(embed=embed)
 
         elif isinstance(error, GenericError):
-            print(f"Generic error raised: {error}")
+            log.warning("Generic error raised: %s", error)
             embed = discord.Embed(
                 description=f"❌ {error}",
                 color=constants.EMBED_COLOUR_ERROR
@@ -207,7 +225,7 @@ async def on_app_command_error(
                 await interaction.followup.send(embed=embed, ephemeral=True)
 
         else:
-            print("Othertype error message raised")
+            log.warning("Othertype error message raised")
             embed = discord.Embed(
                 description=f"❌ Unhandled Error: {error}",
                 color=constants.EMBED_COLOUR_ERROR
@@ -218,4 +236,4 @@ async def on_app_command_error(
                 await interaction.followup.send(embed=embed, ephemeral=True)
 
     except Exception as e:
-        print(f"An error occurred in the error handler (lol): {e}")
\ No newline at end of file
+        log.error("An error occurred in the error handler (lol): %s", e)
@@ -5,8 +5,8 @@ Depends on: ErrorHandler, Constants
 
 """
 # import libraries
+import logging
 import os
-import traceback
 from urllib.parse import urlparse
 import validators
 
@@ -28,6 +28,10 @@ from ptn.buttonrolebot.classes.EmbedData import EmbedData
 
 # import local modules
 from ptn.buttonrolebot.modules.ErrorHandler import CommandRoleError, CustomError, on_generic_error, CommandPermissionError
+from ptn.buttonrolebot.modules.RoleManagement import can_manage_role
+
+
+log = logging.getLogger(__name__)
 
 
 """
@@ -40,7 +44,7 @@ spamchannel = bot.get_channel(channel_botspam())
 
 # trio of helper functions to check a user's permission to run a command based on their roles, and return a helpful error if they don't have the correct role(s)
 def getrole(ctx, id): # takes a Discord role ID and returns the role object
-    role = discord.utils.get(ctx.guild.roles, id=id)
+    role = ctx.guild.get_role(id)
     return role
 
 async def checkroles_actual(interaction: discord.Interaction, permitted_role_ids):
@@ -48,23 +52,23 @@ async def checkroles_actual(interaction: discord.Interaction, permitted_role_ids
         """
         Check if the user has at least one of the permitted roles to run a command
         """
-        print(f"checkroles called.")
+        log.debug("checkroles called.")
         author_roles = interaction.user.roles
         permitted_roles = [getrole(interaction, role) for role in permitted_role_ids]
-        print(author_roles)
-        print(permitted_roles)
+        log.debug("%s", author_roles)
+        log.debug("%s", permitted_roles)
         permission = True if any(x in permitted_roles for x in author_roles) else False
-        print(f'Permission: {permission}')
+        log.debug('Permission: %s', permission)
         return permission, permitted_roles
     except Exception as e:
-        print(e)
+        log.error(e)
     return permission
 
 
 def check_roles(permitted_role_ids):
     async def checkroles(interaction: discord.Interaction):
         permission, permitted_roles = await checkroles_actual(interaction, permitted_role_ids)
-        print("Inherited permission from checkroles")
+        log.debug("Inherited permission from checkroles")
         if not permission: # raise our custom error to notify the user gracefully
             role_list = []
             for role in permitted_role_ids:
@@ -73,7 +77,7 @@ def check_roles(permitted_role_ids):
             try:
                 raise CommandRoleError(permitted_roles, formatted_role_list)
             except CommandRoleError as e:
-                print(e)
+                log.error(e)
                 raise
         return permission
     return app_commands.check(checkroles)
@@ -88,33 +92,32 @@ def check_channel_permissions(): # does this work? I have no idea. Discord seems
             try:
                 raise CommandPermissionError()
             except CommandPermissionError as e:
-                print(e)
+                log.error(e)
                 raise
         return permission
     return app_commands.check(checkuserperms)
 
 
 async def button_role_checks(interaction: discord.Interaction, role: discord.Role, button_data: RoleButtonData):
-    print(f"Called button_role_checks for {role}")
+    log.debug("Called button_role_checks for %s", role)
     try:
         # check if we have permission to manage this role
-        bot_member: discord.Member = interaction.guild.get_member(bot.user.id)
-        if bot_member.top_role <= role or role.managed:
-            print("We don't have permission for this role")
+        if not can_manage_role(interaction.guild, role.id):
+            log.warning("We don't have permission for this role")
             try:
                 raise CustomError(f"I don't have permission to manage <@&{role.id}> on **{button_data.button_emoji} {button_data.button_label}** .")
             except Exception as e:
                 await on_generic_error(spamchannel, interaction, e)
             return False
 
-        bot_role = discord.utils.get(interaction.guild.roles, id=role_brb())
-        print(bot_role)
+        bot_role = interaction.guild.get_role(role_brb())
+        log.debug("%s", bot_role)
         if bot_role < role:
             permitted_role_ids = [role_council(), role_mod()]
             result = await checkroles_actual(interaction, permitted_role_ids)
             permission = result[0]
             if not permission:
-                print("User doesn't have permission to manage this role.")
+                log.warning("User doesn't have permission to manage this role.")
                 try:
                     error = f'To manage <@&{role.id}> on **{button_data.button_emoji} {button_data.button_label}** ' \
                             f'you require one of the following roles: <@&{role_mod()}>  •  <@&{role_council()}>'
@@ -123,11 +126,10 @@ async def button_role_checks(interaction: discord.Interaction, role: discord.Rol
                     await on_generic_error(spamchannel, interaction, e)
                 return False
 
-        print("Permission OK")
+        log.debug("Permission OK")
         return True
     except Exception as e:
-        print(e)
-        traceback.print_exc()
+        log.exception(e)
 
 """
 Helpers
@@ -148,20 +150,20 @@ def is_valid_extension(url):
 
 # remove a field from an embed
 def _remove_embed_field(embed, field_name_to_remove):
-    print(f"Called _remove_embed_field for {field_name_to_remove}")
+    log.debug("Called _remove_embed_field for %s", field_name_to_remove)
     try:
         embed.remove_field(field_name_to_remove)
-        print(f"Removed {field_name_to_remove}")
+        log.debug("Removed %s", field_name_to_remove)
 
     except:
-        print(f"No field found for {field_name_to_remove}")
+        log.warning("No field found for %s", field_name_to_remove)
         pass
 
     return embed
 
 # populate embed_fields from an embed in a message
 def _get_embed_from_message(message: discord.Message):
-    print('Called _get_embed_from_message')
+    log.debug('Called _get_embed_from_message')
     for embed in message.embeds:
         embed_fields = {
             'embed_title': embed.title,
@@ -175,19 +177,19 @@ def _get_embed_from_message(message: discord.Message):
         }
     # generate embed_data from the sent embed
     embed_data = EmbedData(embed_fields)
-    print(f'Instantiated embed_data as: {embed_data}')
+    log.debug('Instantiated embed_data as: %s', embed_data)
     # return embed_data instance to function
     return embed_data    
 
 # check if a role exists
 async def check_role_exists(interaction, role_id):
-    print(f"Called check_role_exists for {role_id}")
+    log.debug("Called check_role_exists for %s", role_id)
     try:
-        role = discord.utils.get(interaction.guild.roles, id=role_id)
-        print(f"Role exists with name {role.name}")
+        role = interaction.guild.get_role(role_id)
+        log.debug("Role exists with name %s", role.name)
         return role
     except Exception as e:
-        print("No role exists for this ID.")
+        log.warning("No role exists for this ID.")
         try:
             raise CustomError(f"No role found on this server matching ```{role_id}```")
         except Exception as e:
@@ -197,28 +199,28 @@ async def check_role_exists(interaction, role_id):
 # add role button to message
 # this one is kind of a big deal
 async def _add_role_buttons_to_view(interaction: discord.Interaction, buttons, message: discord.Message):
-    print("Called _add_role_buttons_to_view")
+    log.debug("Called _add_role_buttons_to_view")
 
-    print("Defining empty view")
+    log.debug("Defining empty view")
     view = discord.ui.View(timeout=None)
 
     for button_data_instance in buttons:
-        print(button_data_instance)
+        log.debug("%s", button_data_instance)
         style: discord.ButtonStyle = button_data_instance.button_style
-        print("Instantiating DynamicButton component")
+        log.debug("Instantiating DynamicButton component")
         button = DynamicButton(button_data_instance.button_action, button_data_instance.role_id, button_data_instance.message.id)
-        print(f"🔘 Generated DynamicButton from set {button_data_instance.unique_id}")
+        log.debug("🔘 Generated DynamicButton from set %s", button_data_instance.unique_id)
 
-        print("Setting button properties")
+        log.debug("Setting button properties")
         button.item.label = button_data_instance.button_label if button_data_instance.button_label else None
         button.item.emoji = button_data_instance.button_emoji if button_data_instance.button_emoji else None
         button.item.style = style
         button.item.row = button_data_instance.button_row
 
-        print("Adding dynamic button component")
+        log.debug("Adding dynamic button component")
         view.add_item(button)
 
-        print("Logging to bot-spam")
+        log.debug("Logging to bot-spam")
         embed = discord.Embed(
             description=f"🔘 <@{interaction.user.id}> added a button to {message.jump_url} to {button_data_instance.button_action} the <@&{button_data_instance.role_id}> role.",
             color=EMBED_COLOUR_OK
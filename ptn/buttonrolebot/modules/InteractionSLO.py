@@ -0,0 +1,166 @@
+"""
+InteractionSLO.py
+
+Tracks how old interactions are when we start handling them and when we first respond.
+
+Discord drops responses sent more than 3 seconds after an interaction was created. An interaction's creation time is
+encoded in its snowflake ID, so its age can be worked out locally without waiting for users to complain.
+
+Depends on: constants, Metrics
+"""
+# import libraries
+import asyncio
+import logging
+import time
+from collections import deque
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import SLO_DEADLINE, SLO_NEAR_MISS, SLO_WINDOW, SLO_MISS_RATE, SLO_MIN_SAMPLES, \
+    SLO_ALERT_INTERVAL, ROLE_BUTTON_PATTERN
+
+# import local modules
+from ptn.buttonrolebot.modules.Metrics import counter, histogram
+
+
+log = logging.getLogger(__name__)
+
+
+DISCORD_EPOCH = 1420070400000 # milliseconds, first second of 2015
+
+
+
+def snowflake_age(snowflake: int):
+    """
+    Return the seconds elapsed since a snowflake ID was generated.
+
+    :rtype: float
+    """
+    created_ms = (snowflake >> 22) + DISCORD_EPOCH
+    return time.time() - created_ms / 1000
+
+
+def slo_key(interaction: discord.Interaction):
+    """
+    Return the key an interaction's response times are tracked under: one per role button and per app command.
+    Editor components and modals are grouped together, as their custom IDs aren't stable.
+
+    :rtype: str
+    """
+    data = interaction.data or {}
+    if interaction.type == discord.InteractionType.component:
+        match = ROLE_BUTTON_PATTERN.match(data.get('custom_id', ''))
+        if match:
+            return f"button:{match['message_id']}:{match['role_id']}"
+        return 'component'
+    if interaction.type == discord.InteractionType.modal_submit:
+        return 'modal'
+    return f"command:{data.get('name', 'unknown')}"
+
+
+class InteractionSLOTracker:
+
+    def __init__(self, deadline, near_miss, window, miss_rate, min_samples, alert_interval):
+        """
+        Rolling record of first response ages per key, with alerts when too many miss the deadline.
+
+        :param deadline: Seconds after creation by which the first response must be sent.
+        :param near_miss: Responses slower than this, but within the deadline, count as near misses.
+        :param window: Seconds of history used to work out the miss rate.
+        :param miss_rate: Fraction of misses in the window that triggers an alert.
+        :param min_samples: Responses needed in the window before alerting.
+        :param alert_interval: Minimum seconds between alerts for the same key.
+        """
+        self.deadline = deadline
+        self.near_miss = near_miss
+        self.window = window
+        self.miss_rate = miss_rate
+        self.min_samples = min_samples
+        self.alert_interval = alert_interval
+        self.alert = None # coroutine function taking the alert text; set by the bot
+        self._responses = {} # key -> deque of (time.monotonic(), result)
+        self._alerted = {} # key -> time.monotonic() of last alert
+        self._alert_tasks = set() # alerts being sent, kept so they aren't garbage collected first
+        self._last_sweep = time.monotonic()
+
+    def record_start(self, interaction: discord.Interaction):
+        """
+        Record the interaction's age as we start handling it.
+
+        :returns: The age in seconds.
+        """
+        age = snowflake_age(interaction.id)
+        interaction_age_seconds.observe(age, point='start')
+        if age >= self.near_miss:
+            log.warning("⚠ Interaction %s for %s was already %.2fs old when we started handling it", interaction.id, slo_key(interaction), age)
+        return age
+
+    def record_response(self, interaction: discord.Interaction):
+        """
+        Record the interaction's age as its first response is sent, and alert if the miss rate is too high.
+
+        :returns: The age in seconds.
+        """
+        age = snowflake_age(interaction.id)
+        key = slo_key(interaction)
+        interaction_age_seconds.observe(age, point='response')
+
+        if age > self.deadline:
+            result = 'miss'
+            log.warning("⚠ First response for %s sent %.2fs after interaction was created", key, age)
+        elif age > self.near_miss:
+            result = 'near_miss'
+        else:
+            result = 'ok'
+        interaction_responses.inc(key=key, result=result)
+
+        now = time.monotonic()
+        responses = self._responses.setdefault(key, deque())
+        responses.append((now, result))
+        while responses and now - responses[0][0] > self.window:
+            responses.popleft()
+
+        self._check_alert(key, responses, now)
+        if now - self._last_sweep > self.window:
+            self._sweep(now)
+        return age
+
+    def _sweep(self, now):
+        # forget keys nothing has been recorded for in a while, e.g. buttons on deleted panels
+        self._last_sweep = now
+        for key, responses in list(self._responses.items()):
+            while responses and now - responses[0][0] > self.window:
+                responses.popleft()
+            if not responses:
+                del self._responses[key]
+        for key, last_alert in list(self._alerted.items()):
+            if now - last_alert >= self.alert_interval:
+                del self._alerted[key]
+
+    def _check_alert(self, key, responses, now):
+        total = len(responses)
+        misses = sum(1 for _, result in responses if result == 'miss')
+        if total < self.min_samples or misses / total < self.miss_rate:
+            return
+        last_alert = self._alerted.get(key)
+        if last_alert is not None and now - last_alert < self.alert_interval:
+            return
+        self._alerted[key] = now
+
+        near_misses = sum(1 for _, result in responses if result == 'near_miss')
+        message = f"⚠ **{misses}/{total}** ({misses / total:.0%}) first responses for `{key}` missed Discord's " \
+                  f"{self.deadline:g} second window in the last {self.window:g}s, with {near_misses} more near misses."
+        log.warning(message)
+        if self.alert:
+            task = asyncio.create_task(self.alert(message))
+            self._alert_tasks.add(task)
+            task.add_done_callback(self._alert_tasks.discard)
+
+
+interaction_slo = InteractionSLOTracker(SLO_DEADLINE, SLO_NEAR_MISS, SLO_WINDOW, SLO_MISS_RATE, SLO_MIN_SAMPLES, SLO_ALERT_INTERVAL)
+
+# interaction age metrics
+interaction_age_seconds = histogram('brb_interaction_age_seconds', 'Interaction age when handling starts and when the first response is sent, by point')
+interaction_responses = counter('brb_interaction_responses_total', 'First responses to interactions, by key and result (ok, near_miss, miss)')
@@ -0,0 +1,55 @@
+"""
+Logging.py
+
+Sets up logging for BRB.
+
+Log records are put on a queue and written to stdout by a background thread, so a slow log driver (e.g. Docker's) never
+blocks the event loop. Messages use %-style arguments, so anything below the configured level is dropped without being
+formatted.
+
+Depends on: constants, Tracing
+"""
+# import libraries
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+# import constants
+from ptn.buttonrolebot.constants import LOG_LEVEL
+
+# import local modules
+from ptn.buttonrolebot.modules.Tracing import TraceIdFilter
+
+
+LOG_FORMAT = '%(asctime)s %(levelname)-8s [%(trace_id)s] %(name)s: %(message)s' # trace_id is the interaction being handled
+
+_listener = None
+
+
+def setup_logging():
+    """
+    Route all logging through a queue to a stdout writer thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener:
+        return
+
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(TraceIdFilter()) # runs in the logging task, where its trace is current
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    # discord.py logs every gateway event at DEBUG
+    logging.getLogger('discord').setLevel(max(logging.INFO, root.level))
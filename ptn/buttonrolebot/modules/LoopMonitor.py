@@ -0,0 +1,144 @@
+"""
+LoopMonitor.py
+
+Watches the event loop for lag. Anything synchronous that runs on the loop (emoji parsing, URL validation, big log
+bursts) holds up every other click while it runs.
+
+A heartbeat task measures how late the loop wakes it. A watchdog thread notices while a heartbeat is overdue and grabs
+the loop thread's stack at that moment, so reports show what was actually blocking rather than the innocent heartbeat.
+
+Depends on: constants, Metrics
+"""
+# import libraries
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+# import constants
+from ptn.buttonrolebot.constants import LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD, LOOP_LAG_ALERT_INTERVAL, LOOP_SLOW_CALLBACK
+
+# import local modules
+from ptn.buttonrolebot.modules.Metrics import counter, histogram
+
+
+log = logging.getLogger(__name__)
+
+
+STACK_LIMIT = 20 # innermost frames kept from a blocked loop's stack
+
+
+class LoopLagMonitor:
+
+    def __init__(self, interval, threshold, alert_interval, slow_callback):
+        """
+        Measures event loop scheduling delay and captures what was running when it goes over a threshold.
+
+        :param interval: Seconds between heartbeats.
+        :param threshold: Lag in seconds that counts as a stall.
+        :param alert_interval: Minimum seconds between bot-spam reports.
+        :param slow_callback: If set, put the loop in debug mode and have asyncio log callbacks slower than this many
+            seconds. Debug mode has a noticeable cost, so this is off by default.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.alert_interval = alert_interval
+        self.slow_callback = slow_callback
+        self.alert = None # coroutine function taking the report text; set by the bot
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._last_beat = None # time.monotonic() the heartbeat last ran
+        self._stall_stack = None # loop thread stack captured by the watchdog during the current stall
+        self._last_alert = None
+        self._alert_tasks = set() # alerts being sent, kept so they aren't garbage collected first
+        self._stopping = threading.Event()
+
+    def start(self):
+        """
+        Start monitoring the running event loop. Must be called from the loop's thread.
+        """
+        if self._heartbeat_task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+
+        if self.slow_callback:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.slow_callback
+            log.info("asyncio debug mode on, logging callbacks slower than %ss", self.slow_callback)
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name='brb-loop-watchdog', daemon=True)
+        self._watchdog.start()
+        log.info("Loop lag monitor started: heartbeat every %ss, stall threshold %ss", self.interval, self.threshold)
+
+    def stop(self):
+        """
+        Stop the heartbeat and watchdog.
+        """
+        self._stopping.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            loop_lag_seconds.observe(lag)
+
+            stack, self._stall_stack = self._stall_stack, None
+            if lag >= self.threshold:
+                self._report_stall(lag, stack)
+
+    def _watch(self):
+        # runs in its own thread, so it keeps going while the loop is blocked
+        stalled = False
+        while not self._stopping.wait(self.threshold / 2):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue < self.threshold:
+                stalled = False
+                continue
+            if stalled:
+                # one stack per stall is enough
+                continue
+            stalled = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stall_stack = ''.join(traceback.format_stack(frame, limit=STACK_LIMIT))
+
+    def _report_stall(self, lag, stack):
+        loop_stalls.inc()
+        if stack:
+            log.warning("⚠ Event loop stalled for %.3fs. Loop thread was running:\n%s", lag, stack)
+        else:
+            log.warning("⚠ Event loop stalled for %.3fs (too short for the watchdog to catch the stack)", lag)
+
+        now = time.monotonic()
+        if self._last_alert is not None and now - self._last_alert < self.alert_interval:
+            return
+        self._last_alert = now
+
+        message = f"⚠ The event loop stalled for **{lag:.2f}s**; every interaction waited that long."
+        if stack:
+            # keep the innermost frames, which are the ones doing the blocking
+            message += f"\nLoop thread was running:\n```{stack[-3500:]}```"
+        if self.alert:
+            task = asyncio.create_task(self.alert(message))
+            self._alert_tasks.add(task)
+            task.add_done_callback(self._alert_tasks.discard)
+
+
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL, LOOP_LAG_THRESHOLD, LOOP_LAG_ALERT_INTERVAL, LOOP_SLOW_CALLBACK)
+
+# loop metrics
+loop_lag_seconds = histogram('brb_loop_lag_seconds', 'How late the event loop ran the heartbeat')
+loop_stalls = counter('brb_loop_stalls_total', 'Heartbeats late by more than the stall threshold')
@@ -0,0 +1,154 @@
+"""
+MemoryDiagnostics.py
+
+Helps track down memory growth: tracemalloc snapshots diffed against a baseline, counts of live objects we expect to be
+short lived (editor views and the data they hold on to), and the sizes of discord.py's caches.
+
+Depends on: constants, RoleButtonData, EmbedData
+"""
+# import libraries
+import asyncio
+import gc
+import logging
+import resource
+import tracemalloc
+from collections import Counter
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import TRACEMALLOC_FRAMES
+
+# import local classes
+from ptn.buttonrolebot.classes.RoleButtonData import RoleButtonData
+from ptn.buttonrolebot.classes.EmbedData import EmbedData
+
+
+log = logging.getLogger(__name__)
+
+
+TOP_ALLOCATIONS = 25 # allocation sites listed in a report
+
+# types we count live instances of; views and modals are counted per subclass
+TRACKED_TYPES = (discord.ui.View, discord.ui.Modal, RoleButtonData, EmbedData, discord.Message, discord.Interaction)
+
+
+class MemoryTracker:
+
+    def __init__(self, frames):
+        """
+        Holds the tracemalloc baseline that later snapshots are compared against.
+
+        :param frames: Stack frames tracemalloc records per allocation. More frames give better attribution but cost
+            more memory.
+        """
+        self.frames = frames
+        self.baseline = None
+
+    def start(self):
+        """
+        Start tracing allocations if we aren't already.
+
+        :returns: True if tracing was started by this call.
+        """
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(self.frames)
+        log.info("tracemalloc started with %s frames", self.frames)
+        return True
+
+    def stop(self):
+        """
+        Stop tracing allocations and forget the baseline.
+        """
+        tracemalloc.stop()
+        self.baseline = None
+        log.info("tracemalloc stopped")
+
+    async def take_baseline(self):
+        """
+        Snapshot current allocations as the baseline for later reports, starting tracing if needed.
+        """
+        self.start()
+        self.baseline = await asyncio.to_thread(_filtered_snapshot)
+
+    async def allocation_report(self):
+        """
+        Return the allocation sites that have grown the most since the baseline, or the largest overall if there isn't
+        one yet.
+
+        :rtype: str
+        """
+        if not tracemalloc.is_tracing():
+            return "tracemalloc is not running.\n"
+        snapshot = await asyncio.to_thread(_filtered_snapshot)
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced memory: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak"]
+
+        if self.baseline:
+            stats = await asyncio.to_thread(snapshot.compare_to, self.baseline, 'lineno')
+            lines.append(f"\nTop {TOP_ALLOCATIONS} allocation sites by growth since baseline:")
+        else:
+            stats = snapshot.statistics('lineno')
+            lines.append(f"\nNo baseline yet. Top {TOP_ALLOCATIONS} allocation sites by size:")
+        lines.extend(str(stat) for stat in stats[:TOP_ALLOCATIONS])
+        return '\n'.join(lines) + '\n'
+
+
+def _filtered_snapshot():
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+
+
+def live_object_counts():
+    """
+    Count live instances of the types we expect to come and go, by class name.
+
+    Walks every object the garbage collector tracks, so this briefly holds up the event loop.
+
+    :rtype: collections.Counter
+    """
+    counts = Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, TRACKED_TYPES):
+            counts[type(obj).__name__] += 1
+    return counts
+
+
+def discord_cache_sizes(client: discord.Client):
+    """
+    Return the sizes of discord.py's in-memory caches.
+
+    :rtype: dict
+    """
+    state = client._connection
+    view_store = state._view_store
+    return {
+        'guilds': len(client.guilds),
+        'members': sum(len(guild.members) for guild in client.guilds),
+        'roles': sum(len(guild.roles) for guild in client.guilds),
+        'channels': sum(len(guild.channels) for guild in client.guilds),
+        'users': len(client.users),
+        'messages': len(client.cached_messages),
+        'view items': sum(len(items) for items in view_store._views.values()),
+        'message views': len(view_store._synced_message_views),
+        'modals': len(view_store._modals),
+        'persistent views': len(view_store.persistent_views),
+    }
+
+
+def max_rss_mib():
+    """
+    Return the process's peak resident set size in MiB.
+
+    :rtype: float
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+
+
+memory_tracker = MemoryTracker(TRACEMALLOC_FRAMES)
@@ -0,0 +1,249 @@
+"""
+Metrics.py
+
+Lightweight in-process metrics used to see how the bot behaves under load.
+
+Depends on: nothing
+"""
+# import libraries
+import bisect
+import contextlib
+import time
+
+
+# upper bounds in seconds for latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 1.5, 2, 2.5, 3, 5, 10, 30)
+
+
+class Counter:
+
+    def __init__(self, name, description):
+        """
+        A monotonically increasing value, tracked separately for each set of labels.
+
+        :param name: Metric name, e.g. brb_button_clicks_total
+        :param description: What the metric counts.
+        """
+        self.name = name
+        self.description = description
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter for the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """
+        Return the current value for the given labels.
+        """
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def collect(self):
+        """
+        Return the current {labels tuple: value} readings.
+        """
+        return dict(self.values)
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'Counter: {self.name} | values:{self.values}'
+
+
+class Gauge:
+
+    def __init__(self, name, description, function=None):
+        """
+        A value that can go up and down, tracked separately for each set of labels.
+
+        :param name: Metric name, e.g. brb_scheduler_queue_depth
+        :param description: What the metric measures.
+        :param function: Optional callable returning {labels tuple: value}, read whenever the gauge is collected.
+        """
+        self.name = name
+        self.description = description
+        self.function = function
+        self.values = {}
+
+    def set(self, value, **labels):
+        """
+        Set the gauge for the given labels.
+        """
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def collect(self):
+        """
+        Return the current {labels tuple: value} readings.
+        """
+        return self.function() if self.function else dict(self.values)
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'Gauge: {self.name} | values:{self.collect()}'
+
+
+class HistogramSeries:
+
+    def __init__(self, bucket_count):
+        """
+        Observations for one set of labels in a Histogram.
+        """
+        self.counts = [0] * (bucket_count + 1) # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+
+    def __init__(self, name, description, buckets=LATENCY_BUCKETS):
+        """
+        Counts observations into fixed buckets, tracked separately for each set of labels. Memory use doesn't grow with
+        the number of observations.
+
+        :param name: Metric name, e.g. brb_button_stage_seconds
+        :param description: What the metric measures.
+        :param buckets: Ascending bucket upper bounds.
+        """
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        """
+        Record an observation for the given labels.
+        """
+        key = tuple(sorted(labels.items()))
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = HistogramSeries(len(self.buckets))
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def quantile(self, q, series: HistogramSeries):
+        """
+        Estimate a quantile from a series, interpolating within the bucket it falls in.
+
+        :param q: The quantile, e.g. 0.95
+        :param series: A series from this histogram's values.
+        :returns: The estimate in the histogram's units, or None if there are no observations.
+        """
+        if not series.count:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for index, bucket_count in enumerate(series.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    # beyond our largest bucket; the best we can say is "at least this"
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def collect(self):
+        """
+        Return the current {labels tuple: HistogramSeries} readings.
+        """
+        return dict(self.values)
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'Histogram: {self.name} | series:{len(self.values)}'
+
+
+class StageTimer:
+
+    def __init__(self):
+        """
+        Collects how long each stage of a piece of work took, to be recorded in a Histogram once the outcome is known.
+        """
+        self.durations = {}
+        self.outcome = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as stage `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """
+        Add `seconds` to stage `name`.
+        """
+        self.durations[name] = self.durations.get(name, 0) + seconds
+
+    def observe(self, histogram: Histogram, **labels):
+        """
+        Record every stage in `histogram`, labelled with the stage, the outcome and `labels`.
+        """
+        for name, seconds in self.durations.items():
+            histogram.observe(seconds, stage=name, outcome=self.outcome, **labels)
+
+
+# all metrics created by the bot, keyed by name
+_registry = {}
+
+
+def counter(name, description):
+    """
+    Return the registered Counter with this name, creating it if needed.
+
+    :rtype: Counter
+    """
+    if name not in _registry:
+        _registry[name] = Counter(name, description)
+    return _registry[name]
+
+
+def gauge(name, description, function=None):
+    """
+    Return the registered Gauge with this name, creating it if needed.
+
+    :rtype: Gauge
+    """
+    if name not in _registry:
+        _registry[name] = Gauge(name, description, function)
+    return _registry[name]
+
+
+def histogram(name, description, buckets=LATENCY_BUCKETS):
+    """
+    Return the registered Histogram with this name, creating it if needed.
+
+    :rtype: Histogram
+    """
+    if name not in _registry:
+        _registry[name] = Histogram(name, description, buckets)
+    return _registry[name]
+
+
+def all_metrics():
+    """
+    Return all registered metrics.
+
+    :rtype: list
+    """
+    return list(_registry.values())
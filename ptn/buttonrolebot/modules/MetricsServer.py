@@ -0,0 +1,133 @@
+"""
+MetricsServer.py
+
+Optional HTTP listener serving our metrics in the Prometheus text format at /metrics. It runs on the bot's own event loop
+and only reads in-memory values, so a scrape never waits on Discord.
+
+Depends on: constants, Metrics
+"""
+# import libraries
+import asyncio
+import logging
+import math
+
+# import constants
+from ptn.buttonrolebot.constants import METRICS_HOST, METRICS_PORT
+
+# import local modules
+from ptn.buttonrolebot.modules.Metrics import Counter, Gauge, Histogram, all_metrics
+
+
+log = logging.getLogger(__name__)
+
+
+REQUEST_TIMEOUT = 5 # seconds a client gets to send its request
+
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'NaN'
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = '' if value is None else str(value)
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def render_metrics():
+    """
+    Render every registered metric in the Prometheus text exposition format.
+
+    :rtype: str
+    """
+    lines = []
+    for metric in all_metrics():
+        if isinstance(metric, Counter):
+            metric_type = 'counter'
+        elif isinstance(metric, Gauge):
+            metric_type = 'gauge'
+        elif isinstance(metric, Histogram):
+            metric_type = 'histogram'
+        else:
+            continue
+        lines.append(f'# HELP {metric.name} {metric.description}')
+        lines.append(f'# TYPE {metric.name} {metric_type}')
+
+        try:
+            readings = metric.collect()
+        except Exception as e:
+            # a broken gauge function shouldn't take the whole scrape down with it
+            log.error("Couldn't collect %s: %s", metric.name, e)
+            continue
+
+        for labels, reading in readings.items():
+            if metric_type != 'histogram':
+                lines.append(f'{metric.name}{_format_labels(labels)} {_format_value(reading)}')
+                continue
+            cumulative = 0
+            for upper, bucket_count in zip(metric.buckets + (math.inf,), reading.counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (('le', _format_value(upper)),)
+                lines.append(f'{metric.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{metric.name}_sum{_format_labels(labels)} {_format_value(reading.sum)}')
+            lines.append(f'{metric.name}_count{_format_labels(labels)} {reading.count}')
+    return '\n'.join(lines) + '\n'
+
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=REQUEST_TIMEOUT)
+        # we don't need any headers, but read them so the client sees a clean response
+        while True:
+            header = await asyncio.wait_for(reader.readline(), timeout=REQUEST_TIMEOUT)
+            if header in (b'\r\n', b'\n', b''):
+                break
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+            status = '200 OK'
+            body = render_metrics().encode('utf-8')
+        else:
+            status = '404 Not Found'
+            body = b'Not found. Metrics are served at /metrics\n'
+
+        writer.write(
+            f'HTTP/1.1 {status}\r\n'
+            f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        log.debug("Metrics request abandoned: %s", e)
+    except Exception as e:
+        log.exception(e)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """
+    Start serving /metrics on the running event loop, if a port is configured.
+
+    :returns: The listening server, or None if metrics are disabled.
+    :rtype: asyncio.Server
+    """
+    if not port:
+        log.debug("PTN_BRB_METRICS_PORT not set, metrics endpoint disabled")
+        return None
+    server = await asyncio.start_server(_handle_request, host, port)
+    log.info("Serving metrics on http://%s:%s/metrics", host, port)
+    return server
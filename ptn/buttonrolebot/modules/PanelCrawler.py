@@ -0,0 +1,177 @@
+"""
+PanelCrawler.py
+
+Finds role button panels that were set up before we kept a panel registry, by reading back through channel histories
+for our own messages with role buttons.
+
+The crawler is deliberately slow: history requests go through their own scheduler bucket with a small budget, and it
+stands aside entirely while role button clicks are being handled. Progress is checkpointed per channel, so a restart
+carries on from where it stopped and finished channels aren't read again.
+
+Depends on: constants, Database, Metrics, Scheduler
+"""
+# import libraries
+import asyncio
+import logging
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import CRAWLER_CONCURRENCY, CRAWLER_RATE, ROLE_BUTTON_PATTERN
+
+# import local modules
+from ptn.buttonrolebot.modules.Database import panel_registry, load_crawl_checkpoints, save_crawl_checkpoint
+from ptn.buttonrolebot.modules.Metrics import counter
+from ptn.buttonrolebot.modules.Scheduler import RESTScheduler, click_admission, PRIORITY_BACKGROUND
+
+
+log = logging.getLogger(__name__)
+
+
+PAGE_SIZE = 100 # messages per history request, the most Discord allows
+CLICK_BACKOFF = 2 # seconds to wait while clicks are in progress
+
+
+
+def role_buttons_from_message(message: discord.Message):
+    """
+    Return the role buttons on a message in the form the panel registry takes.
+
+    :rtype: list
+    """
+    buttons = []
+    for row, action_row in enumerate(message.components):
+        for component in getattr(action_row, 'children', []):
+            match = ROLE_BUTTON_PATTERN.match(getattr(component, 'custom_id', None) or '')
+            if not match:
+                continue
+            buttons.append({
+                'role_id': int(match['role_id']),
+                'action': match['action'],
+                'label': component.label,
+                'emoji': str(component.emoji) if component.emoji else None,
+                'style': component.style,
+                'row': row,
+            })
+    return buttons
+
+
+def registry_matches_message(registered_buttons: list, message: discord.Message):
+    """
+    Check a panel registry entry still describes a message's role buttons: the same roles and actions, in the same
+    order. Labels, emoji and styles aren't compared, as they don't change what the buttons do.
+
+    :param registered_buttons: The panel's buttons as returned by PanelRegistry.load_panel.
+    :rtype: bool
+    """
+    registered = [(button['role_id'], button['action']) for button in registered_buttons]
+    on_message = [(button['role_id'], button['action']) for button in role_buttons_from_message(message)]
+    return registered == on_message
+
+
+class PanelCrawler:
+
+    def __init__(self, concurrency, rate):
+        """
+        Reads channel histories in the background looking for unregistered panels.
+
+        :param concurrency: Channels read at once.
+        :param rate: History requests per second across all channels.
+        """
+        self.concurrency = concurrency
+        self.scheduler = RESTScheduler(rate, 1, concurrency, queue_limit=concurrency)
+        self._task = None
+
+    def start(self, client: discord.Client):
+        """
+        Crawl every guild the client is in, unless a crawl is already running.
+        """
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._crawl(client))
+        self._task.add_done_callback(_log_crawl_failure)
+
+    async def _crawl(self, client: discord.Client):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        for guild in client.guilds:
+            try:
+                checkpoints = await load_crawl_checkpoints(guild.id)
+            except Exception as e:
+                log.error("Couldn't load crawl checkpoints for %s: %s", guild, e)
+                continue
+
+            channels = [
+                channel for channel in guild.text_channels
+                if not checkpoints.get(channel.id, (None, False))[1]
+                and channel.permissions_for(guild.me).read_message_history
+            ]
+            if not channels:
+                continue
+            log.info("Crawling %s channels in %s for role button panels", len(channels), guild)
+
+            async def crawl_with_limit(channel):
+                async with semaphore:
+                    await self._crawl_channel(client, channel, checkpoints.get(channel.id, (None, False))[0])
+
+            await asyncio.gather(*(crawl_with_limit(channel) for channel in channels))
+        log.info("Panel crawl finished")
+
+    async def _crawl_channel(self, client: discord.Client, channel: discord.TextChannel, before_id):
+        while True:
+            # live clicks come first
+            while any(click_admission.pending().values()):
+                await asyncio.sleep(CLICK_BACKOFF)
+
+            before = discord.Object(id=before_id) if before_id else None
+            try:
+                messages = await self.scheduler.run(
+                    ('crawler',), client.user.id,
+                    lambda: _history_page(channel, before), PRIORITY_BACKGROUND
+                )
+            except discord.Forbidden:
+                log.info("Can't read history in %s, skipping", channel)
+                messages = []
+            except Exception as e:
+                # leave the checkpoint where it is so the next crawl retries
+                log.error("Couldn't read history in %s: %s", channel, e)
+                return
+            crawler_pages.inc()
+
+            done = len(messages) < PAGE_SIZE
+            try:
+                for message in messages:
+                    if message.author.id != client.user.id or not message.components:
+                        continue
+                    buttons = role_buttons_from_message(message)
+                    if buttons and await panel_registry.save_discovered_panel(message.id, channel.guild.id, channel.id, buttons):
+                        log.info("Found panel %s with %s buttons in %s", message.id, len(buttons), channel)
+                        crawler_panels_found.inc()
+
+                if messages:
+                    before_id = messages[-1].id
+                await save_crawl_checkpoint(channel.guild.id, channel.id, before_id, done)
+            except Exception as e:
+                # e.g. the database is locked or full; as above, the next crawl picks up from the last checkpoint
+                log.error("Couldn't record crawl of %s: %s", channel, e)
+                return
+            if done:
+                return
+
+
+def _log_crawl_failure(task: asyncio.Task):
+    # nothing awaits the crawl, so report anything that stopped it here
+    if not task.cancelled() and task.exception():
+        log.error("Panel crawl failed: %s", task.exception(), exc_info=task.exception())
+
+
+async def _history_page(channel: discord.TextChannel, before):
+    # newest first, so the checkpoint is always the oldest message read
+    return [message async for message in channel.history(limit=PAGE_SIZE, before=before)]
+
+
+panel_crawler = PanelCrawler(CRAWLER_CONCURRENCY, CRAWLER_RATE)
+
+# crawler metrics
+crawler_pages = counter('brb_crawler_pages_total', 'Message history pages read by the panel crawler')
+crawler_panels_found = counter('brb_crawler_panels_found_total', 'Unregistered panels found by the panel crawler')
@@ -0,0 +1,217 @@
+"""
+Profiling.py
+
+On-demand profiling of the running bot, and an optional always-on stack sampler.
+
+Depends on: constants, Metrics
+"""
+# import libraries
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+# import constants
+from ptn.buttonrolebot.constants import SAMPLER_RATE, SAMPLER_MAX_STACKS, SAMPLER_ROTATE_SECONDS, SAMPLER_KEEP_FILES, \
+    SAMPLER_DIR
+
+# import local modules
+from ptn.buttonrolebot.modules.Metrics import counter, gauge
+
+
+log = logging.getLogger(__name__)
+
+
+PROFILE_MAX_SECONDS = 300
+PROFILE_TOP_FUNCTIONS = 40 # functions listed for each sort order
+
+# held for the duration of a profiling session; only one profiler can be attached at a time
+profile_lock = asyncio.Lock()
+
+
+class ProfileResult:
+
+    def __init__(self, seconds, report, raw):
+        """
+        The output of a profiling session.
+
+        :param seconds: How long the session actually ran for.
+        :param report: Human readable stats, sorted by cumulative and by total time.
+        :param raw: Marshalled pstats data, loadable with pstats/snakeviz.
+        """
+        self.seconds = seconds
+        self.report = report
+        self.raw = raw
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'ProfileResult: seconds:{self.seconds:.1f} | report:{len(self.report)} chars | raw:{len(self.raw)} bytes'
+
+
+async def profile_loop(seconds: float):
+    """
+    Profile everything running on the event loop's thread for `seconds`, including all coroutines that run meanwhile.
+
+    Callers should hold profile_lock.
+
+    :rtype: ProfileResult
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - start
+    log.info("Profiled event loop for %.1fs", elapsed)
+
+    # formatting the stats is quick enough for our process size, and the loop is already paying for the profiler
+    stats = pstats.Stats(profiler)
+    stream = io.StringIO()
+    stream.write(f"Profiled event loop for {elapsed:.1f}s\n\n")
+    for sort in (pstats.SortKey.CUMULATIVE, pstats.SortKey.TIME):
+        stream.write(f"===== Top {PROFILE_TOP_FUNCTIONS} by {sort.value} =====\n")
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(PROFILE_TOP_FUNCTIONS)
+    return ProfileResult(elapsed, stream.getvalue(), marshal.dumps(stats.stats))
+
+
+"""
+Stack sampler
+
+Samples the event loop thread's stack from a background thread at a fixed rate and counts identical stacks. Every
+rotation the counts are written out in the collapsed format used by flamegraph.pl and speedscope, one
+"outer;...;inner count" line per stack, and a fresh count starts.
+"""
+TRUNCATED_STACK = '[other stacks]' # samples of new stacks once the in-memory limit is reached
+
+
+class StackSampler:
+
+    def __init__(self, rate, max_stacks, rotate_seconds, directory, keep_files):
+        """
+        Background sampler of the event loop thread's stack.
+
+        :param rate: Samples per second.
+        :param max_stacks: Distinct stacks held in memory before new ones are lumped together.
+        :param rotate_seconds: Seconds of samples written to each file.
+        :param directory: Where the .collapsed files go.
+        :param keep_files: How many of the newest files to keep; 0 keeps them all.
+        """
+        self.rate = rate
+        self.max_stacks = max_stacks
+        self.rotate_seconds = rotate_seconds
+        self.directory = directory
+        self.keep_files = keep_files
+        self._stacks = {} # collapsed stack -> sample count
+        self._labels = {} # code object -> frame label, so we only format each function once
+        self._target_thread_id = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._busy_seconds = 0.0 # time spent sampling and writing, i.e. our overhead
+        self._started = None
+
+    def start(self):
+        """
+        Start sampling the calling thread, which should be the event loop's.
+        """
+        if self._thread or not self.rate:
+            return
+        self._target_thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='brb-stack-sampler', daemon=True)
+        self._thread.start()
+        log.info("Stack sampler started at %s Hz, writing to %s", self.rate, self.directory)
+
+    def stop(self):
+        """
+        Stop sampling and write out what we have.
+        """
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def overhead(self):
+        """
+        Return the fraction of one CPU the sampler has used since it started.
+
+        :rtype: float
+        """
+        if not self._started:
+            return 0.0
+        return self._busy_seconds / max(time.perf_counter() - self._started, 1e-9)
+
+    def _run(self):
+        interval = 1 / self.rate
+        next_rotation = time.monotonic() + self.rotate_seconds
+        while not self._stopping.wait(interval):
+            start = time.perf_counter()
+            self._sample()
+            if time.monotonic() >= next_rotation:
+                next_rotation = time.monotonic() + self.rotate_seconds
+                self._rotate()
+            self._busy_seconds += time.perf_counter() - start
+        self._rotate()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self._labels[code] = f'{module}:{code.co_name}'.replace(';', ':')
+        return label
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._target_thread_id)
+        if frame is None:
+            return
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        del frame
+        stack = ';'.join(reversed(labels))
+        if stack not in self._stacks and len(self._stacks) >= self.max_stacks:
+            stack = TRUNCATED_STACK
+        self._stacks[stack] = self._stacks.get(stack, 0) + 1
+        sampler_samples.inc()
+
+    def _rotate(self):
+        stacks, self._stacks = self._stacks, {}
+        if not stacks:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            now = time.time()
+            filename = os.path.join(self.directory, f"stacks-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}.collapsed")
+            with open(filename, 'w', encoding='utf-8') as file:
+                for stack, count in stacks.items():
+                    file.write(f'{stack} {count}\n')
+
+            # drop the oldest files beyond our limit
+            files = sorted(name for name in os.listdir(self.directory) if name.endswith('.collapsed'))
+            for name in files[:-self.keep_files] if self.keep_files else []:
+                os.remove(os.path.join(self.directory, name))
+
+            log.info("Wrote %s samples (%s stacks) to %s; sampler overhead %.2f%% of one CPU",
+                     sum(stacks.values()), len(stacks), filename, self.overhead() * 100)
+        except Exception as e:
+            log.error("Couldn't write stack samples: %s", e)
+
+
+stack_sampler = StackSampler(SAMPLER_RATE, SAMPLER_MAX_STACKS, SAMPLER_ROTATE_SECONDS, SAMPLER_DIR, SAMPLER_KEEP_FILES)
+
+# sampler metrics
+sampler_samples = counter('brb_sampler_samples_total', 'Stack samples taken of the event loop thread')
+sampler_overhead = gauge('brb_sampler_overhead_ratio', 'Fraction of one CPU used by the stack sampler since it started', lambda: {(): stack_sampler.overhead()})
@@ -0,0 +1,124 @@
+"""
+RESTMetrics.py
+
+Instruments discord.py's HTTP client so we can see what each REST route costs us: latency, status codes, rate limits and
+time spent waiting on retry-after.
+
+Interaction responses and followups go through discord.py's webhook adapter rather than the HTTP client, so they aren't
+counted here; see InteractionSLO for those.
+
+Depends on: Metrics, Tracing
+"""
+# import libraries
+import contextvars
+import logging
+import time
+
+# import discord
+import discord
+from discord.http import HTTPClient, Route
+
+# import local modules
+from ptn.buttonrolebot.modules.Metrics import counter, histogram
+from ptn.buttonrolebot.modules.Tracing import record_span
+
+
+log = logging.getLogger(__name__)
+
+
+# the route template of the request being made by the current task, read when discord.py logs a rate limit
+_current_route = contextvars.ContextVar('brb_current_route', default=None)
+
+# discord.py's rate limit warnings, all formatted with (method, url, retry_after)
+ROUTE_RATE_LIMIT_MESSAGES = (
+    'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+    'We are being rate limited. %s %s responded with 429. Timeout of %.2f was too long, erroring instead.',
+)
+GLOBAL_RATE_LIMIT_MESSAGE = 'Global rate limit has been hit. Retrying in %.2f seconds.'
+
+
+def route_name(route: Route):
+    """
+    Return a route's method and path template, e.g. PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}
+
+    :rtype: str
+    """
+    return f'{route.method} {route.path}'
+
+
+class RateLimitLogFilter(logging.Filter):
+
+    def __init__(self, level):
+        """
+        Counts rate limits as discord.py logs them, then only lets the record through if it meets `level`.
+
+        discord.py doesn't expose 429s any other way: it sleeps and retries inside HTTPClient.request.
+
+        :param level: The level the discord.http logger would otherwise have.
+        """
+        super().__init__()
+        self.level = level
+
+    def filter(self, record: logging.LogRecord):
+        try:
+            if record.msg in ROUTE_RATE_LIMIT_MESSAGES:
+                route = _current_route.get() or 'unknown'
+                rest_rate_limited.inc(route=route, scope='route')
+                rest_retry_after_seconds.inc(float(record.args[2]), route=route)
+            elif record.msg == GLOBAL_RATE_LIMIT_MESSAGE:
+                rest_rate_limited.inc(route=_current_route.get() or 'unknown', scope='global')
+        except Exception as e:
+            log.error("Couldn't record rate limit: %s", e)
+        return record.levelno >= self.level
+
+
+def instrument_http_client(http: HTTPClient):
+    """
+    Wrap an HTTP client's request method to record metrics for every REST call. Safe to call more than once.
+    """
+    if getattr(http.request, 'brb_instrumented', False):
+        return
+
+    original_request = http.request
+
+    async def request(route: Route, **kwargs):
+        name = route_name(route)
+        token = _current_route.set(name)
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = await original_request(route, **kwargs)
+            status = '2xx'
+            return response
+        except discord.RateLimited:
+            # discord.py gave up rather than wait out a long retry-after
+            status = '429'
+            raise
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except Exception as e:
+            rest_errors.inc(route=name, error=type(e).__name__)
+            raise
+        finally:
+            _current_route.reset(token)
+            duration = time.perf_counter() - start
+            rest_request_seconds.observe(duration, route=name)
+            rest_responses.inc(route=name, status=status)
+            record_span(name, start, duration, status=status)
+
+    request.brb_instrumented = True
+    http.request = request
+
+    # make sure discord.py's rate limit warnings reach our filter even if we're logging less than that
+    http_logger = logging.getLogger('discord.http')
+    http_logger.addFilter(RateLimitLogFilter(http_logger.getEffectiveLevel()))
+    http_logger.setLevel(min(http_logger.getEffectiveLevel(), logging.WARNING))
+
+
+# REST metrics
+rest_request_seconds = histogram('brb_rest_request_seconds', 'Time taken by REST calls including discord.py\'s retries, by route')
+rest_responses = counter('brb_rest_responses_total', 'Completed REST calls, by route and final status')
+rest_errors = counter('brb_rest_errors_total', 'REST calls that failed without a response from Discord, by route and error')
+rest_rate_limited = counter('brb_rest_rate_limited_total', '429 responses from Discord, by route and scope (route, global)')
+rest_retry_after_seconds = counter('brb_rest_retry_after_seconds_total', 'Total retry-after seconds Discord asked for, by route')
@@ -0,0 +1,436 @@
+"""
+RoleManagement.py
+
+Helpers used by role buttons to decide on and apply role changes.
+
+Depends on: constants, ErrorHandler, Metrics, Scheduler
+"""
+# import libraries
+import logging
+import asyncio
+import time
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import ROLE_COALESCE_WINDOW, BROKEN_BUTTON_TTL, BROKEN_BUTTON_ALERT_WINDOW
+
+# import local modules
+from ptn.buttonrolebot.modules.ErrorHandler import QueueFullError
+from ptn.buttonrolebot.modules.Metrics import counter, gauge
+from ptn.buttonrolebot.modules.Scheduler import role_scheduler, role_bucket
+
+
+log = logging.getLogger(__name__)
+
+
+# what a click should do for each (button action, member already has role) pair, plus the adverb for the user's reply
+# None means no change is needed
+ROLE_ACTION_DECISIONS = {
+    ('give', False): ('add', 'now'),
+    ('give', True): (None, 'already'),
+    ('take', False): (None, 'don\'t'),
+    ('take', True): ('remove', 'no longer'),
+    ('toggle', False): ('add', 'now'),
+    ('toggle', True): ('remove', 'no longer'),
+}
+
+
+def resolve_role_action(member: discord.Member, role_id: int, action: str):
+    """
+    Decide what a role button click should do for a member.
+
+    Membership is checked once against the member's role IDs via Member.get_role, rather than with
+    `role in member.roles`, which builds a sorted list of Role objects on every access.
+
+    :param member: The member who clicked the button.
+    :param role_id: The ID of the role the button manages.
+    :param action: The button action: give, take or toggle. Anything else is treated as toggle.
+    :returns: A tuple of ('add' | 'remove' | None, adverb)
+    :rtype: tuple
+    """
+    has_role = member.get_role(role_id) is not None
+    if action not in ('give', 'take'):
+        action = 'toggle'
+    return ROLE_ACTION_DECISIONS[(action, has_role)]
+
+
+"""
+Manageable roles
+
+Role IDs the bot is able to grant or remove in each guild, keyed by guild ID. Sets are built on first use and dropped by
+the bot's role/member event listeners when the role hierarchy or the bot's own roles change.
+"""
+_manageable_roles = {}
+
+
+def build_manageable_roles(guild: discord.Guild):
+    """
+    Build and cache the set of role IDs the bot can manage in a guild.
+
+    A role is manageable if it sits below the bot's top role, is not managed by an integration, and is not @everyone.
+
+    :param guild: The guild to build the set for.
+    :returns: The set of manageable role IDs.
+    :rtype: set
+    """
+    top_role = guild.me.top_role
+    manageable = {role.id for role in guild.roles if role < top_role and not role.managed and not role.is_default()}
+    _manageable_roles[guild.id] = manageable
+    log.debug("Built manageable role set for %s: %s roles", guild, len(manageable))
+    return manageable
+
+
+def invalidate_manageable_roles(guild_id: int):
+    """
+    Drop the cached manageable role set for a guild so it is rebuilt on next use.
+    """
+    _manageable_roles.pop(guild_id, None)
+
+
+def can_manage_role(guild: discord.Guild, role_id: int):
+    """
+    Check whether the bot can manage a role, without comparing role positions.
+
+    :param guild: The guild the role belongs to.
+    :param role_id: The ID of the role to check.
+    :rtype: bool
+    """
+    manageable = _manageable_roles.get(guild.id)
+    if manageable is None:
+        manageable_role_lookups.inc(result='miss')
+        manageable = build_manageable_roles(guild)
+    else:
+        manageable_role_lookups.inc(result='hit')
+    return role_id in manageable
+
+
+# manageable role cache metrics
+manageable_role_lookups = counter('brb_manageable_roles_cache_lookups_total', 'Manageable role cache lookups, by result (hit, miss)')
+
+
+"""
+Role change coalescing
+
+Members often click several buttons on the same panel in quick succession. Rather than sending one request per click,
+changes for the same member are held for a short window and then applied together with a single member edit.
+
+A member edit replaces the member's whole role list, so it must not be built from stale roles. A member's batches are
+applied one after another, and the role list is worked out when the request is sent, from the cached member with the
+changes we've recently made laid over it, as the gateway can take a while to tell us about them.
+"""
+# seconds our own role changes are trusted over the member cache, covering gateway lag
+WRITTEN_ROLE_TTL = 10.0
+
+
+class _PendingRoleChanges:
+
+    def __init__(self, member: discord.Member):
+        """
+        Role changes waiting to be applied to one member.
+
+        :param member: The member to change.
+        """
+        self.member = member
+        self.changes = {} # role ID -> (role, 'add' | 'remove'); a later click on the same role replaces an earlier one
+        self.futures = []
+        self.task = None
+
+
+class RoleChangeCoalescer:
+
+    def __init__(self, window: float):
+        """
+        Merges role changes for the same member made within `window` seconds into one request.
+
+        :param window: Seconds to wait for further changes before applying. 0 applies every change immediately.
+        """
+        self.window = window
+        self._pending = {} # (guild ID, member ID) -> _PendingRoleChanges
+        self._tails = {} # (guild ID, member ID) -> asyncio.Task applying the member's latest batch
+        self._written = {} # (guild ID, member ID) -> {role ID: ('add' | 'remove', time.monotonic())}
+
+    async def submit(self, member: discord.Member, role: discord.Role, change: str):
+        """
+        Queue a role change for a member and wait until it has been applied.
+
+        :param member: The member to change.
+        :param role: The role to add or remove.
+        :param change: 'add' or 'remove'
+        :raises: Whatever discord.py raised while applying the batch this change was part of.
+        """
+        key = (member.guild.id, member.id)
+        if self.window <= 0:
+            return await self._apply_in_turn(key, member, {role.id: (role, change)})
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingRoleChanges(member)
+            batch.task = asyncio.create_task(self._flush_later(key, batch))
+        else:
+            log.debug("Coalescing %s %s with %s pending change(s) for %s", change, role, len(batch.changes), member)
+            batch.member = member # use the most recent member state we've been handed
+
+        batch.changes[role.id] = (role, change)
+        future = asyncio.get_running_loop().create_future()
+        batch.futures.append(future)
+        return await future
+
+    async def _flush_later(self, key, batch: _PendingRoleChanges):
+        await asyncio.sleep(self.window)
+        # new clicks from now on start a fresh batch
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+
+        try:
+            await self._apply_in_turn(key, batch.member, batch.changes)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _apply_in_turn(self, key, member: discord.Member, changes: dict):
+        # start once the member's previous batch has finished, however it finished
+        previous = self._tails.get(key)
+        task = asyncio.ensure_future(self._apply_after(previous, key, member, changes))
+        self._tails[key] = task
+        task.add_done_callback(lambda done_task: self._finished(key, done_task))
+        return await task
+
+    async def _apply_after(self, previous, key, member: discord.Member, changes: dict):
+        if previous is not None and not previous.done():
+            log.debug("Waiting for earlier role changes to %s to finish", member)
+            await asyncio.wait({previous})
+        await _apply_role_changes(member, changes, lambda: self._role_ids(key, member, changes))
+        self._remember_written(key, changes)
+
+    def _finished(self, key, task):
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        # mark any exception as retrieved, in case the caller has already given up
+        if not task.cancelled():
+            task.exception()
+
+    def _role_ids(self, key, member: discord.Member, changes: dict):
+        # the member's complete new role list, worked out just before the request is sent
+        member = member.guild.get_member(member.id) or member
+        role_ids = {role.id for role in member.roles if not role.is_default()}
+        now = time.monotonic()
+        for role_id, (change, written_at) in self._written.get(key, {}).items():
+            if now - written_at < WRITTEN_ROLE_TTL:
+                _change_role_ids(role_ids, role_id, change)
+        for role_id, (role, change) in changes.items():
+            _change_role_ids(role_ids, role_id, change)
+        return role_ids
+
+    def _remember_written(self, key, changes: dict):
+        written = self._written.setdefault(key, {})
+        now = time.monotonic()
+        for role_id, (role, change) in changes.items():
+            written[role_id] = (change, now)
+        asyncio.get_running_loop().call_later(WRITTEN_ROLE_TTL, self._forget_written, key)
+
+    def _forget_written(self, key):
+        written = self._written.get(key)
+        if written is None:
+            return
+        now = time.monotonic()
+        for role_id, (change, written_at) in list(written.items()):
+            if now - written_at >= WRITTEN_ROLE_TTL:
+                del written[role_id]
+        if not written:
+            del self._written[key]
+
+
+def _change_role_ids(role_ids: set, role_id: int, change: str):
+    if change == 'add':
+        role_ids.add(role_id)
+    else:
+        role_ids.discard(role_id)
+
+
+async def _apply_role_changes(member: discord.Member, changes: dict, role_ids):
+    # a single change uses the per-role endpoint, which doesn't need the member's full role list
+    if len(changes) == 1:
+        role, change = next(iter(changes.values()))
+        factory = (lambda: member.add_roles(role)) if change == 'add' else (lambda: member.remove_roles(role))
+        route = 'member_role'
+
+    else:
+        # several changes go in one PATCH with the member's complete new role list, built when it's sent
+        log.debug("Applying %s coalesced role changes to %s", len(changes), member)
+        factory = lambda: member.edit(roles=[discord.Object(id=role_id) for role_id in role_ids()])
+        route = 'member_edit'
+
+    try:
+        await role_scheduler.run(role_bucket(member.guild.id, route), member.id, factory)
+    except discord.Forbidden:
+        role_mutations.inc(route=route, result='forbidden')
+        raise
+    except discord.HTTPException:
+        role_mutations.inc(route=route, result='http_error')
+        raise
+    except QueueFullError:
+        role_mutations.inc(route=route, result='queue_full')
+        raise
+    role_mutations.inc(route=route, result='ok')
+
+
+role_coalescer = RoleChangeCoalescer(ROLE_COALESCE_WINDOW)
+
+# role change metrics
+role_mutations = counter('brb_role_mutations_total', 'Role change requests sent to Discord, by route and result')
+
+
+"""
+In-flight deduplication
+
+Impatient members double and triple click. Repeat clicks on the same button by the same member while the first is still
+being handled wait for that click's result instead of starting their own role change.
+"""
+class InFlightRegistry:
+
+    def __init__(self):
+        """
+        Tracks running operations by key so that callers asking for the same thing share one result.
+        """
+        self._operations = {} # key -> asyncio.Task
+
+    async def run(self, key, factory):
+        """
+        Run the operation for `key`, or wait on the one already running.
+
+        :param key: Identifies the operation, e.g. (guild ID, member ID, role ID)
+        :param factory: Zero-argument callable returning the coroutine to run if nothing is in flight.
+        :returns: The operation's result. Its exception is raised to every caller.
+        """
+        task = self._operations.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._operations[key] = task
+            task.add_done_callback(lambda done_task: self._finished(key, done_task))
+            inflight_started.inc()
+        else:
+            log.debug("Operation %s already in flight, waiting on its result", key)
+            inflight_deduplicated.inc()
+
+        # shield so one caller timing out doesn't cancel the operation for everybody else
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """
+        Return the number of running operations.
+
+        :rtype: int
+        """
+        return len(self._operations)
+
+    def _finished(self, key, task):
+        if self._operations.get(key) is task:
+            del self._operations[key]
+        # mark any exception as retrieved, in case every caller has already given up
+        if not task.cancelled():
+            task.exception()
+
+
+role_operations = InFlightRegistry()
+
+# deduplication metrics
+inflight_started = counter('brb_inflight_started_total', 'Role button operations started')
+inflight_deduplicated = counter('brb_inflight_deduplicated_total', 'Role button clicks that joined an operation already in flight')
+inflight_gauge = gauge('brb_inflight_operations', 'Role button operations currently in flight', lambda: {(): role_operations.in_flight()})
+
+
+"""
+Broken buttons
+
+A button pointing at a deleted role, or at a role the bot can't manage, fails the same way on every click. Once we've seen
+a button fail we remember why, so later clicks get an immediate answer and mods are only alerted once per window.
+Verdicts are dropped by the bot's role/member event listeners when roles change, and expire after a while regardless.
+"""
+class BrokenButtonVerdict:
+
+    def __init__(self, reason, user_message, expires):
+        """
+        Why a button is broken.
+
+        :param reason: 'missing', 'hierarchy' or 'forbidden'
+        :param user_message: What to tell members who click it.
+        :param expires: time.monotonic() value after which the verdict is rechecked.
+        """
+        self.reason = reason
+        self.user_message = user_message
+        self.expires = expires
+
+
+class BrokenButtonCache:
+
+    def __init__(self, ttl: float, alert_window: float):
+        """
+        Negative cache of broken role buttons, keyed by (guild ID, role ID).
+
+        :param ttl: Seconds a verdict is trusted without a role change.
+        :param alert_window: Minimum seconds between bot-spam alerts for the same button role.
+        """
+        self.ttl = ttl
+        self.alert_window = alert_window
+        self._verdicts = {}
+        self._alerted = {} # (guild ID, role ID) -> time.monotonic() of last alert; survives invalidation
+
+    def get(self, guild_id: int, role_id: int):
+        """
+        Return the cached verdict for a button role, if there is a current one.
+
+        :rtype: BrokenButtonVerdict or None
+        """
+        key = (guild_id, role_id)
+        verdict = self._verdicts.get(key)
+        if verdict and verdict.expires <= time.monotonic():
+            del self._verdicts[key]
+            verdict = None
+        if verdict:
+            broken_button_hits.inc(reason=verdict.reason)
+        else:
+            broken_button_misses.inc()
+        return verdict
+
+    def record(self, guild_id: int, role_id: int, reason: str, user_message: str):
+        """
+        Remember that a button role is broken.
+
+        :returns: True if mods should be alerted, False if they already were within the alert window.
+        :rtype: bool
+        """
+        now = time.monotonic()
+        key = (guild_id, role_id)
+        self._verdicts[key] = BrokenButtonVerdict(reason, user_message, now + self.ttl)
+
+        # forget alerts that have aged out so this doesn't grow forever
+        for alerted_key in [k for k, alerted in self._alerted.items() if now - alerted >= self.alert_window]:
+            del self._alerted[alerted_key]
+
+        if key in self._alerted:
+            broken_button_alerts_suppressed.inc(reason=reason)
+            return False
+        self._alerted[key] = now
+        return True
+
+    def invalidate_guild(self, guild_id: int):
+        """
+        Drop every verdict for a guild so its buttons are rechecked on the next click.
+        """
+        for key in [key for key in self._verdicts if key[0] == guild_id]:
+            del self._verdicts[key]
+
+
+broken_buttons = BrokenButtonCache(BROKEN_BUTTON_TTL, BROKEN_BUTTON_ALERT_WINDOW)
+
+# broken button metrics
+broken_button_hits = counter('brb_broken_button_cache_hits_total', 'Clicks answered from the broken button cache, by reason')
+broken_button_misses = counter('brb_broken_button_cache_misses_total', 'Clicks with no broken button verdict cached')
+broken_button_alerts_suppressed = counter('brb_broken_button_alerts_suppressed_total', 'Bot-spam alerts skipped because one was sent recently, by reason')
@@ -0,0 +1,298 @@
+"""
+Scheduler.py
+
+Paces REST calls that share a Discord rate limit bucket, so a rush of clicks queues in the bot instead of piling into
+429s.
+
+Each bucket has a token bucket matching its rate limit, a cap on concurrent requests and a bounded queue. Queued jobs
+are served by priority, then round-robin across members so one member clicking repeatedly can't hold up everybody else.
+
+Also home to click admission control, which turns clicks away with a fast "busy" reply once too many are waiting.
+
+Depends on: constants, ErrorHandler, Metrics, Tracing
+"""
+# import libraries
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict, deque
+
+# import constants
+from ptn.buttonrolebot.constants import ROLE_BUCKET_RATE, ROLE_BUCKET_BURST, ROLE_BUCKET_CONCURRENCY, ROLE_QUEUE_LIMIT, \
+    CLICK_CONCURRENCY, CLICK_QUEUE_LIMIT
+
+# import local modules
+from ptn.buttonrolebot.modules.ErrorHandler import QueueFullError
+from ptn.buttonrolebot.modules.Metrics import counter, gauge
+from ptn.buttonrolebot.modules.Tracing import record_span
+
+
+# job priorities, lowest number served first
+PRIORITY_CLICK = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_CLICK: 'click', PRIORITY_BACKGROUND: 'background'}
+
+
+class _Job:
+
+    def __init__(self, factory, future, priority):
+        """
+        A queued REST call.
+
+        :param factory: Zero-argument callable returning the coroutine to run.
+        :param future: Resolved with the coroutine's result.
+        :param priority: PRIORITY_CLICK or PRIORITY_BACKGROUND
+        """
+        self.factory = factory
+        self.future = future
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.context = contextvars.copy_context() # the caller's trace, so the call is recorded against it
+
+
+class _Bucket:
+
+    def __init__(self, burst, concurrency):
+        """
+        Queue and rate limit state for one Discord route bucket.
+        """
+        self.queues = {priority: OrderedDict() for priority in PRIORITY_NAMES} # priority -> member ID -> deque of jobs
+        self.depth = 0
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.worker = None
+
+    def next_job(self):
+        # highest priority first, then the member at the front of the rotation
+        for queue in self.queues.values():
+            if queue:
+                member_id, jobs = next(iter(queue.items()))
+                job = jobs.popleft()
+                if jobs:
+                    queue.move_to_end(member_id)
+                else:
+                    del queue[member_id]
+                self.depth -= 1
+                return job
+        return None
+
+
+class RESTScheduler:
+
+    def __init__(self, rate: float, burst: int, concurrency: int, queue_limit: int):
+        """
+        Runs REST calls through per-bucket queues.
+
+        :param rate: Requests per second allowed for each bucket.
+        :param burst: Requests that may be sent at once after a quiet period.
+        :param concurrency: Maximum requests in flight per bucket.
+        :param queue_limit: Maximum queued requests per bucket before new ones are refused.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self._buckets = {}
+
+    async def run(self, bucket_key, member_id: int, factory, priority=PRIORITY_CLICK):
+        """
+        Queue a REST call and wait for its result.
+
+        :param bucket_key: Identifies the Discord rate limit bucket the call uses, see role_bucket().
+        :param member_id: The member the call is for; used to share the queue fairly.
+        :param factory: Zero-argument callable returning the coroutine that makes the call.
+        :param priority: PRIORITY_CLICK for user clicks, PRIORITY_BACKGROUND for anything else.
+        :raises QueueFullError: if the bucket's queue is full.
+        """
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = _Bucket(self.burst, self.concurrency)
+
+        if bucket.depth >= self.queue_limit:
+            scheduler_rejected.inc(priority=PRIORITY_NAMES[priority])
+            raise QueueFullError(f"Queue for {bucket_key} is full ({bucket.depth} waiting)")
+
+        job = _Job(factory, asyncio.get_running_loop().create_future(), priority)
+        bucket.queues[priority].setdefault(member_id, deque()).append(job)
+        bucket.depth += 1
+
+        if bucket.worker is None:
+            bucket.worker = asyncio.create_task(self._work(bucket))
+
+        return await job.future
+
+    def queue_depths(self):
+        """
+        Return the number of queued jobs in each bucket.
+
+        :rtype: dict
+        """
+        return {bucket_key: bucket.depth for bucket_key, bucket in self._buckets.items()}
+
+    async def _work(self, bucket: _Bucket):
+        while bucket.depth:
+            await self._take_token(bucket)
+            await bucket.semaphore.acquire()
+
+            job = bucket.next_job()
+            if job is None:
+                bucket.semaphore.release()
+                break
+
+            if job.future.done():
+                # the caller gave up (e.g. timed out) while queued; don't spend a request on it
+                bucket.tokens += 1
+                bucket.semaphore.release()
+                continue
+
+            # tasks take their context from wherever they're created, so create it inside the caller's
+            job.context.run(asyncio.create_task, self._run(bucket, job))
+
+        bucket.worker = None
+
+    async def _take_token(self, bucket: _Bucket):
+        while True:
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return
+            await asyncio.sleep((1 - bucket.tokens) / self.rate)
+
+    async def _run(self, bucket: _Bucket, job: _Job):
+        priority = PRIORITY_NAMES[job.priority]
+        wait = time.monotonic() - job.enqueued
+        scheduler_jobs.inc(priority=priority)
+        scheduler_wait_seconds.inc(wait, priority=priority)
+        record_span('scheduler.queued', time.perf_counter() - wait, wait, priority=priority)
+        try:
+            result = await job.factory()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            bucket.semaphore.release()
+
+
+def role_bucket(guild_id: int, route: str):
+    """
+    Return the scheduler bucket key for a route in a guild.
+
+    Discord buckets member routes by guild. Adding and removing a single role share one bucket; editing the member
+    has its own. Panel message reads and edits made on the bot's own behalf are kept in buckets of their own, so they
+    queue separately from member role changes.
+
+    :param guild_id: The guild the member or message belongs to.
+    :param route: 'member_role' for add/remove role, 'member_edit' for a member PATCH, 'message_fetch' or
+        'message_edit' for reading or editing a panel message.
+    """
+    return (route, guild_id)
+
+
+class _GuildAdmission:
+
+    def __init__(self, concurrency):
+        """
+        Admission state for one guild.
+        """
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = 0 # admitted clicks, running or waiting for a slot
+
+
+class AdmissionTicket:
+
+    def __init__(self, state: _GuildAdmission):
+        """
+        An admitted click. Use `async with` around the work to hold a slot, and call release() when the click is
+        finished with, whether or not the work ever started.
+        """
+        self.state = state
+        self.acquired = False
+        self.released = False
+
+    async def __aenter__(self):
+        await self.state.semaphore.acquire()
+        self.acquired = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def release(self):
+        """
+        Give back the click's place. Safe to call more than once.
+        """
+        if self.released:
+            return
+        self.released = True
+        if self.acquired:
+            self.state.semaphore.release()
+        self.state.pending -= 1
+
+
+class AdmissionController:
+
+    def __init__(self, concurrency: int, queue_limit: int):
+        """
+        Limits how many clicks each guild handles at once, and how many may wait for a turn.
+
+        :param concurrency: Clicks handled at the same time per guild.
+        :param queue_limit: Clicks allowed to wait for a turn per guild; any more are shed.
+        """
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self._guilds = {}
+
+    def try_admit(self, guild_id: int):
+        """
+        Admit a click if there is room.
+
+        :returns: An AdmissionTicket, or None if the click should be turned away.
+        """
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildAdmission(self.concurrency)
+
+        if state.pending >= self.concurrency + self.queue_limit:
+            admission_shed.inc()
+            return None
+
+        state.pending += 1
+        admission_admitted.inc()
+        return AdmissionTicket(state)
+
+    def pending(self):
+        """
+        Return the number of admitted clicks in each guild.
+
+        :rtype: dict
+        """
+        return {guild_id: state.pending for guild_id, state in self._guilds.items()}
+
+
+role_scheduler = RESTScheduler(ROLE_BUCKET_RATE, ROLE_BUCKET_BURST, ROLE_BUCKET_CONCURRENCY, ROLE_QUEUE_LIMIT)
+click_admission = AdmissionController(CLICK_CONCURRENCY, CLICK_QUEUE_LIMIT)
+
+# scheduler metrics
+scheduler_jobs = counter('brb_scheduler_jobs_total', 'REST calls started by the scheduler, by priority')
+scheduler_wait_seconds = counter('brb_scheduler_wait_seconds_total', 'Total seconds REST calls spent queued, by priority')
+scheduler_rejected = counter('brb_scheduler_rejected_total', 'REST calls refused because their queue was full, by priority')
+scheduler_queue_depth = gauge(
+    'brb_scheduler_queue_depth',
+    'REST calls waiting in the scheduler, by bucket',
+    lambda: {(('bucket', f'{route}:{guild_id}'),): depth for (route, guild_id), depth in role_scheduler.queue_depths().items()}
+)
+
+# admission metrics
+admission_admitted = counter('brb_admission_admitted_total', 'Role button clicks admitted')
+admission_shed = counter('brb_admission_shed_total', 'Role button clicks turned away because too many were waiting')
+admission_pending = gauge(
+    'brb_admission_pending',
+    'Role button clicks admitted and not yet finished, by guild',
+    lambda: {(('guild', str(guild_id)),): pending for guild_id, pending in click_admission.pending().items()}
+)
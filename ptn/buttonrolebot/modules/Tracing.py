@@ -0,0 +1,289 @@
+"""
+Tracing.py
+
+Lightweight tracing so everything done for one interaction can be tied together: its log lines, the REST calls it made
+and how long each took.
+
+A trace's ID is the ID of the interaction that started it. Editor actions also carry a session ID, the ID of the
+interaction that opened the editor, so a whole editing session can be followed from "Manage Role Buttons" to commit.
+Finished traces are sampled and appended as JSON lines to a size-capped file under DATA_DIR. Traces that hit an error
+are always kept.
+
+Depends on: constants
+"""
+# import libraries
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+# import discord
+import discord
+
+# import constants
+from ptn.buttonrolebot.constants import TRACE_FILE, TRACE_SAMPLE_RATE, TRACE_MAX_BYTES
+
+
+log = logging.getLogger(__name__)
+
+
+MAX_SPANS = 200 # per trace, so a runaway loop of REST calls can't grow a trace without bound
+
+_current_trace = contextvars.ContextVar('brb_current_trace', default=None)
+
+
+class Span:
+
+    def __init__(self, name, start, duration, attributes):
+        """
+        One timed operation within a trace, e.g. a REST call.
+
+        :param name: What was done, e.g. "PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}"
+        :param start: time.perf_counter() when it started.
+        :param duration: Seconds it took.
+        :param attributes: Extra details, e.g. status.
+        """
+        self.name = name
+        self.start = start
+        self.duration = duration
+        self.attributes = attributes
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'Span: {self.name} | duration:{self.duration * 1000:.1f}ms | attributes:{self.attributes}'
+
+
+class Trace:
+
+    def __init__(self, trace_id, name, attributes, sampled):
+        """
+        Everything done while handling one interaction.
+
+        :param trace_id: The interaction ID.
+        :param name: What kind of interaction, e.g. role_button or editor.commit
+        :param attributes: Extra details, e.g. the editor session ID.
+        :param sampled: Whether to export this trace even if it succeeds.
+        """
+        self.trace_id = trace_id
+        self.name = name
+        self.attributes = attributes
+        self.sampled = sampled
+        self.error = False
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.dropped_spans = 0
+        self.token = None # resets the current trace when this one finishes
+
+    def add_span(self, name, start, duration, **attributes):
+        """
+        Record an operation that has finished.
+        """
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        self.spans.append(Span(name, start, duration, attributes))
+
+    def to_dict(self):
+        """
+        Return the trace as a JSON-ready dict. IDs are strings as they don't fit in a JavaScript number.
+
+        :rtype: dict
+        """
+        return {
+            'trace_id': str(self.trace_id),
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'error': self.error,
+            'attributes': {key: str(value) if isinstance(value, int) and not isinstance(value, bool) else value
+                           for key, value in self.attributes.items()},
+            'spans': [
+                {
+                    'name': span.name,
+                    'offset_ms': round((span.start - self.start) * 1000, 3),
+                    'duration_ms': round(span.duration * 1000, 3),
+                    'attributes': span.attributes,
+                }
+                for span in self.spans
+            ],
+            'dropped_spans': self.dropped_spans,
+        }
+
+    def __str__(self):
+        """
+        Overloads str to return a readable object
+
+        :rtype: str
+        """
+        return f'Trace: {self.trace_id} | name:{self.name} | spans:{len(self.spans)} | error:{self.error}'
+
+
+class Tracer:
+
+    def __init__(self, path, sample_rate, max_bytes):
+        """
+        Starts traces and exports the finished ones.
+
+        :param path: JSONL file finished traces are appended to. When it reaches max_bytes it is moved to path.1,
+            replacing any older one.
+        :param sample_rate: Fraction of successful traces to export.
+        :param max_bytes: Size at which the file is rotated.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._write_lock = threading.Lock()
+
+    def start(self, trace_id, name, **attributes):
+        """
+        Start a trace and make it current for this task and any tasks it creates.
+
+        :rtype: Trace
+        """
+        trace = Trace(trace_id, name, attributes, random.random() < self.sample_rate)
+        trace.token = _current_trace.set(trace)
+        return trace
+
+    def finish(self, trace: Trace):
+        """
+        End a trace, restore whichever trace was current before it, and export it if it was sampled or hit an error.
+        """
+        trace.duration = time.perf_counter() - trace.start
+        try:
+            _current_trace.reset(trace.token)
+        except ValueError:
+            # finished from a different context than it was started in; nothing to restore
+            pass
+        if not (trace.sampled or trace.error) or not self.max_bytes:
+            return
+        line = json.dumps(trace.to_dict(), default=str) + '\n'
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write, line)
+        except RuntimeError:
+            # no loop; we're being called from a thread or during shutdown
+            self._write(line)
+
+    def _write(self, line):
+        with self._write_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(line)
+            except Exception as e:
+                log.error("Couldn't export trace: %s", e)
+
+
+tracer = Tracer(TRACE_FILE, TRACE_SAMPLE_RATE, TRACE_MAX_BYTES)
+
+
+def current_trace():
+    """
+    Return the trace for the interaction being handled by this task, if any.
+
+    :rtype: Trace or None
+    """
+    return _current_trace.get()
+
+
+def current_trace_id():
+    """
+    Return the current trace's ID, or None outside a trace.
+    """
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def record_span(name, start, duration, **attributes):
+    """
+    Add a finished operation to the current trace. Does nothing outside a trace.
+
+    :param start: time.perf_counter() when the operation started.
+    """
+    trace = _current_trace.get()
+    if trace:
+        trace.add_span(name, start, duration, **attributes)
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Record the enclosed block as a span in the current trace, with its outcome as the status. For REST calls that don't
+    go through the HTTP client, such as interaction responses.
+    """
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        yield
+        status = 'ok'
+    except discord.HTTPException as e:
+        status = str(e.status)
+        raise
+    finally:
+        record_span(name, start, time.perf_counter() - start, status=status, **attributes)
+
+
+def annotate(error=False, **attributes):
+    """
+    Add attributes to the current trace, and mark it as failed if `error`. Does nothing outside a trace.
+    """
+    trace = _current_trace.get()
+    if trace:
+        trace.attributes.update(attributes)
+        trace.error = trace.error or error
+
+
+def traced(name, session=None):
+    """
+    Decorator that runs an interaction callback inside a trace named `name`, using the first Interaction argument's ID
+    as the trace ID.
+
+    :param session: Optional callable taking the same arguments as the callback and returning the editor session ID.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
+            attributes = {}
+            if interaction:
+                attributes['user'] = interaction.user.id
+            if session:
+                try:
+                    attributes['session'] = session(*args, **kwargs)
+                except Exception as e:
+                    log.debug("No editor session for %s: %s", name, e)
+
+            trace = tracer.start(interaction.id if interaction else None, name, **attributes)
+            try:
+                return await func(*args, **kwargs)
+            except BaseException as e:
+                trace.error = True
+                trace.attributes['exception'] = repr(e)
+                raise
+            finally:
+                tracer.finish(trace)
+        return wrapper
+    return decorator
+
+
+class TraceIdFilter(logging.Filter):
+    """
+    Adds the current trace ID to log records as trace_id, or "-" outside a trace.
+    """
+    def filter(self, record):
+        trace = _current_trace.get()
+        record.trace_id = trace.trace_id if trace else '-'
+        return True
@@ -5,6 +5,7 @@ Depends on: constants, Embeds, ErrorHandler, Helpers
 
 """
 # import libraries
+import logging
 import re
 
 # import discord.py
@@ -12,7 +13,7 @@ import discord
 from discord.ui import View, Modal
 
 # import bot
-from ptn.buttonrolebot.bot import bot
+from ptn.buttonrolebot.bot import bot, editor_sessions_finished
 
 # import local constants
 import ptn.buttonrolebot.constants as constants
@@ -27,6 +28,9 @@ from ptn.buttonrolebot.modules.Embeds import  _generate_embed_from_dict
 from ptn.buttonrolebot.modules.ErrorHandler import GenericError, on_generic_error, CustomError
 from ptn.buttonrolebot.modules.Helpers import _remove_embed_field, is_valid_extension
 
+
+log = logging.getLogger(__name__)
+
 """
 EMBED CREATOR
 
@@ -81,7 +85,7 @@ class EmbedGenButtons(View):
 
     @discord.ui.button(label="Title", style=discord.ButtonStyle.secondary, emoji="🏷", custom_id="embed_gen_title_button", row=0)
     async def set_embed_title_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_title_button click")
+        log.info("Received set_embed_title_button click")
 
         # set our modal field info
         field_info = {
@@ -95,16 +99,16 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
 
     @discord.ui.button(label="Main Text", style=discord.ButtonStyle.primary, emoji="📄", custom_id="embed_gen_desc_button", row=0)
     async def set_embed_desc_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_desc_button click")
+        log.info("Received set_embed_desc_button click")
 
         # set our modal field info
         field_info = {
@@ -120,16 +124,16 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
 
     @discord.ui.button(label="Main Image", style=discord.ButtonStyle.secondary, emoji="🖼", custom_id="embed_gen_img_button", row=0)
     async def set_embed_img_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_img_button click")
+        log.info("Received set_embed_img_button click")
 
         # set our modal field info
         field_info = {
@@ -142,15 +146,15 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
     @discord.ui.button(label="Footer", style=discord.ButtonStyle.secondary, emoji="🦶", custom_id="embed_gen_footer_button", row=0)
     async def set_embed_footer_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_footer_button click")
+        log.info("Received set_embed_footer_button click")
 
         # set our modal field info
         field_info = {
@@ -164,31 +168,31 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
 
     @discord.ui.button(label="Color", style=discord.ButtonStyle.secondary, emoji="🎨", custom_id="embed_gen_color_button", row=1)
     async def set_embed_color_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_color_button click")
+        log.info("Received set_embed_color_button click")
 
         try:
             if callable(getattr(self.embed_data.embed_color, 'to_rgb', None)):
                 # we got a Discord color object
-                print(f"⏳ Discord color object {self.embed_data.embed_color} returned, converting to int...")
+                log.debug("⏳ Discord color object %s returned, converting to int...", self.embed_data.embed_color)
                 red, green, blue = self.embed_data.embed_color.to_rgb()
-                print(f'🎨 RGB values: {red} {green} {blue}')
+                log.debug('🎨 RGB values: %s %s %s', red, green, blue)
                 hex_color = "0x{:02x}{:02x}{:02x}".format(red, green, blue)
-                print(f'▶ Hex code: {hex_color}')
+                log.debug('▶ Hex code: %s', hex_color)
             else:
-                print("⏳ Converting existing color to hex in format 0x000000...")
+                log.debug("⏳ Converting existing color to hex in format 0x000000...")
                 hex_color = '0x{:06X}'.format(self.embed_data.embed_color)
-                print(f'▶ Hex color: {hex_color}') 
+                log.debug('▶ Hex color: %s', hex_color)
         except Exception as e:
-            print(e)
+            log.error(e)
 
         # set our modal field info
         field_info = {
@@ -203,15 +207,15 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
     @discord.ui.button(label="Thumbnail", style=discord.ButtonStyle.secondary, emoji="🖼", custom_id="embed_gen_thumb_button", row=1)
     async def set_embed_thumb_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_thumb_button click")
+        log.info("Received set_embed_thumb_button click")
 
         # set our modal field info
         field_info = {
@@ -224,15 +228,15 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
     @discord.ui.button(label="Author", style=discord.ButtonStyle.secondary, emoji="🧑", custom_id="embed_gen_author_button", row=1)
     async def set_embed_author_button(self, interaction: discord.Interaction, button):
-        print("Received set_embedset_embed_author_button_avatar_button click")
+        log.info("Received set_embedset_embed_author_button_avatar_button click")
 
         # set our modal field info
         field_info = {
@@ -247,15 +251,15 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
     @discord.ui.button(label="Avatar", style=discord.ButtonStyle.secondary, emoji="🖼", custom_id="embed_gen_avatar_button", row=1)
     async def set_embed_avatar_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_avatar_button click")
+        log.info("Received set_embed_avatar_button click")
 
         # set our modal field info
         field_info = {
@@ -268,25 +272,26 @@ class EmbedGenButtons(View):
 
         # instantiate it into FieldData to send to the modal
         field_data = FieldData(field_info)
-        print(f'Sending modal field data: {field_data}')
+        log.debug('Sending modal field data: %s', field_data)
 
-        print(f'Sending modal embed data: {self.embed_data}')
+        log.debug('Sending modal embed data: %s', self.embed_data)
 
         await interaction.response.send_modal(EmbedContentModal(self.instruction_embed, field_data, self.embed_data, button, view=self))
 
     @discord.ui.button(label="✗ Cancel", style=discord.ButtonStyle.danger, custom_id="embed_gen_cancel_button", row=2)
     async def set_embed_cancel_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_cancel_button click")
+        log.info("Received set_embed_cancel_button click")
         embed = discord.Embed(
             description="❎ **Embed generation cancelled**.",
             color=constants.EMBED_COLOUR_QU
         )
         embed.set_footer(text="You can dismiss this message.")
         await interaction.response.edit_message(embed=embed, view=None)
+        editor_sessions_finished.inc(editor=f'embed_{self.action}', result='cancelled')
 
     @discord.ui.button(label="✔ Send Embed", style=discord.ButtonStyle.success, custom_id="embed_gen_send_button", row=2)
     async def set_embed_send_button(self, interaction: discord.Interaction, button):
-        print("Received set_embed_send_button click")
+        log.info("Received set_embed_send_button click")
 
         if not self.embed_data.embed_title and not self.embed_data.embed_description:
             error = 'Your embed must have at least a title or main text to be valid.'
@@ -296,12 +301,12 @@ class EmbedGenButtons(View):
                 await on_generic_error(self.spamchannel, interaction, e)       
 
         try:
-            print("Calling function to generate Embed...")
+            log.debug("Calling function to generate Embed...")
             send_embed = _generate_embed_from_dict(self.embed_data)
 
 
             if self.action == 'edit':
-                print("Updating edited Embed...")
+                log.debug("Updating edited Embed...")
                 await self.message.edit(embed=send_embed)
 
                 embed = discord.Embed(
@@ -311,9 +316,9 @@ class EmbedGenButtons(View):
                 embed.set_footer(text="You can dismiss this message.")
 
             else:
-                print("Sending completed Embed...")
+                log.debug("Sending completed Embed...")
                 message = await interaction.channel.send(embed=send_embed)
-                print(f"Embed sent to {interaction.channel} by {interaction.user}")
+                log.debug("Embed sent to %s by %s", interaction.channel, interaction.user)
                 
                 embed = discord.Embed(
                     description=f"✅ **Embed sent**. Message ID of containing message:\n"
@@ -322,10 +327,11 @@ class EmbedGenButtons(View):
                 )
                 embed.set_footer(text="You can dismiss this message.")
 
-            print("Updating interaction response...")
+            log.debug("Updating interaction response...")
             await interaction.response.edit_message(embed=embed, view=None)
+            editor_sessions_finished.inc(editor=f'embed_{self.action}', result='sent')
 
-            print("Notifying bot-spam...")
+            log.debug("Notifying bot-spam...")
             embed = discord.Embed(
                 description=f"📄 <@{interaction.user.id}> sent or edited the bot Embed at {interaction.message.jump_url}",
                 color=constants.EMBED_COLOUR_OK
@@ -333,7 +339,7 @@ class EmbedGenButtons(View):
             await self.spamchannel.send(embed=embed)
 
         except Exception as e:
-            print(e)
+            log.error(e)
             try:
                 raise GenericError(e)
             except Exception as e:
@@ -344,7 +350,7 @@ class EmbedGenButtons(View):
 class EmbedContentModal(Modal):
     def __init__(self, instruction_embed, field_data: FieldData, embed_data, button, view, timeout = None) -> None:
         super().__init__(title=field_data.title, timeout=timeout)
-        print('Defining variables')
+        log.debug('Defining variables')
         self.spamchannel: discord.TextChannel = bot.get_channel(channel_botspam())
         self.instruction_embed: discord.Embed = instruction_embed
         self.embed_data: EmbedData = embed_data
@@ -352,7 +358,7 @@ class EmbedContentModal(Modal):
         self.field_data: FieldData = field_data
         self.button: discord.ui.Button = button
         # define our field data
-        print('Defining field data')
+        log.debug('Defining field data')
         self.embed_field.label = self.field_data.label
         self.embed_field.placeholder = self.field_data.placeholder
         self.embed_field.style = self.field_data.style
@@ -365,27 +371,27 @@ class EmbedContentModal(Modal):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
-        print(f'Received EmbedContentModal submit for {self.field_data.attr}')
+        log.info('Received EmbedContentModal submit for %s', self.field_data.attr)
 
         if self.field_data.attr == 'embed_color':
-            print('Received COLOR input')
+            log.info('Received COLOR input')
         # turn color input into an INT and store it
             if self.embed_field.value:
                 color_input = self.embed_field.value
-                print(f"User entered color as {color_input}, we'll check it's valid and convert it to int")
+                log.debug("User entered color as %s, we'll check it's valid and convert it to int", color_input)
                 if re.match(constants.HEX_COLOR_PATTERN, color_input):
-                    print('Received valid hex match')
+                    log.info('Received valid hex match')
                     if color_input.startswith('#'): # check if we have an HTML color code
-                        print(f"Received web color code with #: {color_input}, stripping leading #...")
+                        log.debug("Received web color code with #: %s, stripping leading #...", color_input)
                         color_input = color_input.lstrip('#')
-                        print(f"New value: {color_input}")
+                        log.debug("New value: %s", color_input)
                     try:
                         color_int = int(color_input, 16)  # Convert hex string to integer
-                        print(f'Converted {color_input} to {color_int}')
+                        log.debug('Converted %s to %s', color_input, color_int)
                         self.embed_data.embed_color = color_int
-                        print(self.embed_data.embed_color)
+                        log.debug("%s", self.embed_data.embed_color)
                     except ValueError as e:
-                        print(e)
+                        log.error(e)
                         try:
                             raise GenericError(e)
                         except Exception as e:
@@ -399,30 +405,30 @@ class EmbedContentModal(Modal):
                         await on_generic_error(self.spamchannel, interaction, e)
                     return
             else:
-                print("No user color entry, re-assigning default.")
+                log.debug("No user color entry, re-assigning default.")
                 self.embed_data.embed_color = constants.EMBED_COLOUR_PTN_DEFAULT
-                print(self.embed_data.embed_color)
+                log.debug("%s", self.embed_data.embed_color)
 
         else: # i.e. if anything other than color is being set
             if self.embed_field.value == "":
-                print("User left this field blank.")
+                log.debug("User left this field blank.")
                 self.embed_data.set_attribute(self.field_data.attr, None)
             else:
-                print('Checking if URL type')
+                log.debug('Checking if URL type')
                 string_to_check = str(self.field_data.attr)
                 if "url" in string_to_check:
-                    print('Validating URLs')
+                    log.debug('Validating URLs')
                     # validate image URLs
                     if not is_valid_extension(self.embed_field.value) and self.embed_field.value is not None:
                         error = f"Image not valid: {self.embed_field.value}"
-                        print(error)
+                        log.error(error)
                         try:
                             raise CustomError(error)
                         except Exception as e:
                             await on_generic_error(self.spamchannel, interaction, e)
                         return
 
-            print('Updating embed_data')
+            log.debug('Updating embed_data')
             # define our embed_data attribute to the user-inputted value
             if self.embed_field.value:
                 self.embed_data.set_attribute(self.field_data.attr, self.embed_field.value)
@@ -430,23 +436,23 @@ class EmbedContentModal(Modal):
                 self.embed_data.set_attribute(self.field_data.attr, None)
 
 
-        print(f'▶ Updated embed_data: {self.embed_data}')
+        log.debug('▶ Updated embed_data: %s', self.embed_data)
 
         # update our preview embed
-        print('Updating preview embed')
+        log.debug('Updating preview embed')
         preview_embed = _generate_embed_from_dict(self.embed_data)
 
         embeds = [self.instruction_embed, preview_embed]
 
         # update button style
-        print("Updating button style...")
+        log.debug("Updating button style...")
         if self.embed_field.value:
             self.button.style = discord.ButtonStyle.success
         else:
             self.button.style = discord.ButtonStyle.secondary
 
         # update the view in case we added the send button
-        print("Sending updated embeds")
+        log.debug("Sending updated embeds")
         await interaction.response.edit_message(embeds=embeds, view=self.view)
 
     async def on_error(self, interaction: discord.Interaction, error: Exception) -> None:
@@ -0,0 +1,12 @@
+"""
+conftest.py
+
+Point the bot's data directory at a temporary one before anything imports constants, and turn off trace export.
+"""
+# import libraries
+import os
+import tempfile
+
+
+os.environ.setdefault('PTN_BRB_DATA_DIR', tempfile.mkdtemp(prefix='brb-tests-'))
+os.environ.setdefault('PTN_BRB_TRACE_MAX_BYTES', '0')
@@ -0,0 +1,175 @@
+"""
+test_button_failures.py
+
+Counts the REST calls a role button click makes for each way it can fail. Reporting a failure used to fetch the
+panel message just to link to it; the link is now built from IDs we already have, so each failure makes one call
+fewer: the user's reply, the bot-spam alert and the bot-spam error report.
+
+Nothing here talks to Discord: interactions, members and the bot-spam channel are mocks, and every awaited mock
+method stands in for one REST call.
+"""
+# import libraries
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+# import discord
+import discord
+import pytest
+
+# import local modules
+import ptn.buttonrolebot.bot as bot_module
+from ptn.buttonrolebot.bot import bot, DynamicButton
+from ptn.buttonrolebot.modules import RoleManagement
+from ptn.buttonrolebot.modules.InteractionSLO import DISCORD_EPOCH
+from ptn.buttonrolebot.modules.Scheduler import AdmissionController
+
+
+MESSAGE_ID = 900
+
+# fresh guild and role IDs for every click, so no scheduler, admission or broken button state is shared between tests
+_ids = itertools.count(1000)
+
+
+class FakeResponse:
+
+    def __init__(self):
+        self.done = False
+        self.send_message = mock.AsyncMock(side_effect=self._respond)
+        self.defer = mock.AsyncMock(side_effect=self._respond)
+
+    def is_done(self):
+        return self.done
+
+    async def _respond(self, *args, **kwargs):
+        self.done = True
+
+
+def make_click(manageable=True, role_exists=True, add_roles=None):
+    """
+    Build a role button click on a fresh guild, plus the mocks that stand in for REST calls.
+
+    :param add_roles: side_effect for the member's add_roles call.
+    :returns: (button, interaction, rest_calls) where rest_calls maps a name to its AsyncMock.
+    """
+    guild_id, role_id = next(_ids), next(_ids)
+    role = SimpleNamespace(id=role_id, name='Test Role', is_default=lambda: False)
+    guild = SimpleNamespace(id=guild_id, get_role=lambda requested_id: role if role_exists else None)
+    RoleManagement._manageable_roles[guild_id] = {role_id} if manageable else set()
+
+    member = mock.MagicMock(spec=discord.Member)
+    member.id = 7
+    member.guild = guild
+    member.get_role.return_value = None
+    member.add_roles = mock.AsyncMock(side_effect=add_roles)
+    member.remove_roles = mock.AsyncMock()
+    member.edit = mock.AsyncMock()
+
+    interaction = mock.MagicMock(spec=discord.Interaction)
+    interaction.id = ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) + next(_ids)
+    interaction.type = discord.InteractionType.component
+    interaction.data = {'custom_id': f'button:role:{role_id}:message:{MESSAGE_ID}:action:give'}
+    interaction.guild = guild
+    interaction.guild_id = guild_id
+    interaction.channel_id = 800
+    interaction.user = member
+    interaction.response = FakeResponse()
+    interaction.edit_original_response = mock.AsyncMock()
+    interaction.followup.send = mock.AsyncMock()
+    interaction.channel.fetch_message = mock.AsyncMock()
+
+    rest_calls = {
+        'response': interaction.response.send_message,
+        'defer': interaction.response.defer,
+        'edit_original_response': interaction.edit_original_response,
+        'followup': interaction.followup.send,
+        'fetch_message': interaction.channel.fetch_message,
+        'add_roles': member.add_roles,
+    }
+    return DynamicButton('give', role_id, MESSAGE_ID), interaction, rest_calls
+
+
+def click(button, interaction):
+    """
+    Run a click with a mock bot-spam channel and return the bot-spam channel's send mock.
+    """
+    spam_send = mock.AsyncMock()
+    spam_channel = SimpleNamespace(id=1, send=spam_send)
+    with mock.patch.object(bot, 'get_channel', return_value=spam_channel), \
+            mock.patch.object(bot._connection, 'user', SimpleNamespace(id=1)):
+        asyncio.run(button.callback(interaction))
+    return spam_send
+
+
+def count(rest_calls, spam_send):
+    calls = {name: call.await_count for name, call in rest_calls.items()}
+    calls['botspam'] = spam_send.await_count
+    return calls
+
+
+async def hang(*args, **kwargs):
+    await asyncio.Event().wait()
+
+
+@pytest.mark.parametrize('case, make_kwargs, expected', [
+    ('missing', {'role_exists': False}, {'response': 1, 'botspam': 2}),
+    ('hierarchy', {'manageable': False}, {'response': 1, 'botspam': 2}),
+    ('forbidden', {'add_roles': discord.Forbidden(mock.MagicMock(status=403), 'Missing Permissions')}, {'response': 1, 'botspam': 2, 'add_roles': 1}),
+    ('exception', {'add_roles': RuntimeError('boom')}, {'response': 1, 'botspam': 2, 'add_roles': 1}),
+])
+def test_failure_rest_calls(case, make_kwargs, expected):
+    button, interaction, rest_calls = make_click(**make_kwargs)
+    spam_send = click(button, interaction)
+
+    calls = count(rest_calls, spam_send)
+    assert calls['fetch_message'] == 0
+    assert {name: number for name, number in calls.items() if number} == expected
+
+
+def test_timeout_rest_calls():
+    button, interaction, rest_calls = make_click(add_roles=hang)
+    with mock.patch.object(bot_module, 'BUTTON_ACK_BUDGET', 0.3), mock.patch.object(bot_module, 'BUTTON_ROLE_TIMEOUT', 0.6):
+        spam_send = click(button, interaction)
+
+    calls = count(rest_calls, spam_send)
+    assert calls['fetch_message'] == 0
+    # the role change outlives the ack budget, so the click is deferred and the timeout edited in
+    assert {name: number for name, number in calls.items() if number} == \
+        {'defer': 1, 'edit_original_response': 1, 'botspam': 1, 'add_roles': 1}
+
+
+def test_repeat_failure_skips_botspam():
+    button, interaction, rest_calls = make_click(role_exists=False)
+    click(button, interaction)
+
+    # the button is now known to be broken: the next click is answered without alerting bot-spam again
+    interaction.response = FakeResponse()
+    rest_calls['response'] = interaction.response.send_message
+    spam_send = click(button, interaction)
+    calls = count(rest_calls, spam_send)
+    assert calls['response'] == 1
+    assert calls['botspam'] == 0
+
+
+def test_busy_click_is_turned_away():
+    button, interaction, rest_calls = make_click()
+    # no room for any clicks
+    with mock.patch.object(bot_module, 'click_admission', AdmissionController(0, 0)):
+        spam_send = click(button, interaction)
+
+    calls = count(rest_calls, spam_send)
+    assert {name: number for name, number in calls.items() if number} == {'response': 1}
+    assert 'busy' in rest_calls['response'].await_args.kwargs['embed'].description
+
+
+def test_botspam_alert_carries_trace_id():
+    error = discord.Forbidden(mock.MagicMock(status=403), 'Missing Permissions')
+    button, interaction, rest_calls = make_click(add_roles=error)
+    spam_send = click(button, interaction)
+
+    # the alert keeps the error text and adds the trace ID, which is the click's interaction ID
+    footer = spam_send.await_args_list[0].kwargs['embed'].footer.text
+    assert str(error) in footer
+    assert f'Trace ID: {interaction.id}' in footer
@@ -0,0 +1,112 @@
+"""
+test_inflight.py
+
+InFlightRegistry: repeat clicks on the same button share the first click's operation and its result or error, and one
+click giving up doesn't cancel the operation for the others.
+"""
+# import libraries
+import asyncio
+
+# import local modules
+from ptn.buttonrolebot.modules.RoleManagement import InFlightRegistry
+
+
+KEY = (1, 7, 100)
+
+
+def operation(calls, gate, result='done'):
+    # a factory that counts how many operations it started, each held until the gate opens
+    async def run():
+        calls.append(result)
+        await gate.wait()
+        return result
+    return lambda: run()
+
+
+def test_repeat_clicks_share_one_operation():
+    async def clicks():
+        registry = InFlightRegistry()
+        gate = asyncio.Event()
+        waiters = [asyncio.ensure_future(registry.run(KEY, operation(calls, gate))) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert registry.in_flight() == 1
+        gate.set()
+        return await asyncio.gather(*waiters), registry.in_flight()
+
+    calls = []
+    results, in_flight = asyncio.run(clicks())
+
+    assert calls == ['done']
+    assert results == ['done', 'done', 'done']
+    assert in_flight == 0
+
+
+def test_other_keys_run_separately():
+    async def clicks():
+        registry = InFlightRegistry()
+        gate = asyncio.Event()
+        waiters = [
+            asyncio.ensure_future(registry.run(KEY, operation(calls, gate, 'first'))),
+            asyncio.ensure_future(registry.run((1, 7, 101), operation(calls, gate, 'other role'))),
+            asyncio.ensure_future(registry.run((1, 8, 100), operation(calls, gate, 'other member'))),
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*waiters)
+
+    calls = []
+    assert asyncio.run(clicks()) == ['first', 'other role', 'other member']
+    assert len(calls) == 3
+
+
+def test_finished_operation_is_not_reused():
+    async def clicks():
+        registry = InFlightRegistry()
+        gate = asyncio.Event()
+        gate.set()
+        await registry.run(KEY, operation(calls, gate, 'first'))
+        return await registry.run(KEY, operation(calls, gate, 'second'))
+
+    calls = []
+    assert asyncio.run(clicks()) == 'second'
+    assert calls == ['first', 'second']
+
+
+def test_cancelled_waiter_does_not_cancel_operation():
+    async def clicks():
+        registry = InFlightRegistry()
+        gate = asyncio.Event()
+        first = asyncio.ensure_future(registry.run(KEY, operation(calls, gate)))
+        second = asyncio.ensure_future(registry.run(KEY, operation(calls, gate)))
+        await asyncio.sleep(0)
+
+        # e.g. the first click timing out
+        first.cancel()
+        await asyncio.sleep(0)
+        assert first.cancelled()
+
+        gate.set()
+        return await second
+
+    calls = []
+    assert asyncio.run(clicks()) == 'done'
+    assert calls == ['done']
+
+
+def test_error_reaches_every_waiter():
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError('boom')
+
+    async def clicks():
+        registry = InFlightRegistry()
+        results = await asyncio.gather(
+            registry.run(KEY, failing), registry.run(KEY, failing), return_exceptions=True
+        )
+        return results, registry.in_flight()
+
+    (first, second), in_flight = asyncio.run(clicks())
+
+    assert isinstance(first, RuntimeError)
+    assert second is first
+    assert in_flight == 0
@@ -0,0 +1,79 @@
+"""
+test_panel_registry.py
+
+The panel registry records a panel's buttons in the order Discord shows them, so a fresh record always matches the
+message it was saved from, whatever order the editor added the buttons in.
+"""
+# import libraries
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+# import discord
+import discord
+
+# import local modules
+from ptn.buttonrolebot.bot import DynamicButton
+from ptn.buttonrolebot.modules.Database import Database, PanelRegistry
+from ptn.buttonrolebot.modules.PanelCrawler import registry_matches_message
+
+
+MESSAGE_ID = 900
+
+
+def editor_button(role_id, row, action='give'):
+    # the RoleButtonData attributes the registry reads
+    return SimpleNamespace(
+        role_id=role_id, button_action=action, button_label=f'Role {role_id}', button_emoji=None,
+        button_style=discord.ButtonStyle.blurple, button_row=row
+    )
+
+
+def rendered_message(buttons):
+    # the message as Discord returns it after the editor commits these buttons
+    view = discord.ui.View(timeout=None)
+    for button in buttons:
+        item = DynamicButton(button.button_action, button.role_id, MESSAGE_ID)
+        item.item.row = button.button_row
+        view.add_item(item)
+    components = [discord.components._component_factory(row) for row in view.to_components()]
+    return SimpleNamespace(
+        id=MESSAGE_ID, guild=SimpleNamespace(id=1), channel=SimpleNamespace(id=2), components=components
+    )
+
+
+def save_and_load(buttons, message):
+    async def run():
+        registry = PanelRegistry(Database(os.path.join(tempfile.mkdtemp(), 'brb.db')))
+        await registry.save_panel(message, buttons, user_id=7)
+        loaded = await registry.load_panel(MESSAGE_ID)
+        await registry.db.close()
+        return loaded
+
+    return asyncio.run(run())
+
+
+def test_fresh_record_matches_message():
+    buttons = [editor_button(role_id, 0) for role_id in (1, 2, 3)] + [editor_button(4, 1, 'take')]
+    message = rendered_message(buttons)
+
+    assert registry_matches_message(save_and_load(buttons, message), message)
+
+
+def test_button_added_to_earlier_row_matches_message():
+    # the editor appends new buttons to its list, even when they go on a row above existing ones
+    buttons = [editor_button(role_id, 0) for role_id in (1, 2, 3, 4)] + [editor_button(5, 1), editor_button(6, 0)]
+    message = rendered_message(buttons)
+    loaded = save_and_load(buttons, message)
+
+    assert [button['role_id'] for button in loaded] == [1, 2, 3, 4, 6, 5]
+    assert registry_matches_message(loaded, message)
+
+
+def test_changed_buttons_do_not_match():
+    buttons = [editor_button(1, 0), editor_button(2, 0)]
+    loaded = save_and_load(buttons, rendered_message(buttons))
+
+    assert not registry_matches_message(loaded, rendered_message([editor_button(1, 0)]))
+    assert not registry_matches_message(loaded, rendered_message([editor_button(1, 0), editor_button(2, 0, 'take')]))
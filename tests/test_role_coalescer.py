@@ -0,0 +1,181 @@
+"""
+test_role_coalescer.py
+
+RoleChangeCoalescer: a member's clicks within the window go out as one request, a single change uses the per-role
+endpoint, a combined edit keeps changes the member cache hasn't caught up with, and a failed batch fails every click in
+it.
+
+Members are fakes whose role cache only changes when a test says so, like a gateway that hasn't caught up yet.
+"""
+# import libraries
+import asyncio
+import itertools
+from types import SimpleNamespace
+from unittest import mock
+
+# import discord
+import discord
+import pytest
+
+# import local modules
+from ptn.buttonrolebot.modules.RoleManagement import RoleChangeCoalescer
+
+
+WINDOW = 0.05
+
+# fresh guild IDs for every member, so no scheduler state is shared between tests
+_ids = itertools.count(2000)
+
+
+def make_role(role_id):
+    return SimpleNamespace(id=role_id, is_default=lambda: False)
+
+
+class FakeMember:
+
+    def __init__(self, role_ids=(), guild=None, member_id=7):
+        """
+        A member whose cached roles are only what the test sets.
+        """
+        self.id = member_id
+        self.guild = guild or SimpleNamespace(id=next(_ids))
+        self.guild.get_member = lambda requested_id: self if requested_id == self.id else None
+        self.cached_role_ids = set(role_ids)
+        self.add_roles = mock.AsyncMock()
+        self.remove_roles = mock.AsyncMock()
+        self.edit = mock.AsyncMock()
+
+    @property
+    def roles(self):
+        return [make_role(role_id) for role_id in self.cached_role_ids]
+
+
+def edited_role_ids(member, call=-1):
+    return {role.id for role in member.edit.await_args_list[call].kwargs['roles']}
+
+
+def test_single_change_uses_role_endpoint():
+    member = FakeMember()
+    role = make_role(1)
+
+    asyncio.run(RoleChangeCoalescer(WINDOW).submit(member, role, 'add'))
+
+    member.add_roles.assert_awaited_once_with(role)
+    member.edit.assert_not_awaited()
+
+
+def test_changes_in_window_are_one_edit_per_member():
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        await asyncio.gather(
+            coalescer.submit(first, make_role(1), 'add'),
+            coalescer.submit(first, make_role(2), 'add'),
+            coalescer.submit(first, make_role(10), 'remove'),
+            coalescer.submit(second, make_role(3), 'add'),
+        )
+
+    first = FakeMember(role_ids={10, 11})
+    second = FakeMember(guild=first.guild, member_id=8)
+    asyncio.run(clicks())
+
+    # the three changes to the first member are one PATCH with its complete new role list
+    assert first.edit.await_count == 1
+    assert edited_role_ids(first) == {1, 2, 11}
+    first.add_roles.assert_not_awaited()
+    first.remove_roles.assert_not_awaited()
+    # the other member's single change is batched on its own
+    second.add_roles.assert_awaited_once()
+    second.edit.assert_not_awaited()
+
+
+def test_later_click_on_same_role_replaces_earlier():
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        await asyncio.gather(
+            coalescer.submit(member, make_role(1), 'add'),
+            coalescer.submit(member, make_role(1), 'remove'),
+        )
+
+    member = FakeMember(role_ids={1})
+    asyncio.run(clicks())
+
+    member.remove_roles.assert_awaited_once()
+    member.add_roles.assert_not_awaited()
+
+
+def test_edit_keeps_changes_the_cache_has_not_seen():
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        # written, but the member cache never hears about them
+        await coalescer.submit(member, make_role(1), 'add')
+        await coalescer.submit(member, make_role(10), 'remove')
+        await asyncio.gather(
+            coalescer.submit(member, make_role(2), 'add'),
+            coalescer.submit(member, make_role(3), 'add'),
+        )
+
+    member = FakeMember(role_ids={10, 11})
+    asyncio.run(clicks())
+
+    assert edited_role_ids(member) == {1, 2, 3, 11}
+
+
+def test_edit_waits_for_earlier_batch():
+    order = []
+
+    async def slow_add(role):
+        order.append('add started')
+        await asyncio.sleep(WINDOW * 4)
+        order.append('add finished')
+
+    async def edit(roles):
+        order.append('edit')
+
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        first_click = asyncio.ensure_future(coalescer.submit(member, make_role(1), 'add'))
+        await asyncio.sleep(WINDOW * 1.5)
+        await asyncio.gather(
+            first_click,
+            coalescer.submit(member, make_role(2), 'add'),
+            coalescer.submit(member, make_role(3), 'add'),
+        )
+
+    member = FakeMember()
+    member.add_roles.side_effect = slow_add
+    member.edit.side_effect = edit
+    asyncio.run(clicks())
+
+    assert order == ['add started', 'add finished', 'edit']
+    assert edited_role_ids(member) == {1, 2, 3}
+
+
+def test_failure_reaches_every_click_in_batch():
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        return await asyncio.gather(
+            coalescer.submit(member, make_role(1), 'add'),
+            coalescer.submit(member, make_role(2), 'add'),
+            return_exceptions=True
+        )
+
+    member = FakeMember()
+    error = discord.Forbidden(mock.MagicMock(status=403), 'Missing Permissions')
+    member.edit.side_effect = error
+    results = asyncio.run(clicks())
+
+    assert results == [error, error]
+
+
+def test_failed_batch_does_not_block_the_next():
+    async def clicks():
+        coalescer = RoleChangeCoalescer(WINDOW)
+        with pytest.raises(RuntimeError):
+            await coalescer.submit(member, make_role(1), 'add')
+        await coalescer.submit(member, make_role(2), 'add')
+
+    member = FakeMember()
+    member.add_roles.side_effect = [RuntimeError('boom'), None]
+    asyncio.run(clicks())
+
+    assert member.add_roles.await_count == 2
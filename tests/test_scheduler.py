@@ -0,0 +1,226 @@
+"""
+test_scheduler.py
+
+RESTScheduler: clicks are served before background work, members take turns, requests are paced to the bucket's rate,
+and a full queue refuses new requests. AdmissionController: each guild handles a limited number of clicks at once,
+turns away clicks beyond its queue, and gets every place back however the click ends.
+"""
+# import libraries
+import asyncio
+import time
+
+import pytest
+
+# import local modules
+from ptn.buttonrolebot.modules.ErrorHandler import QueueFullError
+from ptn.buttonrolebot.modules.Scheduler import RESTScheduler, AdmissionController, PRIORITY_CLICK, PRIORITY_BACKGROUND
+
+
+BUCKET = ('member_role', 1)
+
+
+def recorder(calls, name, gate=None):
+    # a job factory that notes when its call starts, optionally holding it until the gate opens
+    async def call():
+        calls.append(name)
+        if gate is not None:
+            await gate.wait()
+        return name
+    return call
+
+
+async def until_started(calls, count):
+    while len(calls) < count:
+        await asyncio.sleep(0)
+
+
+def test_clicks_before_background():
+    async def jobs():
+        scheduler = RESTScheduler(rate=1000, burst=100, concurrency=1, queue_limit=10)
+        gate = asyncio.Event()
+        # hold the only slot so everything after it queues
+        first = asyncio.ensure_future(scheduler.run(BUCKET, 1, recorder(calls, 'first', gate)))
+        await until_started(calls, 1)
+        queued = [
+            asyncio.ensure_future(scheduler.run(BUCKET, 2, recorder(calls, 'background'), PRIORITY_BACKGROUND)),
+            asyncio.ensure_future(scheduler.run(BUCKET, 3, recorder(calls, 'click'), PRIORITY_CLICK)),
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *queued)
+
+    calls = []
+    asyncio.run(jobs())
+
+    assert calls == ['first', 'click', 'background']
+
+
+def test_members_take_turns():
+    async def jobs():
+        scheduler = RESTScheduler(rate=1000, burst=100, concurrency=1, queue_limit=10)
+        gate = asyncio.Event()
+        first = asyncio.ensure_future(scheduler.run(BUCKET, 0, recorder(calls, 'first', gate)))
+        await until_started(calls, 1)
+        # member 1 queues three calls before member 2 queues one
+        queued = [asyncio.ensure_future(scheduler.run(BUCKET, 1, recorder(calls, f'a{number}'))) for number in range(3)]
+        queued.append(asyncio.ensure_future(scheduler.run(BUCKET, 2, recorder(calls, 'b0'))))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *queued)
+
+    calls = []
+    asyncio.run(jobs())
+
+    assert calls == ['first', 'a0', 'b0', 'a1', 'a2']
+
+
+def test_paced_to_rate_after_burst():
+    async def jobs():
+        scheduler = RESTScheduler(rate=20, burst=2, concurrency=10, queue_limit=10)
+        start = time.monotonic()
+
+        async def timed():
+            started.append(time.monotonic() - start)
+
+        await asyncio.gather(*(scheduler.run(BUCKET, member_id, timed) for member_id in range(6)))
+
+    started = []
+    asyncio.run(jobs())
+
+    # the burst goes straight away, then one call every 1/20s
+    assert started[1] < 0.025
+    assert started[-1] == pytest.approx(4 / 20, abs=0.03)
+
+
+def test_full_queue_refuses():
+    async def jobs():
+        scheduler = RESTScheduler(rate=1000, burst=100, concurrency=1, queue_limit=2)
+        gate = asyncio.Event()
+        running = asyncio.ensure_future(scheduler.run(BUCKET, 1, recorder(calls, 'running', gate)))
+        await until_started(calls, 1)
+        queued = [asyncio.ensure_future(scheduler.run(BUCKET, 1, recorder(calls, f'queued{number}'))) for number in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError):
+            await scheduler.run(BUCKET, 2, recorder(calls, 'refused'))
+        # other buckets have their own queues
+        await scheduler.run(('member_role', 2), 2, recorder(calls, 'other bucket'))
+
+        gate.set()
+        await asyncio.gather(running, *queued)
+
+    calls = []
+    asyncio.run(jobs())
+
+    assert 'refused' not in calls
+    assert calls == ['running', 'other bucket', 'queued0', 'queued1']
+
+
+def test_abandoned_job_is_not_sent():
+    async def jobs():
+        scheduler = RESTScheduler(rate=1000, burst=100, concurrency=1, queue_limit=10)
+        gate = asyncio.Event()
+        running = asyncio.ensure_future(scheduler.run(BUCKET, 1, recorder(calls, 'running', gate)))
+        await until_started(calls, 1)
+        abandoned = asyncio.ensure_future(scheduler.run(BUCKET, 2, recorder(calls, 'abandoned')))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        gate.set()
+        await running
+        await scheduler.run(BUCKET, 3, recorder(calls, 'next'))
+
+    calls = []
+    asyncio.run(jobs())
+
+    assert calls == ['running', 'next']
+
+
+def test_job_error_reaches_caller():
+    async def failing():
+        raise RuntimeError('boom')
+
+    async def jobs():
+        scheduler = RESTScheduler(rate=1000, burst=100, concurrency=1, queue_limit=10)
+        with pytest.raises(RuntimeError):
+            await scheduler.run(BUCKET, 1, failing)
+        # and the slot it held is given back
+        return await scheduler.run(BUCKET, 1, recorder([], 'after'))
+
+    assert asyncio.run(jobs()) == 'after'
+
+
+def test_admission_limit_per_guild():
+    admission = AdmissionController(concurrency=2, queue_limit=1)
+
+    tickets = [admission.try_admit(1) for _ in range(3)]
+    assert all(tickets)
+    # running and waiting places are all taken
+    assert admission.try_admit(1) is None
+    # other guilds have their own
+    assert admission.try_admit(2) is not None
+
+    tickets[0].release()
+    assert admission.try_admit(1) is not None
+    assert admission.pending() == {1: 3, 2: 1}
+
+
+def test_admitted_clicks_wait_for_a_slot():
+    async def clicks():
+        admission = AdmissionController(concurrency=2, queue_limit=5)
+        gate = asyncio.Event()
+        running = []
+
+        async def click(name):
+            ticket = admission.try_admit(1)
+            try:
+                async with ticket:
+                    running.append(name)
+                    await gate.wait()
+            finally:
+                ticket.release()
+
+        clicks = [asyncio.ensure_future(click(name)) for name in range(3)]
+        await asyncio.sleep(0)
+        # only two run at once; the third is admitted but waiting
+        assert running == [0, 1]
+        assert admission.pending() == {1: 3}
+        gate.set()
+        await asyncio.gather(*clicks)
+        return running, admission.pending()
+
+    running, pending = asyncio.run(clicks())
+
+    assert running == [0, 1, 2]
+    assert pending == {1: 0}
+
+
+def test_ticket_released_on_error():
+    async def failing_click():
+        ticket = admission.try_admit(1)
+        try:
+            async with ticket:
+                raise RuntimeError('boom')
+        finally:
+            # the click's own release, after the context manager has already given the place back
+            ticket.release()
+
+    admission = AdmissionController(concurrency=1, queue_limit=0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(failing_click())
+
+    assert admission.pending() == {1: 0}
+    ticket = admission.try_admit(1)
+    assert ticket is not None
+    assert ticket.state.semaphore.locked() is False
+
+
+def test_ticket_released_without_running():
+    admission = AdmissionController(concurrency=1, queue_limit=0)
+
+    # e.g. the click timed out before its turn came
+    ticket = admission.try_admit(1)
+    ticket.release()
+    ticket.release()
+
+    assert admission.pending() == {1: 0}
+    assert admission.try_admit(1) is not None